@@ -1,3 +1,9 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AdminOverviewSnapshot
+
+
+@admin.register(AdminOverviewSnapshot)
+class AdminOverviewSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['id', 'computed_at']
+    readonly_fields = ['user_statistics', 'course_statistics', 'payment_statistics', 'computed_at']
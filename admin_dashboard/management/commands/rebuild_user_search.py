@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from admin_dashboard import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index for the admin user directory'
+
+    def handle(self, *args, **options):
+        if not search.is_supported():
+            self.stdout.write(
+                self.style.WARNING('User search index is only used on SQLite, nothing to do')
+            )
+            return
+
+        indexed_count = search.rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Indexed {indexed_count} users')
+        )
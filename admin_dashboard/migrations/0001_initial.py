@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminOverviewSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_statistics', models.JSONField(default=dict)),
+                ('course_statistics', models.JSONField(default=dict)),
+                ('payment_statistics', models.JSONField(default=dict)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
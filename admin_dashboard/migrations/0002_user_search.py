@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS users_search USING fts5("
+        "username, email, name, tokenize = 'trigram')"
+    )
+    schema_editor.execute(
+        """
+        INSERT INTO users_search (rowid, username, email, name)
+        SELECT rowid, username, email, trim(first_name || ' ' || last_name)
+        FROM users
+        """
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS users_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0001_initial'),
+        ('authentication', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+
+def key_search_index_by_user_id(apps, schema_editor):
+    """
+    Rows keyed by the rowid of `users` break when Django remakes that table
+    (rowids are compacted), so store the user id itself instead
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS users_search")
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE users_search USING fts5("
+        "user_id UNINDEXED, username, email, name, tokenize = 'trigram')"
+    )
+    schema_editor.execute(
+        """
+        INSERT INTO users_search (user_id, username, email, name)
+        SELECT id, username, email, trim(first_name || ' ' || last_name)
+        FROM users
+        """
+    )
+
+
+def key_search_index_by_rowid(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS users_search")
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE users_search USING fts5("
+        "username, email, name, tokenize = 'trigram')"
+    )
+    schema_editor.execute(
+        """
+        INSERT INTO users_search (rowid, username, email, name)
+        SELECT rowid, username, email, trim(first_name || ' ' || last_name)
+        FROM users
+        """
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0002_user_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(key_search_index_by_user_id, key_search_index_by_rowid),
+    ]
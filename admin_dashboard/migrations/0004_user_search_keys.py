@@ -0,0 +1,59 @@
+from django.db import migrations
+
+
+def key_search_index_by_mapping(apps, schema_editor):
+    """
+    Filtering an FTS5 table on an UNINDEXED column scans every row, so each
+    user save paid a full-table delete. Users now get a stable integer key
+    in an ordinary table, and that key is the FTS rowid.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS users_search")
+    schema_editor.execute(
+        "CREATE TABLE IF NOT EXISTS users_search_keys ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id char(32) NOT NULL UNIQUE)"
+    )
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE users_search USING fts5("
+        "username, email, name, tokenize = 'trigram')"
+    )
+    schema_editor.execute("INSERT INTO users_search_keys (user_id) SELECT id FROM users")
+    schema_editor.execute(
+        """
+        INSERT INTO users_search (rowid, username, email, name)
+        SELECT k.id, u.username, u.email, trim(u.first_name || ' ' || u.last_name)
+        FROM users u JOIN users_search_keys k ON k.user_id = u.id
+        """
+    )
+
+
+def key_search_index_by_user_id(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS users_search")
+    schema_editor.execute("DROP TABLE IF EXISTS users_search_keys")
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE users_search USING fts5("
+        "user_id UNINDEXED, username, email, name, tokenize = 'trigram')"
+    )
+    schema_editor.execute(
+        """
+        INSERT INTO users_search (user_id, username, email, name)
+        SELECT id, username, email, trim(first_name || ' ' || last_name)
+        FROM users
+        """
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_dashboard', '0003_user_search_user_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(key_search_index_by_mapping, key_search_index_by_user_id),
+    ]
@@ -1,3 +1,21 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class AdminOverviewSnapshot(models.Model):
+    """
+    Site-wide counters for the admin overview, refreshed every minute by
+    the refresh_admin_overview task (see overview.py). A single row,
+    overwritten in place.
+    """
+    user_statistics = models.JSONField(default=dict)
+    course_statistics = models.JSONField(default=dict)
+    payment_statistics = models.JSONField(default=dict)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Admin overview at {self.computed_at:%Y-%m-%d %H:%M:%S}"
+
+    @property
+    def age_seconds(self):
+        return round((timezone.now() - self.computed_at).total_seconds(), 1)
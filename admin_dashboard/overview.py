@@ -0,0 +1,119 @@
+# admin_dashboard/overview.py
+
+"""
+Admin overview statistics.
+
+The user, course and payment counters are computed with one conditional
+aggregate per table and stored in AdminOverviewSnapshot by a beat task
+every minute (or on demand with ?refresh=true). The view reads the
+snapshot from the cache, so polling admins never count the user table
+themselves. Recent activity is a handful of newest rows; the model
+instances are cached for the same interval and serialized per request, so
+request-bound output such as absolute URLs always matches the caller.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from authentication.models import User
+from courses.models import Course
+from courses.serializers import course_list_prefetches
+from payments.models import Payment
+from .models import AdminOverviewSnapshot
+
+SNAPSHOT_INTERVAL = getattr(settings, 'ADMIN_OVERVIEW_INTERVAL_SECONDS', 60)
+# Past this age the beat task is assumed down and the view refreshes itself
+SNAPSHOT_MAX_AGE = SNAPSHOT_INTERVAL * 5
+
+SNAPSHOT_CACHE_KEY = 'admin_overview_snapshot'
+RECENT_ACTIVITY_CACHE_KEY = 'admin_overview_recent'
+RECENT_LIMIT = 5
+
+USER_ROLES = ['student', 'teacher', 'admin', 'subadmin']
+
+
+def compute_statistics():
+    """
+    (user, course, payment) statistics, one query each
+    """
+    users = User.objects.aggregate(
+        total_users=Count('id'),
+        **{f'total_{role}s': Count('id', filter=Q(role=role)) for role in USER_ROLES}
+    )
+    courses = Course.objects.aggregate(
+        total_courses=Count('id'),
+        active_courses=Count('id', filter=Q(is_active=True)),
+        paid_courses=Count('id', filter=Q(course_type='paid')),
+        free_courses=Count('id', filter=Q(course_type='free')),
+    )
+    payments = Payment.objects.aggregate(
+        total_payments=Count('id'),
+        successful_payments=Count('id', filter=Q(is_successful=True)),
+        total_revenue=Sum('amount', filter=Q(is_successful=True)),
+    )
+    payments['total_revenue'] = float(payments['total_revenue'] or 0)
+    return users, courses, payments
+
+
+def refresh_snapshot():
+    users, courses, payments = compute_statistics()
+    snapshot, _ = AdminOverviewSnapshot.objects.update_or_create(
+        id=1,
+        defaults={
+            'user_statistics': users,
+            'course_statistics': courses,
+            'payment_statistics': payments,
+            'computed_at': timezone.now(),
+        }
+    )
+    cache.set(SNAPSHOT_CACHE_KEY, snapshot, SNAPSHOT_INTERVAL)
+    return snapshot
+
+
+def get_snapshot(refresh=False):
+    """
+    The stored snapshot, recomputed when asked to or when it is missing or
+    older than SNAPSHOT_MAX_AGE
+    """
+    snapshot = None if refresh else cache.get(SNAPSHOT_CACHE_KEY)
+    if snapshot is None and not refresh:
+        snapshot = AdminOverviewSnapshot.objects.filter(id=1).first()
+        if snapshot is not None:
+            # Let the other requests of this interval skip the database too
+            cache.set(SNAPSHOT_CACHE_KEY, snapshot, SNAPSHOT_INTERVAL)
+    if snapshot is None or snapshot.computed_at < timezone.now() - timedelta(seconds=SNAPSHOT_MAX_AGE):
+        return refresh_snapshot()
+    return snapshot
+
+
+def recent_activity():
+    """
+    Newest users, courses and successful payments, loaded for serialization
+    """
+    select_lookups, prefetch_lookups = course_list_prefetches()
+    return {
+        'recent_users': list(User.objects.order_by('-created_at')[:RECENT_LIMIT]),
+        'recent_courses': list(
+            Course.objects.select_related(*select_lookups).prefetch_related(
+                *prefetch_lookups
+            ).order_by('-created_at')[:RECENT_LIMIT]
+        ),
+        'recent_payments': list(
+            Payment.objects.filter(is_successful=True).select_related('user').order_by('-created_at')[:RECENT_LIMIT]
+        ),
+    }
+
+
+def get_recent_activity():
+    """
+    recent_activity() rows, cached for one snapshot interval
+    """
+    recent = cache.get(RECENT_ACTIVITY_CACHE_KEY)
+    if recent is None:
+        recent = recent_activity()
+        cache.set(RECENT_ACTIVITY_CACHE_KEY, recent, SNAPSHOT_INTERVAL)
+    return recent
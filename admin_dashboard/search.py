@@ -0,0 +1,148 @@
+# admin_dashboard/search.py
+
+"""
+Search index for the admin user directory.
+
+On SQLite users are mirrored into an FTS5 table (created by migrations
+0002-0004) with the trigram tokenizer, one row per user holding username,
+email and full name. FTS5 can only look rows up by rowid, so every user
+gets a stable integer key in the ordinary `users_search_keys` table and
+that key is the rowid of their index row; edits replace the row by rowid
+instead of scanning the index for the user id. Trigrams match any
+substring of three or more characters, so a search behaves like the old
+`icontains` filters but is answered from the index instead of scanning the
+user table. Shorter terms, and other database backends, fall back to plain
+`icontains` filtering.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Count, Q
+from django.db.models.expressions import RawSQL
+
+from authentication.models import User
+
+SEARCH_TABLE = 'users_search'
+KEYS_TABLE = 'users_search_keys'
+
+# The trigram tokenizer cannot match anything shorter
+MIN_TERM_LENGTH = 3
+
+# Fields a search touches, and the ones the index is built from
+SEARCH_FIELDS = ('username', 'email', 'first_name', 'last_name')
+
+TERM_RE = re.compile(r'\S+')
+
+
+def is_supported():
+    """FTS5 is only available on SQLite"""
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(query):
+    """
+    Turn free user input into an FTS5 MATCH expression where every term
+    must appear as a substring, e.g. 'doe gmail' -> '"doe" AND "gmail"'.
+    Returns None when a term is too short for the trigram index.
+    """
+    terms = TERM_RE.findall(query)
+    if not terms or any(len(term) < MIN_TERM_LENGTH for term in terms):
+        return None
+    return ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def index_user(user):
+    """
+    (Re)index one user from the saved instance
+    """
+    if not is_supported():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT OR IGNORE INTO {KEYS_TABLE} (user_id) VALUES (%s)', [user.id.hex])
+        cursor.execute(f'SELECT id FROM {KEYS_TABLE} WHERE user_id = %s', [user.id.hex])
+        key = cursor.fetchone()[0]
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [key])
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, username, email, name) VALUES (%s, %s, %s, %s)',
+            [key, user.username, user.email, f'{user.first_name} {user.last_name}'.strip()]
+        )
+
+
+def remove_user(user_id):
+    if not is_supported():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT id FROM {KEYS_TABLE} WHERE user_id = %s', [user_id.hex])
+        row = cursor.fetchone()
+        if row is not None:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [row[0]])
+            cursor.execute(f'DELETE FROM {KEYS_TABLE} WHERE id = %s', [row[0]])
+
+
+def rebuild_index():
+    """
+    Rebuild the whole index from the user table. Returns the number of
+    indexed users.
+    """
+    if not is_supported():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(f'DELETE FROM {KEYS_TABLE} WHERE user_id NOT IN (SELECT id FROM users)')
+        cursor.execute(f'INSERT OR IGNORE INTO {KEYS_TABLE} (user_id) SELECT id FROM users')
+        cursor.execute(
+            f"""
+            INSERT INTO {SEARCH_TABLE} (rowid, username, email, name)
+            SELECT k.id, u.username, u.email, trim(u.first_name || ' ' || u.last_name)
+            FROM users u JOIN {KEYS_TABLE} k ON k.user_id = u.id
+            """
+        )
+        cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def filter_users(queryset, query):
+    """
+    Narrow a User queryset to the users matching a free text search
+    """
+    match = build_match_query(query) if is_supported() else None
+    if match is None:
+        condition = Q()
+        for term in TERM_RE.findall(query):
+            condition &= Q(*[Q(**{f'{field}__icontains': term}) for field in SEARCH_FIELDS], _connector=Q.OR)
+        return queryset.filter(condition)
+
+    return queryset.filter(id__in=RawSQL(
+        f'SELECT k.user_id FROM {SEARCH_TABLE} JOIN {KEYS_TABLE} k ON k.id = {SEARCH_TABLE}.rowid '
+        f'WHERE {SEARCH_TABLE} MATCH %s', [match]
+    ))
+
+
+def _count(condition):
+    return Count('id', filter=condition) if condition else Count('id')
+
+
+def facet_counts(queryset, role=None, is_verified=None):
+    """
+    Role and verification counts of the matching users, all from one
+    aggregate query. Each facet ignores its own filter so the other options
+    keep their counts; `total` applies both.
+    """
+    role_condition = Q(role=role) if role else Q()
+    verified_condition = Q(is_verified=is_verified) if is_verified is not None else Q()
+
+    aggregates = {'total': _count(role_condition & verified_condition)}
+    for value, _ in User.USER_ROLES:
+        aggregates[f'role_{value}'] = _count(Q(role=value) & verified_condition)
+    for value in (True, False):
+        aggregates[f'verified_{value}'] = _count(Q(is_verified=value) & role_condition)
+    counts = queryset.aggregate(**aggregates)
+
+    return counts['total'], {
+        'role': {value: counts[f'role_{value}'] for value, _ in User.USER_ROLES},
+        'is_verified': {'true': counts['verified_True'], 'false': counts['verified_False']},
+    }
@@ -0,0 +1,23 @@
+# admin_dashboard/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from authentication.models import User
+from . import search
+
+
+@receiver(post_save, sender=User)
+def index_user_for_search(sender, instance, update_fields=None, **kwargs):
+    """
+    Keep the user directory index in step with user edits. Saves that only
+    touch other columns (e.g. last_login on every sign-in) are skipped.
+    """
+    if update_fields is not None and not set(update_fields) & set(search.SEARCH_FIELDS):
+        return
+    search.index_user(instance)
+
+
+@receiver(post_delete, sender=User)
+def remove_user_from_search(sender, instance, **kwargs):
+    search.remove_user(instance.id)
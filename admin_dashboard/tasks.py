@@ -0,0 +1,18 @@
+# admin_dashboard/tasks.py
+import logging
+
+from celery import shared_task
+
+from . import overview
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def refresh_admin_overview():
+    """
+    Recompute the admin overview statistics snapshot
+    """
+    snapshot = overview.refresh_snapshot()
+    logger.info(f"Refreshed admin overview snapshot at {snapshot.computed_at}")
+    return snapshot.id
@@ -1,3 +1,181 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from authentication.models import User
+from courses.models import Course
+from payments.models import Payment
+from . import search
+from .overview import SNAPSHOT_CACHE_KEY, get_snapshot
+from .tasks import refresh_admin_overview
+
+
+def make_user(username, role, **extra):
+    return User.objects.create_user(email=f'{username}@example.com', username=username, password='x', role=role, **extra)
+
+
+class AdminOverviewTests(TestCase):
+    url = '/api/admin-portal/overview/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = make_user('admin', 'admin')
+        teacher = make_user('teacher', 'teacher').teacher_profile
+        Course.objects.create(
+            title='C', description='d', teacher=teacher, course_type='paid', thumbnail='course_thumbnails/x.jpg'
+        )
+        student = make_user('student', 'student')
+        Payment.objects.bulk_create([
+            Payment(user=student, gateway='esewa', txn_ref='r1', amount=100, is_successful=True),
+            Payment(user=student, gateway='esewa', txn_ref='r2', amount=50, is_successful=False),
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def overview(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def test_statistics(self):
+        data = self.overview()
+
+        self.assertEqual(data['user_statistics']['total_users'], 3)
+        self.assertEqual(data['course_statistics']['paid_courses'], 1)
+        self.assertEqual(data['payment_statistics']['total_revenue'], 100.0)
+
+    def test_snapshot_is_reused_until_refreshed(self):
+        self.overview()
+        make_user('late', 'student')
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.overview()
+        self.assertEqual(data['user_statistics']['total_users'], 3)
+        # Authentication only; the statistics come from the snapshot
+        self.assertLessEqual(len(ctx), 1)
+
+        self.assertEqual(self.overview(refresh='true')['user_statistics']['total_users'], 4)
+
+    def test_stored_snapshot_refills_the_cache(self):
+        self.overview()
+        cache.delete(SNAPSHOT_CACHE_KEY)
+
+        get_snapshot()
+
+        self.assertIsNotNone(cache.get(SNAPSHOT_CACHE_KEY))
+
+    def test_refresh_task_rebuilds_the_snapshot(self):
+        self.overview()
+        make_user('late', 'student')
+
+        refresh_admin_overview()
+
+        self.assertEqual(self.overview()['user_statistics']['total_users'], 4)
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_urls_are_built_for_the_requesting_host(self):
+        self.overview()
+
+        response = self.client.get(self.url, SERVER_NAME='other.example')
+
+        thumbnail = response.json()['data']['recent_activity']['recent_courses'][0]['thumbnail']
+        self.assertTrue(thumbnail.startswith('http://other.example/'))
+
+    def test_requires_an_admin(self):
+        self.client.force_authenticate(User.objects.get(username='student'))
+
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class UserDirectoryTests(TestCase):
+    url = '/api/admin-portal/users/'
+
+    def setUp(self):
+        self.admin = make_user('boss', 'admin')
+        for i in range(6):
+            make_user(
+                f'jdoe{i}', 'student' if i % 2 else 'teacher',
+                first_name='Jane', last_name='Doerr', is_verified=i < 2
+            )
+        self.zed = make_user('zed', 'student')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def directory(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()['data']
+
+    def usernames(self, **params):
+        return sorted(user['username'] for user in self.directory(**params)['users'])
+
+    def test_substring_search_with_filters_and_facets(self):
+        data = self.directory(search='doer', role='student', page_size=2)
+
+        self.assertEqual(data['total_users'], 3)
+        self.assertEqual(len(data['users']), 2)
+        self.assertEqual(data['facets']['role']['teacher'], 3)
+
+    def test_terms_match_across_fields_case_insensitively(self):
+        self.assertEqual(self.usernames(search='EXAMPLE.COM jdoe3'), ['jdoe3'])
+        self.assertEqual(self.usernames(search='ze'), ['zed'])
+
+    def test_index_follows_user_changes(self):
+        self.zed.username = 'zorro'
+        self.zed.save()
+        self.assertEqual(self.usernames(search='zorr'), ['zorro'])
+
+        self.zed.delete()
+        self.assertEqual(self.directory(search='zorr')['total_users'], 0)
+
+    def test_query_count_does_not_grow_with_directory_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self.directory(search='jdoe', page_size=20)
+        for i in range(6, 26):
+            make_user(f'jdoe{i}', 'student')
+
+        with CaptureQueriesContext(connection) as large:
+            self.directory(search='jdoe', page_size=20)
+
+        self.assertEqual(len(large), len(small))
+
+    def test_page_numbers_reuse_the_facet_total(self):
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.directory(search='jdoe', page=2, page_size=4)
+
+        self.assertEqual((data['total_users'], len(data['users'])), (6, 2))
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'COUNT(*)' in q['sql']])
+
+    def test_cursor_pages_cover_every_user_once(self):
+        data = self.directory(cursor='', page_size=3)
+        seen = [user['id'] for user in data['users']]
+        while data['next']:
+            data = self.client.get(data['next']).json()['data']
+            seen += [user['id'] for user in data['users']]
+
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(len(seen), User.objects.count())
+
+    def test_rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.KEYS_TABLE}')
+            cursor.execute(f'DELETE FROM {search.SEARCH_TABLE}')
+
+        call_command('rebuild_user_search')
+
+        data = self.directory(search='jdoe', is_verified='true')
+        self.assertEqual((data['total_users'], data['facets']['is_verified']), (2, {'true': 2, 'false': 4}))
+
+    def test_reindexing_replaces_the_users_row(self):
+        for _ in range(3):
+            search.index_user(self.zed)
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {search.SEARCH_TABLE}')
+            indexed = cursor.fetchone()[0]
+            cursor.execute(f'SELECT COUNT(*) FROM {search.KEYS_TABLE}')
+            keys = cursor.fetchone()[0]
+        self.assertEqual((indexed, keys), (User.objects.count(), User.objects.count()))
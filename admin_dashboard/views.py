@@ -4,7 +4,8 @@ from rest_framework import status, permissions, generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from django.db.models import Count, Q, Sum
+from django.core.paginator import Paginator
+from django.db.models import Count, Sum
 from django.shortcuts import get_object_or_404
 from django.db import models
 from notifications.models import Notification
@@ -13,6 +14,9 @@ from authentication.serializers import UserSerializer
 from courses.models import Course, Teacher, Enrollment
 from courses.serializers import CourseListSerializer
 from payments.models import Payment
+from lms.pagination import KeysetPagination
+from . import overview
+from . import search as user_search
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 import uuid
@@ -20,7 +24,14 @@ import uuid
 @swagger_auto_schema(
     method='get',
     operation_summary="Admin Dashboard Overview",
-    operation_description="Get an overview of statistics for admin dashboard, including users, courses, payments, and recent activities.",
+    operation_description=(
+        "Get an overview of statistics for admin dashboard, including users, courses, payments, and recent activities. "
+        "Statistics come from a snapshot refreshed every minute; `snapshot` reports when it was computed and its age. "
+        "Pass ?refresh=true to recompute it now."
+    ),
+    manual_parameters=[
+        openapi.Parameter('refresh', openapi.IN_QUERY, description="Recompute the statistics snapshot", type=openapi.TYPE_BOOLEAN),
+    ],
 )
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -36,75 +47,74 @@ def admin_dashboard_overview(request):
         }, status=status.HTTP_403_FORBIDDEN)
     
     # Get statistics
-    total_users = User.objects.count()
-    total_students = User.objects.filter(role='student').count()
-    total_teachers = User.objects.filter(role='teacher').count()
-    total_admins = User.objects.filter(role='admin').count()
-    total_subadmins = User.objects.filter(role='subadmin').count()
-    
-    # Course statistics
-    total_courses = Course.objects.count()
-    active_courses = Course.objects.filter(is_active=True).count()
-    paid_courses = Course.objects.filter(course_type='paid').count()
-    free_courses = Course.objects.filter(course_type='free').count()
-    
-    # Payment statistics
-    total_payments = Payment.objects.count()
-    successful_payments = Payment.objects.filter(is_successful=True).count()
-    total_revenue = Payment.objects.filter(is_successful=True).aggregate(
-        total=Sum('amount')
-    )['total'] or 0
-    
-    # Recent activity
-    recent_users = User.objects.order_by('-created_at')[:5]
-    recent_courses = Course.objects.order_by('-created_at')[:5]
-    recent_payments = Payment.objects.filter(is_successful=True).order_by('-created_at')[:5]
+    refresh = request.query_params.get('refresh', '').lower() == 'true'
+    snapshot = overview.get_snapshot(refresh=refresh)
+    
+    # Recent activity, serialized for this request from the cached rows
+    recent = overview.get_recent_activity()
+    recent_activity = {
+        'recent_users': UserSerializer(recent['recent_users'], many=True).data,
+        'recent_courses': CourseListSerializer(
+            recent['recent_courses'], many=True, context={'request': request}
+        ).data,
+        'recent_payments': [
+            {
+                'id': payment.id,
+                'user': payment.user.username,
+                'amount': float(payment.amount),
+                'gateway': payment.gateway,
+                'created_at': payment.created_at
+            } for payment in recent['recent_payments']
+        ]
+    }
     
     return Response({
         'success': True,
         'data': {
-            'user_statistics': {
-                'total_users': total_users,
-                'total_students': total_students,
-                'total_teachers': total_teachers,
-                'total_admins': total_admins,
-                'total_subadmins': total_subadmins
-            },
-            'course_statistics': {
-                'total_courses': total_courses,
-                'active_courses': active_courses,
-                'paid_courses': paid_courses,
-                'free_courses': free_courses
-            },
-            'payment_statistics': {
-                'total_payments': total_payments,
-                'successful_payments': successful_payments,
-                'total_revenue': float(total_revenue)
-            },
-            'recent_activity': {
-                'recent_users': UserSerializer(recent_users, many=True).data,
-                'recent_courses': CourseListSerializer(recent_courses, many=True).data,
-                'recent_payments': [
-                    {
-                        'id': payment.id,
-                        'user': payment.user.username,
-                        'amount': float(payment.amount),
-                        'gateway': payment.gateway,
-                        'created_at': payment.created_at
-                    } for payment in recent_payments
-                ]
+            'user_statistics': snapshot.user_statistics,
+            'course_statistics': snapshot.course_statistics,
+            'payment_statistics': snapshot.payment_statistics,
+            'recent_activity': recent_activity,
+            'snapshot': {
+                'computed_at': snapshot.computed_at,
+                'age_seconds': snapshot.age_seconds
             }
         }
     }, status=status.HTTP_200_OK)
 
 
+class UserDirectoryPagination(KeysetPagination):
+    """User directory pages (send ?cursor= for keyset paging)"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None, count=None):
+        # The facet aggregate already counted the rows; spare page numbers a COUNT(*)
+        self.known_count = count
+        return super().paginate_queryset(queryset, request, view)
+
+    def django_paginator_class(self, object_list, per_page):
+        paginator = Paginator(object_list, per_page)
+        if self.known_count is not None:
+            paginator.count = self.known_count
+        return paginator
+
+
 @swagger_auto_schema(
     method='get',
     operation_summary="List Users (Admin/Subadmin)",
+    operation_description=(
+        "One page of users, newest first, with role and verification facet counts for the current search. "
+        "Use ?page and ?page_size (max 100), or send ?cursor= for keyset paging."
+    ),
     manual_parameters=[
         openapi.Parameter('role', openapi.IN_QUERY, description="Filter by role (student, teacher, admin, subadmin)", type=openapi.TYPE_STRING),
         openapi.Parameter('search', openapi.IN_QUERY, description="Search by username, email, first_name, last_name", type=openapi.TYPE_STRING),
         openapi.Parameter('is_verified', openapi.IN_QUERY, description="Filter by verification status (true/false)", type=openapi.TYPE_BOOLEAN),
+        openapi.Parameter('page', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter('cursor', openapi.IN_QUERY, description="Keyset cursor; send it empty for the first page", type=openapi.TYPE_STRING),
     ],
     responses={200: "List of users"}
 )
@@ -112,7 +122,7 @@ def admin_dashboard_overview(request):
 @permission_classes([IsAuthenticated])
 def admin_users_list(request):
     """
-    Get all users with filtering and role information
+    Get one page of users with filtering, search and facet counts
     """
     if request.user.role not in ['admin', 'subadmin']:
         return Response({
@@ -122,34 +132,37 @@ def admin_users_list(request):
     
     # Get query parameters
     role_filter = request.query_params.get('role', None)
-    search = request.query_params.get('search', None)
+    search = request.query_params.get('search', '').strip()
     is_verified = request.query_params.get('is_verified', None)
+    if is_verified is not None:
+        is_verified = is_verified.lower() == 'true'
     
     # Base queryset
-    users = User.objects.all().order_by('-created_at')
+    users = User.objects.order_by('-created_at', '-id')
+    if search:
+        users = user_search.filter_users(users, search)
+    
+    # Facets count the search matches before the role/verification filters
+    total_users, facets = user_search.facet_counts(users, role_filter, is_verified)
     
     # Apply filters
     if role_filter:
         users = users.filter(role=role_filter)
     
-    if search:
-        users = users.filter(
-            Q(username__icontains=search) |
-            Q(email__icontains=search) |
-            Q(first_name__icontains=search) |
-            Q(last_name__icontains=search)
-        )
-    
     if is_verified is not None:
-        users = users.filter(is_verified=is_verified.lower() == 'true')
+        users = users.filter(is_verified=is_verified)
     
-    # Serialize users
-    serializer = UserSerializer(users, many=True)
+    paginator = UserDirectoryPagination()
+    page = paginator.paginate_queryset(users, request, count=total_users)
+    serializer = UserSerializer(page, many=True)
     
     return Response({
         'success': True,
         'data': {
-            'total_users': users.count(),
+            'total_users': total_users,
+            'facets': facets,
+            'next': paginator.get_next_link(),
+            'previous': None if paginator.keyset else paginator.get_previous_link(),
             'users': serializer.data
         }
     }, status=status.HTTP_200_OK)
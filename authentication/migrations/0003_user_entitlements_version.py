@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='entitlements_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('authentication', '0003_user_entitlements_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-created_at', '-id'], name='users_created_951310_idx'),
+        ),
+    ]
@@ -26,6 +26,11 @@ class User(AbstractUser):
     country = models.CharField(max_length=50, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Bumped whenever one of the user's payments or enrollments changes; part
+    # of the entitlement and student dashboard cache keys
+    # (courses/entitlements.py, student_dashboard/dashboard.py). Left out of
+    # save() so stale instances cannot roll it back.
+    entitlements_version = models.PositiveIntegerField(default=0, editable=False)
 
     
     USERNAME_FIELD = 'email'
@@ -33,9 +38,25 @@ class User(AbstractUser):
     
     def __str__(self):
         return self.email
+
+    def save(self, *args, **kwargs):
+        # entitlements_version only moves through the F() update in
+        # courses/entitlements.py. A full save of an instance loaded before a
+        # bump would write the old number back, so it never includes it.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'entitlements_version' and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
     
     class Meta:
         db_table = 'users'
+        indexes = [
+            # Newest-first admin user directory (admin_dashboard.views.UserDirectoryPagination)
+            models.Index(fields=['-created_at', '-id']),
+        ]
 
 
 class StudentProfile(models.Model):
@@ -1,15 +1,23 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import Teacher,Course,Video,Question,Quiz,Assignment,Enrollment,Progress,Topic
+from .models import Teacher,Course,CourseStats,CourseRanking,CourseSimilarity,Video,Question,Quiz,Assignment,Enrollment,EnrollmentProgress,Progress,VideoWatchPosition,QuizAttempt,QuizAnalytics,CourseFunnel,Topic
 
 
 admin.site.register(Teacher)
 admin.site.register(Course)
+admin.site.register(CourseStats)
+admin.site.register(CourseRanking)
+admin.site.register(CourseSimilarity)
 admin.site.register(Topic)
 admin.site.register(Video)
 admin.site.register(Question)
 admin.site.register(Quiz)
 admin.site.register(Assignment)
 admin.site.register(Enrollment)
-admin.site.register(Progress)
\ No newline at end of file
+admin.site.register(Progress)
+admin.site.register(EnrollmentProgress)
+admin.site.register(VideoWatchPosition)
+admin.site.register(QuizAttempt)
+admin.site.register(QuizAnalytics)
+admin.site.register(CourseFunnel)
\ No newline at end of file
@@ -0,0 +1,267 @@
+# courses/analytics.py
+
+"""
+Batch item analysis of quiz attempts.
+
+Each student's first attempt is loaded into a students x questions matrix
+of chosen options (-1 where a question was not answered or not part of the
+quiz version the student took). Difficulty, discrimination and distractor
+counts are then computed with NumPy for all questions of the quiz at once,
+and the results are stored on QuizAnalytics for the teacher views to read.
+
+- difficulty: share of students who answered the question correctly
+- discrimination: difficulty in the top 27% of students by total score
+  minus difficulty in the bottom 27% (classical upper-lower index)
+- option_counts: how often each option was picked, skipped: no answer
+
+Course funnels are computed the same way from Progress: one students x
+steps matrix of completion times per course, with the steps in course
+order (topics, then each video followed by its quizzes and assignments).
+"""
+
+import numpy as np
+from django.db.models import Count, Exists, F, Max, OuterRef
+from django.utils import timezone
+
+from .models import Assignment, Course, CourseFunnel, Enrollment, Progress, Question, Quiz, QuizAnalytics, QuizAttempt, Topic, Video
+
+DISCRIMINATION_GROUP = 0.27
+HISTOGRAM_BINS = 10
+
+
+def _first_attempts(quiz):
+    seen, rows = set(), []
+    attempts = QuizAttempt.objects.filter(quiz=quiz).order_by('student_id', 'submitted_at', 'id')
+    for student_id, answers in attempts.values_list('student_id', 'answers').iterator():
+        if student_id not in seen:
+            seen.add(student_id)
+            rows.append(answers)
+    return rows
+
+
+def _answer_matrix(attempts, question_ids):
+    """
+    (choices, presented) matrices, one row per attempt and one column per question
+    """
+    column = {str(question_id): j for j, question_id in enumerate(question_ids)}
+    choices = np.full((len(attempts), len(question_ids)), -1, dtype=np.int32)
+    presented = np.zeros(choices.shape, dtype=bool)
+    for i, answers in enumerate(attempts):
+        for question_id, choice in answers.items():
+            j = column.get(question_id)
+            if j is None:
+                continue
+            presented[i, j] = True
+            if choice is not None:
+                choices[i, j] = choice
+    return choices, presented
+
+
+def _rate(hits, totals):
+    """Per-column hits / totals, NaN where nobody saw the question"""
+    return np.divide(hits, totals, out=np.full(hits.shape, np.nan), where=totals > 0)
+
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+
+def item_statistics(choices, presented, correct, option_counts):
+    """
+    Difficulty, discrimination and distractor counts for every question
+    """
+    is_correct = (choices == correct) & presented
+    difficulty = _rate(is_correct.sum(axis=0), presented.sum(axis=0))
+
+    discrimination = np.full(len(correct), np.nan)
+    students = len(choices)
+    if students >= 2:
+        group = max(1, int(round(students * DISCRIMINATION_GROUP)))
+        ranked = np.argsort(is_correct.sum(axis=1), kind='stable')
+        lower, upper = ranked[:group], ranked[-group:]
+        discrimination = (
+            _rate(is_correct[upper].sum(axis=0), presented[upper].sum(axis=0))
+            - _rate(is_correct[lower].sum(axis=0), presented[lower].sum(axis=0))
+        )
+
+    widest = max(option_counts, default=0)
+    # picks[j, o]: how many students chose option o on question j
+    picks = (choices[:, :, None] == np.arange(widest)).sum(axis=0)
+    skipped = (presented & (choices < 0)).sum(axis=0)
+    return difficulty, discrimination, picks, skipped
+
+
+def score_distribution(scores, passing_score):
+    if not len(scores):
+        return {'mean': 0, 'median': 0, 'std': 0, 'pass_rate': 0, 'histogram': [0] * HISTOGRAM_BINS}
+    histogram, _ = np.histogram(scores, bins=HISTOGRAM_BINS, range=(0, 100))
+    return {
+        'mean': round(float(scores.mean()), 2),
+        'median': round(float(np.median(scores)), 2),
+        'std': round(float(scores.std()), 2),
+        'pass_rate': round(float((scores >= passing_score).mean()), 4),
+        'histogram': histogram.tolist(),
+    }
+
+
+def compute_quiz_analytics(quiz):
+    """
+    Recompute and store the analytics of one quiz
+    """
+    questions = list(Question.objects.filter(quiz=quiz).order_by('id').values_list('id', 'correct_answer', 'options'))
+    question_ids = [row[0] for row in questions]
+    correct = np.array([row[1] for row in questions], dtype=np.int32)
+    option_counts = [len(row[2] or []) for row in questions]
+
+    attempts = _first_attempts(quiz)
+    choices, presented = _answer_matrix(attempts, question_ids)
+    difficulty, discrimination, picks, skipped = item_statistics(choices, presented, correct, option_counts)
+
+    # Scores against the current answer key, so edited questions are regraded
+    answered = presented.sum(axis=1)
+    scores = _rate(((choices == correct) & presented).sum(axis=1), answered) * 100
+    scores = scores[answered > 0]
+    distribution = score_distribution(scores, quiz.passing_score)
+
+    question_stats = {
+        str(question_id): {
+            'difficulty': _rounded(difficulty[j]),
+            'discrimination': _rounded(discrimination[j]),
+            'option_counts': picks[j, :option_counts[j]].tolist(),
+            'skipped': int(skipped[j]),
+        }
+        for j, question_id in enumerate(question_ids)
+    }
+
+    summary = QuizAttempt.objects.filter(quiz=quiz).aggregate(count=Count('id'), last=Max('id'))
+    analytics, _ = QuizAnalytics.objects.update_or_create(
+        quiz=quiz,
+        defaults={
+            'attempt_count': summary['count'],
+            'student_count': len(attempts),
+            'mean_score': distribution['mean'],
+            'median_score': distribution['median'],
+            'score_std': distribution['std'],
+            'pass_rate': distribution['pass_rate'],
+            'score_histogram': distribution['histogram'],
+            'question_stats': question_stats,
+            'last_attempt_id': summary['last'] or 0,
+            'computed_at': timezone.now(),
+        }
+    )
+    return analytics
+
+
+def stale_quizzes():
+    """
+    Quizzes with attempts newer than their stored analytics
+    """
+    return Quiz.objects.annotate(last_attempt=Max('attempts__id')).filter(
+        last_attempt__isnull=False
+    ).exclude(analytics__last_attempt_id__gte=F('last_attempt'))
+
+
+def course_steps(course):
+    """
+    [(kind, id, title), ...] for the videos, quizzes and assignments of a
+    course in the order a student meets them
+    """
+    topic_ids = Topic.objects.filter(course=course).order_by('order', 'id').values_list('id', flat=True)
+    topic_rank = {topic_id: rank for rank, topic_id in enumerate(topic_ids)}
+    unfiled = len(topic_rank)
+    videos = {
+        video_id: (topic_rank.get(topic_id, unfiled), order, video_id)
+        for video_id, topic_id, order in Video.objects.filter(course=course).values_list('id', 'topic_id', 'order')
+    }
+
+    keyed = []
+    for video_id, title in Video.objects.filter(course=course).values_list('id', 'title'):
+        keyed.append((videos[video_id] + (0, 0, 0), ('video', video_id, title)))
+    for slot, kind, model in ((1, 'quiz', Quiz), (2, 'assignment', Assignment)):
+        items = model.objects.filter(course=course).values_list('id', 'title', 'video_id', 'topic_id', 'order')
+        for item_id, title, video_id, topic_id, order in items:
+            # After their video, or after all videos of their topic
+            anchor = videos.get(video_id) or (topic_rank.get(topic_id, unfiled), float('inf'), 0)
+            keyed.append((anchor + (slot, order, item_id), (kind, item_id, title)))
+    return [step for _, step in sorted(keyed)]
+
+
+def _completion_times(course, steps, student_ids):
+    """
+    students x steps matrix of completion timestamps (epoch seconds, NaN if not completed)
+    """
+    column = {(kind, item_id): j for j, (kind, item_id, _) in enumerate(steps)}
+    row = {student_id: i for i, student_id in enumerate(student_ids)}
+    times = np.full((len(student_ids), len(steps)), np.nan)
+    rows = Progress.objects.filter(course=course).values_list(
+        'student_id', 'video_id', 'quiz_id', 'assignment_id', 'completed_at'
+    )
+    for student_id, video_id, quiz_id, assignment_id, completed_at in rows.iterator():
+        i = row.get(student_id)
+        if i is None:
+            continue
+        for key in (('video', video_id), ('quiz', quiz_id), ('assignment', assignment_id)):
+            j = column.get(key)
+            if j is not None:
+                times[i, j] = np.fmin(times[i, j], completed_at.timestamp())
+    return times
+
+
+def _median(values):
+    values = values[~np.isnan(values)]
+    return round(float(np.median(values)), 1) if len(values) else None
+
+
+def compute_course_funnel(course):
+    """
+    Recompute and store the completion funnel of one course
+    """
+    steps = course_steps(course)
+    enrollments = list(Enrollment.objects.filter(course=course).values_list('student_id', 'enrolled_at'))
+    student_ids = [student_id for student_id, _ in enrollments]
+    enrolled_at = np.array([moment.timestamp() for _, moment in enrollments], dtype=float)
+
+    times = _completion_times(course, steps, student_ids)
+    completed = ~np.isnan(times)
+    counts = completed.sum(axis=0)
+    rates = _rate(counts, np.full(len(steps), len(student_ids)))
+
+    # Time from the previous step (enrollment for the first), counted for
+    # students who completed both in order
+    previous = np.column_stack([enrolled_at, times[:, :-1]]) if len(steps) else times
+    gaps = times - previous
+    gaps[gaps < 0] = np.nan
+
+    funnel_steps = []
+    for j, (kind, item_id, title) in enumerate(steps):
+        funnel_steps.append({
+            'kind': kind,
+            'id': item_id,
+            'title': title,
+            'completed': int(counts[j]),
+            'rate': _rounded(rates[j]),
+            'drop_off': _rounded(rates[j - 1] - rates[j]) if j else None,
+            'median_seconds_from_previous': _median(gaps[:, j]),
+        })
+
+    finished = completed.all(axis=1) if len(steps) else np.zeros(len(student_ids), dtype=bool)
+    finish_times = np.nanmax(times[finished], axis=1) - enrolled_at[finished] if finished.any() else np.array([])
+
+    funnel, _ = CourseFunnel.objects.update_or_create(
+        course=course,
+        defaults={
+            'enrolled_count': len(student_ids),
+            'finished_count': int(finished.sum()),
+            'median_seconds_to_finish': _median(finish_times),
+            'steps': funnel_steps,
+            'computed_at': timezone.now(),
+        }
+    )
+    return funnel
+
+
+def funnel_courses():
+    """
+    Courses with at least one enrollment
+    """
+    return Course.objects.filter(Exists(Enrollment.objects.filter(course=OuterRef('pk'))))
@@ -0,0 +1,78 @@
+# courses/entitlements.py
+
+"""
+Which paid courses a user may open.
+
+Instead of querying Payment on every access check, the ids of a user's
+entitled courses (successful payments plus verified enrollments) are
+loaded once into the cache and memoized on the user object for the rest
+of the request. Free courses need no entry: they are open to everyone.
+
+The cache key carries `User.entitlements_version`, which arrives with the
+user row every request loads anyway. The payment and enrollment signals in
+courses/signals.py bump that version in the database whenever one of
+those rows changes, so every process moves to a fresh key at once, even
+when the cache itself is process-local.
+"""
+
+from django.core.cache import cache
+from django.db.models import F
+
+ENTITLEMENTS_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(user):
+    return f'course_entitlements:{user.id}:{user.entitlements_version}'
+
+
+def _load(user_id):
+    from payments.models import Payment
+    from .models import Enrollment
+
+    paid = Payment.objects.filter(
+        user_id=user_id, is_successful=True, course__isnull=False
+    ).values_list('course_id', flat=True)
+    verified = Enrollment.objects.filter(
+        student__user_id=user_id, payment_status='verified'
+    ).values_list('course_id', flat=True)
+    return frozenset(paid.union(verified))
+
+
+def get_entitled_course_ids(user):
+    """
+    Ids of the paid courses the user has access to
+    """
+    entitled = getattr(user, '_course_entitlements', None)
+    if entitled is None:
+        cache_key = _cache_key(user)
+        entitled = cache.get(cache_key)
+        if entitled is None:
+            entitled = _load(user.id)
+            cache.set(cache_key, entitled, ENTITLEMENTS_CACHE_TIMEOUT)
+        user._course_entitlements = entitled
+    return entitled
+
+
+def user_can_access(user, course):
+    if course.course_type == 'free':
+        return True
+    if not user or not user.is_authenticated:
+        return False
+    return course.id in get_entitled_course_ids(user)
+
+
+def invalidate(user):
+    """
+    Move a user (instance or id) to a fresh entitlements version. A User
+    instance also drops its request memo and picks up the new version, so
+    checks later in the same request see the change.
+    """
+    from authentication.models import User
+
+    user_id = user.pk if isinstance(user, User) else user
+    User.objects.filter(id=user_id).update(entitlements_version=F('entitlements_version') + 1)
+    if isinstance(user, User):
+        user.__dict__.pop('_course_entitlements', None)
+        version = User.objects.filter(id=user_id).values_list('entitlements_version', flat=True).first()
+        if version is not None:
+            user.entitlements_version = version
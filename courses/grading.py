@@ -0,0 +1,106 @@
+# courses/grading.py
+
+"""
+Server-side quiz grading.
+
+The answer key of a quiz (question ids, correct options and the passing
+score) is loaded with one query and cached under the course's content
+version, so edits to the quiz or its questions start a fresh key and exam
+time submissions are graded from memory without touching Question. A
+submission is graded in a single pass over the key and stored as one
+QuizAttempt row; Progress is only written when the attempt passes.
+"""
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Question, QuizAttempt
+from . import progress
+
+ANSWER_KEY_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(quiz_id, version):
+    return f'quiz_answer_key:{quiz_id}:{version}'
+
+
+def get_answer_key(quiz):
+    """
+    Cached {'version', 'question_ids', 'correct', 'options', 'passing_score'}
+    for the quiz's current content version
+    """
+    version = quiz.course.get_stats().content_version
+    cache_key = _cache_key(quiz.id, version)
+    key = cache.get(cache_key)
+    if key is None:
+        rows = list(
+            Question.objects.filter(quiz=quiz).order_by('id').values_list('id', 'correct_answer', 'options')
+        )
+        key = {
+            'version': version,
+            'question_ids': [row[0] for row in rows],
+            'correct': [row[1] for row in rows],
+            'options': [len(row[2] or []) for row in rows],
+            'passing_score': quiz.passing_score,
+        }
+        cache.set(cache_key, key, ANSWER_KEY_CACHE_TIMEOUT)
+    return key
+
+
+def grade(key, answers):
+    """
+    Grade {question_id: option_index} against an answer key. Unanswered and
+    out-of-range answers are stored as None and count as wrong; answers to
+    unknown questions are dropped. Returns the unsaved QuizAttempt fields.
+    """
+    answers = {str(question_id): choice for question_id, choice in answers.items()}
+    kept, results = {}, []
+    for question_id, correct, option_count in zip(key['question_ids'], key['correct'], key['options']):
+        choice = answers.get(str(question_id))
+        if choice is not None and not 0 <= choice < option_count:
+            choice = None
+        kept[str(question_id)] = choice
+        results.append('1' if choice == correct else '0')
+
+    total = len(results)
+    correct_count = results.count('1')
+    # A quiz without questions has nothing to get wrong
+    score = round(correct_count * 100 / total) if total else 100
+    return {
+        'answers': kept,
+        'results': ''.join(results),
+        'correct_count': correct_count,
+        'total_questions': total,
+        'score': score,
+        # Compare the exact fraction; the rounded score would let 69.5% pass a 70% quiz
+        'passed': correct_count * 100 >= key['passing_score'] * total,
+        'quiz_version': key['version'],
+    }
+
+
+@transaction.atomic
+def record_attempts(student_profile, graded):
+    """
+    Store graded attempts with one insert and mark passed quizzes complete.
+    `graded` is a list of (quiz, grade() result) pairs.
+    """
+    attempts = QuizAttempt.objects.bulk_create([
+        QuizAttempt(student=student_profile, quiz=quiz, **fields) for quiz, fields in graded
+    ])
+
+    progress.record_completions(student_profile, [
+        ('quiz', quiz.id, quiz.course_id, None) for quiz, fields in graded if fields['passed']
+    ])
+    return attempts
+
+
+def submit_attempt(student_profile, quiz, answers):
+    """
+    Grade and store a single submission
+    """
+    fields = grade(get_answer_key(quiz), answers)
+    return record_attempts(student_profile, [(quiz, fields)])[0]
+
+
+def has_passed(student_profile, quiz):
+    return QuizAttempt.objects.filter(student=student_profile, quiz=quiz, passed=True).exists()
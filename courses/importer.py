@@ -0,0 +1,371 @@
+# courses/importer.py
+
+"""
+Bulk import of course content from a manifest.
+
+A manifest describes topics with their videos, quizzes (with questions) and
+assignments. The whole manifest is validated first, then written with one
+bulk_create per model inside a single transaction. Because bulk_create
+skips post_save, none of the per-item signals fire. Course statistics, the
+content version and the search index are updated once at the end, and
+enrolled students get one coalesced "new content" notification instead of
+one per video and quiz.
+
+JSON manifest:
+
+    {"topics": [{"title": "Intro", "order": 1,
+                 "videos": [{"title": "Welcome", "video_file": "course_videos/welcome.mp4",
+                             "duration": "4:10", "quizzes": [...], "assignments": [...]}],
+                 "quizzes": [{"title": "Check", "questions": [
+                     {"question": "2 + 2?", "options": ["3", "4"], "correct_answer": 1}]}],
+                 "assignments": [{"title": "Essay", "description": "..."}]}]}
+
+`video_file` is a path in media storage that has already been uploaded.
+
+CSV manifest: one row per item with a `type` column (topic, video, quiz,
+question, assignment). Videos, quizzes and assignments belong to the last
+topic row above them and questions to the last quiz row. Question options
+are separated with `|`.
+"""
+
+import csv
+import io
+import json
+import posixpath
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.db import transaction
+from rest_framework import serializers
+
+from .models import (
+    Assignment, CourseStats, EnrollmentProgress, Question, Quiz, Topic, Video, parse_duration
+)
+from .tasks import transcode_video
+from . import search
+
+
+class ManifestError(Exception):
+    """The manifest could not be parsed or failed validation"""
+
+    def __init__(self, errors):
+        super().__init__(str(errors))
+        self.errors = errors
+
+
+class QuestionImportSerializer(serializers.Serializer):
+    question = serializers.CharField()
+    options = serializers.ListField(child=serializers.CharField(), min_length=2)
+    correct_answer = serializers.IntegerField(min_value=0)
+    explanation = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, data):
+        if data['correct_answer'] >= len(data['options']):
+            raise serializers.ValidationError({'correct_answer': 'Must index one of the options.'})
+        return data
+
+
+class QuizImportSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    passing_score = serializers.IntegerField(required=False, min_value=0, max_value=100, default=70)
+    order = serializers.IntegerField(required=False, min_value=0, default=0)
+    questions = QuestionImportSerializer(many=True, required=False, default=list)
+
+
+class AssignmentImportSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField()
+    due_date = serializers.DateTimeField(required=False, allow_null=True, default=None)
+    order = serializers.IntegerField(required=False, min_value=0, default=0)
+
+
+class VideoImportSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    video_file = serializers.CharField(max_length=100)
+    duration = serializers.CharField(required=False, allow_blank=True, default='')
+    order = serializers.IntegerField(required=False, min_value=0, default=0)
+    is_free_preview = serializers.BooleanField(required=False, default=False)
+    quizzes = QuizImportSerializer(many=True, required=False, default=list)
+    assignments = AssignmentImportSerializer(many=True, required=False, default=list)
+
+    def validate_video_file(self, value):
+        upload_to = Video._meta.get_field('video_file').upload_to
+        path = posixpath.normpath(value)
+        if not path.startswith(upload_to):
+            raise serializers.ValidationError(f'Must be a path under {upload_to} in media storage.')
+        try:
+            exists = default_storage.exists(path)
+        except SuspiciousFileOperation:
+            raise serializers.ValidationError('Invalid file path.')
+        if not exists:
+            raise serializers.ValidationError('File not found in media storage.')
+        return path
+
+    def validate_duration(self, value):
+        try:
+            return parse_duration(value)
+        except ValueError:
+            raise serializers.ValidationError('Enter a duration as "MM:SS" or a number of seconds.')
+
+
+class TopicImportSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    order = serializers.IntegerField(required=False, min_value=0, allow_null=True, default=None)
+    videos = VideoImportSerializer(many=True, required=False, default=list)
+    quizzes = QuizImportSerializer(many=True, required=False, default=list)
+    assignments = AssignmentImportSerializer(many=True, required=False, default=list)
+
+
+class ManifestSerializer(serializers.Serializer):
+    topics = TopicImportSerializer(many=True, allow_empty=False)
+
+    def validate_topics(self, topics):
+        course = self.context['course']
+        taken = set(Topic.objects.filter(course=course).values_list('order', flat=True))
+        # Topics without an explicit order go after everything else
+        next_order = max(taken | {topic['order'] or 0 for topic in topics}, default=0) + 1
+
+        seen = set()
+        for topic in topics:
+            if topic['order'] is None:
+                topic['order'] = next_order
+                next_order += 1
+            if topic['order'] in taken or topic['order'] in seen:
+                raise serializers.ValidationError(
+                    f"Topic order {topic['order']} is already used in this course."
+                )
+            seen.add(topic['order'])
+
+        # Files behind another teacher's videos are not up for grabs. Checked
+        # here in one query rather than once per video.
+        paths = {video['video_file'] for topic in topics for video in topic['videos']}
+        foreign = set(Video.objects.filter(video_file__in=paths).exclude(
+            course__teacher_id=course.teacher_id
+        ).values_list('video_file', flat=True))
+        if foreign:
+            raise serializers.ValidationError(
+                f"Files belong to another teacher: {', '.join(sorted(foreign))}."
+            )
+        return topics
+
+
+# CSV row type -> list on the enclosing topic
+CSV_ITEM_LISTS = {'video': 'videos', 'quiz': 'quizzes', 'assignment': 'assignments'}
+
+
+def _split_options(value):
+    return [option.strip() for option in (value or '').split('|') if option.strip()]
+
+
+def parse_csv_manifest(text):
+    """
+    Turn the flat CSV layout into the nested JSON manifest structure
+    """
+    topics = []
+    last_quiz = None
+    for line_number, row in enumerate(csv.DictReader(io.StringIO(text)), start=2):
+        row = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        row_type = row.get('type', '').lower()
+
+        if row_type == 'topic':
+            topics.append({
+                'title': row.get('title', ''),
+                'description': row.get('description', ''),
+                'order': row.get('order') or None,
+                'videos': [], 'quizzes': [], 'assignments': [],
+            })
+            last_quiz = None
+            continue
+
+        if row_type == 'question':
+            if last_quiz is None:
+                raise ManifestError({'csv': f'Line {line_number}: question row before any quiz row.'})
+            last_quiz['questions'].append({
+                'question': row.get('title', ''),
+                'options': _split_options(row.get('options')),
+                'correct_answer': row.get('correct_answer', ''),
+                'explanation': row.get('explanation', ''),
+            })
+            continue
+
+        if row_type not in CSV_ITEM_LISTS:
+            raise ManifestError({'csv': f"Line {line_number}: unknown row type '{row_type}'."})
+        if not topics:
+            raise ManifestError({'csv': f'Line {line_number}: {row_type} row before any topic row.'})
+
+        item = {'title': row.get('title', ''), 'description': row.get('description', '')}
+        if row.get('order'):
+            item['order'] = row['order']
+        if row_type == 'video':
+            item.update({
+                'video_file': row.get('video_file', ''),
+                'duration': row.get('duration', ''),
+                'is_free_preview': row.get('is_free_preview') or False,
+            })
+        elif row_type == 'quiz':
+            item['questions'] = []
+            if row.get('passing_score'):
+                item['passing_score'] = row['passing_score']
+            last_quiz = item
+        elif row.get('due_date'):
+            item['due_date'] = row['due_date']
+        topics[-1][CSV_ITEM_LISTS[row_type]].append(item)
+
+    return {'topics': topics}
+
+
+def load_manifest(content, filename=''):
+    """
+    Parse raw manifest bytes/text; CSV is picked by file extension
+    """
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ManifestError({'manifest': 'Manifest must be UTF-8 encoded.'})
+
+    if filename.lower().endswith('.csv'):
+        return parse_csv_manifest(content)
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError as e:
+        raise ManifestError({'manifest': f'Invalid JSON: {e}'})
+
+
+def validate_manifest(course, data):
+    serializer = ManifestSerializer(data=data, context={'course': course})
+    if not serializer.is_valid():
+        raise ManifestError(serializer.errors)
+    return serializer.validated_data
+
+
+def _summary_counts(topics):
+    counts = {'topics': len(topics), 'videos': 0, 'quizzes': 0, 'questions': 0, 'assignments': 0}
+    for topic in topics:
+        quizzes = list(topic['quizzes'])
+        counts['assignments'] += len(topic['assignments'])
+        for video in topic['videos']:
+            counts['videos'] += 1
+            counts['assignments'] += len(video['assignments'])
+            quizzes += video['quizzes']
+        counts['quizzes'] += len(quizzes)
+        counts['questions'] += sum(len(quiz['questions']) for quiz in quizzes)
+    return counts
+
+
+@transaction.atomic
+def write_manifest(course, topics):
+    """
+    Insert validated topics and everything under them with one bulk_create
+    per model. Returns the created videos and the per-model counts.
+    """
+    from teacher_dashbord.models import TeacherStats
+
+    topic_objs = Topic.objects.bulk_create([
+        Topic(course=course, title=topic['title'], description=topic['description'], order=topic['order'])
+        for topic in topics
+    ])
+
+    videos, video_objs = [], []
+    for topic, topic_obj in zip(topics, topic_objs):
+        for video in topic['videos']:
+            videos.append(video)
+            video_objs.append(Video(
+                course=course, topic=topic_obj, title=video['title'],
+                description=video['description'], video_file=video['video_file'],
+                duration_seconds=video['duration'], order=video['order'],
+                is_free_preview=video['is_free_preview'],
+            ))
+    Video.objects.bulk_create(video_objs)
+
+    # Quizzes and assignments hang off either a topic or a video
+    quizzes, quiz_objs, assignment_objs = [], [], []
+    parents = [(topic, {'topic': topic_obj}) for topic, topic_obj in zip(topics, topic_objs)]
+    parents += [(video, {'video': video_obj, 'topic': video_obj.topic}) for video, video_obj in zip(videos, video_objs)]
+    for item, parent in parents:
+        for quiz in item['quizzes']:
+            quizzes.append(quiz)
+            quiz_objs.append(Quiz(
+                course=course, title=quiz['title'], description=quiz['description'],
+                passing_score=quiz['passing_score'], order=quiz['order'], **parent
+            ))
+        for assignment in item['assignments']:
+            assignment_objs.append(Assignment(
+                course=course, title=assignment['title'], description=assignment['description'],
+                due_date=assignment['due_date'], order=assignment['order'], **parent
+            ))
+    Quiz.objects.bulk_create(quiz_objs)
+    Assignment.objects.bulk_create(assignment_objs)
+
+    Question.objects.bulk_create([
+        Question(quiz=quiz_obj, **question)
+        for quiz, quiz_obj in zip(quizzes, quiz_objs)
+        for question in quiz['questions']
+    ])
+
+    # bulk_create skipped the counter and versioning signals, so settle them once
+    CourseStats.rebuild(course)
+    CourseStats.bump(course.id, content_version=1)
+    EnrollmentProgress.refresh_totals(course.id)
+    TeacherStats.bump(course.teacher_id, total_videos=len(video_objs), total_quizzes=len(quiz_objs))
+    transaction.on_commit(lambda: search.index_course(course.id))
+
+    return video_objs, _summary_counts(topics)
+
+
+def notify_new_content(course, counts):
+    """
+    One in-app notification per verified student plus one email batch for the
+    whole import
+    """
+    from notifications.models import Notification
+    from email_automation.tasks import send_new_content_notification
+
+    parts = [
+        f"{counts[name]} {name}" for name in ('videos', 'quizzes', 'assignments') if counts[name]
+    ]
+    if not parts:
+        return
+    summary = ', '.join(parts)
+
+    student_user_ids = course.enrollments.filter(
+        payment_status='verified'
+    ).values_list('student__user_id', flat=True)
+    Notification.objects.bulk_create([
+        Notification(
+            recipient_id=user_id,
+            sender_id=course.teacher.user_id,
+            notification_type='general',
+            title=f'New content in {course.title}',
+            message=f'{summary} were added to the course "{course.title}". Check them out now!',
+            course=course,
+        )
+        for user_id in student_user_ids
+    ])
+    transaction.on_commit(lambda: send_new_content_notification.delay(
+        course_id=course.id,
+        content_description=f"New content: {summary}"
+    ))
+
+
+def import_manifest(course, data, dry_run=False):
+    """
+    Validate and import a parsed manifest. Raises ManifestError on invalid
+    input; with dry_run nothing is written. Returns the per-model counts.
+    """
+    topics = validate_manifest(course, data)['topics']
+    if dry_run:
+        return _summary_counts(topics)
+
+    with transaction.atomic():
+        video_objs, counts = write_manifest(course, topics)
+        notify_new_content(course, counts)
+
+        def queue_transcodes():
+            for video in video_objs:
+                transcode_video.delay(video_id=video.id)
+        transaction.on_commit(queue_transcodes)
+    return counts
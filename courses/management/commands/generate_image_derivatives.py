@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from authentication.models import StudentProfile, TeacherProfile
+from courses.models import Course
+from lms import images
+
+
+class Command(BaseCommand):
+    help = 'Pre-generate resized thumbnail and profile picture variants'
+
+    def handle(self, *args, **options):
+        sources = [
+            (Course.objects.exclude(thumbnail=''), 'thumbnail', ('card', 'detail')),
+            (TeacherProfile.objects.exclude(profile_picture=''), 'profile_picture', ('avatar',)),
+            (StudentProfile.objects.exclude(profile_picture=''), 'profile_picture', ('avatar',)),
+        ]
+
+        generated_count = failed_count = 0
+        for queryset, field_name, variants in sources:
+            for obj in queryset.exclude(**{f'{field_name}__isnull': True}).only('id', field_name).iterator():
+                fieldfile = getattr(obj, field_name)
+                for variant in variants:
+                    if images.get_variant(fieldfile, variant):
+                        generated_count += 1
+                    else:
+                        failed_count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Prepared {generated_count} image variants')
+        )
+        if failed_count:
+            self.stdout.write(
+                self.style.WARNING(f'{failed_count} images could not be read, see the log')
+            )
@@ -0,0 +1,38 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course
+from courses import importer
+
+
+class Command(BaseCommand):
+    help = 'Bulk import topics, videos, quizzes and assignments into a course from a JSON or CSV manifest'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', type=int, help='Course to import into')
+        parser.add_argument('manifest', help='Path to a .json or .csv manifest')
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the manifest without writing anything',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            course = Course.objects.get(id=options['course_id'])
+        except Course.DoesNotExist:
+            raise CommandError(f"Course {options['course_id']} does not exist")
+
+        try:
+            with open(options['manifest'], 'rb') as manifest_file:
+                data = importer.load_manifest(manifest_file.read(), options['manifest'])
+            counts = importer.import_manifest(course, data, dry_run=options['dry_run'])
+        except OSError as e:
+            raise CommandError(f'Could not read manifest: {e}')
+        except importer.ManifestError as e:
+            raise CommandError('Invalid manifest:\n' + json.dumps(e.errors, indent=2, default=str))
+
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(f'✓ {verb} {summary} for "{course.title}"'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Course, CourseStats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized course statistics counters from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            action='append',
+            dest='course_ids',
+            help='Only rebuild the given course id (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        courses = Course.objects.all()
+        if options['course_ids']:
+            courses = courses.filter(id__in=options['course_ids'])
+
+        rebuilt_count = 0
+        for course in courses.iterator():
+            CourseStats.rebuild(course)
+            rebuilt_count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Rebuilt statistics for {rebuilt_count} courses')
+        )
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Enrollment, EnrollmentProgress
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-enrollment completion counters from Progress rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            type=int,
+            action='append',
+            dest='course_ids',
+            help='Only rebuild enrollments in the given course id (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        enrollments = Enrollment.objects.all()
+        if options['course_ids']:
+            enrollments = enrollments.filter(course_id__in=options['course_ids'])
+
+        rebuilt_count = 0
+        for enrollment in enrollments.iterator():
+            EnrollmentProgress.rebuild(enrollment)
+            rebuilt_count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Rebuilt progress for {rebuilt_count} enrollments')
+        )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Video
+from courses.tasks import transcode_video
+
+
+class Command(BaseCommand):
+    help = 'Queue HLS transcoding for videos that have not been processed yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help='Also retry videos whose last transcoding attempt failed',
+        )
+
+    def handle(self, *args, **options):
+        statuses = ['pending']
+        if options['retry_failed']:
+            statuses.append('failed')
+
+        video_ids = Video.objects.filter(
+            processing_status__in=statuses
+        ).exclude(video_file='').values_list('id', flat=True)
+
+        queued_count = 0
+        for video_id in video_ids.iterator():
+            transcode_video.delay(video_id=video_id)
+            queued_count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Queued {queued_count} videos for transcoding')
+        )
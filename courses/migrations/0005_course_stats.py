@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_assignment_topic'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_videos', models.PositiveIntegerField(default=0)),
+                ('total_topics', models.PositiveIntegerField(default=0)),
+                ('total_quizzes', models.PositiveIntegerField(default=0)),
+                ('total_assignments', models.PositiveIntegerField(default=0)),
+                ('total_enrollments', models.PositiveIntegerField(default=0)),
+                ('total_reviews', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='courses.course')),
+            ],
+        ),
+    ]
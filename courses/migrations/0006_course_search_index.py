@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS courses_course_search USING fts5("
+        "title, description, teacher, topics, "
+        "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+    )
+    schema_editor.execute(
+        """
+        INSERT INTO courses_course_search (rowid, title, description, teacher, topics)
+        SELECT c.id, c.title, c.description,
+               u.username || ' ' || tp.full_name,
+               COALESCE((SELECT group_concat(t.title, ' ')
+                         FROM courses_topic t WHERE t.course_id = c.id), '')
+        FROM courses_course c
+        JOIN authentication_teacherprofile tp ON tp.id = c.teacher_id
+        JOIN users u ON u.id = tp.user_id
+        WHERE c.is_active
+        """
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute("DROP TABLE IF EXISTS courses_course_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_course_stats'),
+        ('authentication', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
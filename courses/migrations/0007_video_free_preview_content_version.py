@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_course_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursestats',
+            name='content_version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='is_free_preview',
+            field=models.BooleanField(default=False),
+        ),
+    ]
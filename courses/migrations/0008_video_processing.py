@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0007_video_free_preview_content_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='hls_manifest',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='poster',
+            field=models.ImageField(blank=True, upload_to='video_posters/'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='processing_error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='processing_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:16
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def parse_legacy_duration(value):
+    # "MM:SS" (or "H:MM:SS") strings as entered by teachers; junk counts as 0
+    try:
+        seconds = 0
+        for part in (value or '').strip().split(':')[-3:]:
+            seconds = seconds * 60 + max(int(part), 0)
+        return seconds
+    except ValueError:
+        return 0
+
+
+def copy_durations_to_seconds(apps, schema_editor):
+    Video = apps.get_model('courses', 'Video')
+    CourseStats = apps.get_model('courses', 'CourseStats')
+
+    videos = list(Video.objects.exclude(duration='').only('id', 'duration'))
+    for video in videos:
+        video.duration_seconds = parse_legacy_duration(video.duration)
+    Video.objects.bulk_update(videos, ['duration_seconds'], batch_size=500)
+
+    totals = Video.objects.filter(course_id=OuterRef('course_id')).values('course_id').annotate(
+        total=Sum('duration_seconds')
+    ).values('total')
+    CourseStats.objects.update(total_duration_seconds=Coalesce(Subquery(totals), 0))
+
+
+def copy_seconds_to_durations(apps, schema_editor):
+    Video = apps.get_model('courses', 'Video')
+
+    videos = list(Video.objects.filter(duration_seconds__gt=0).only('id', 'duration_seconds'))
+    for video in videos:
+        minutes, seconds = divmod(video.duration_seconds, 60)
+        video.duration = f"{minutes}:{seconds:02d}"
+    Video.objects.bulk_update(videos, ['duration'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_video_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursestats',
+            name='total_duration_seconds',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='duration_seconds',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(copy_durations_to_seconds, copy_seconds_to_durations),
+        migrations.RemoveField(
+            model_name='video',
+            name='duration',
+        ),
+    ]
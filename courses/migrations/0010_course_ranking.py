@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_video_duration_seconds'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mode', models.CharField(choices=[('featured', 'Featured'), ('trending', 'Trending'), ('newest', 'Newest')], max_length=20)),
+                ('position', models.PositiveIntegerField()),
+                ('score', models.FloatField(default=0)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='courses.course')),
+            ],
+            options={
+                'ordering': ['mode', 'position'],
+                'unique_together': {('mode', 'position')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('courses', '0010_course_ranking'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['is_active', '-created_at', '-id'], name='courses_cou_is_acti_67ac43_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('courses', '0011_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('answers', models.JSONField(default=dict)),
+                ('results', models.TextField(blank=True)),
+                ('correct_count', models.PositiveIntegerField(default=0)),
+                ('total_questions', models.PositiveIntegerField(default=0)),
+                ('score', models.PositiveSmallIntegerField(default=0)),
+                ('passed', models.BooleanField(default=False)),
+                ('quiz_version', models.PositiveIntegerField(default=1)),
+                ('submitted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='courses.quiz')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_attempts', to='authentication.studentprofile')),
+            ],
+            options={
+                'ordering': ['-submitted_at'],
+                'indexes': [models.Index(fields=['student', 'quiz', '-submitted_at'], name='courses_qui_student_b5a720_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_quiz_attempt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizAnalytics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempt_count', models.PositiveIntegerField(default=0)),
+                ('student_count', models.PositiveIntegerField(default=0)),
+                ('mean_score', models.FloatField(default=0)),
+                ('median_score', models.FloatField(default=0)),
+                ('score_std', models.FloatField(default=0)),
+                ('pass_rate', models.FloatField(default=0)),
+                ('score_histogram', models.JSONField(default=list)),
+                ('question_stats', models.JSONField(default=dict)),
+                ('last_attempt_id', models.PositiveBigIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('quiz', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='analytics', to='courses.quiz')),
+            ],
+        ),
+    ]
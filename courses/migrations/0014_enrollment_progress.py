@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_quiz_analytics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed_videos', models.PositiveIntegerField(default=0)),
+                ('completed_quizzes', models.PositiveIntegerField(default=0)),
+                ('completed_assignments', models.PositiveIntegerField(default=0)),
+                ('completed_items', models.PositiveIntegerField(default=0)),
+                ('total_items', models.PositiveIntegerField(default=0)),
+                ('percentage', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('enrollment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='courses.enrollment')),
+            ],
+        ),
+    ]
@@ -0,0 +1,56 @@
+from django.db import migrations
+from django.db.models import Count, Q
+
+
+def backfill_enrollment_progress(apps, schema_editor):
+    """
+    Create the rollup rows of enrollments that predate EnrollmentProgress,
+    so readers never have to build them lazily
+    """
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    EnrollmentProgress = apps.get_model('courses', 'EnrollmentProgress')
+    Progress = apps.get_model('courses', 'Progress')
+
+    totals = {}
+    for model_name in ('Video', 'Quiz', 'Assignment'):
+        model = apps.get_model('courses', model_name)
+        for course_id, count in model.objects.values_list('course_id').annotate(count=Count('id')):
+            totals[course_id] = totals.get(course_id, 0) + count
+
+    completed = {
+        (row['student_id'], row['course_id']): row
+        for row in Progress.objects.values('student_id', 'course_id').annotate(
+            videos=Count('id', filter=Q(video__isnull=False)),
+            quizzes=Count('id', filter=Q(quiz__isnull=False)),
+            assignments=Count('id', filter=Q(assignment__isnull=False)),
+        )
+    }
+
+    missing = Enrollment.objects.filter(progress__isnull=True).values_list('id', 'student_id', 'course_id')
+    rows = []
+    for enrollment_id, student_id, course_id in missing.iterator():
+        counts = completed.get((student_id, course_id), {})
+        videos, quizzes, assignments = (counts.get(key, 0) for key in ('videos', 'quizzes', 'assignments'))
+        completed_items = videos + quizzes + assignments
+        total_items = totals.get(course_id, 0)
+        rows.append(EnrollmentProgress(
+            enrollment_id=enrollment_id,
+            completed_videos=videos,
+            completed_quizzes=quizzes,
+            completed_assignments=assignments,
+            completed_items=completed_items,
+            total_items=total_items,
+            percentage=completed_items * 100 / total_items if total_items else 0,
+        ))
+    EnrollmentProgress.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_enrollment_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_enrollment_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:03
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+
+
+def remove_duplicate_progress(apps, schema_editor):
+    """
+    Keep the earliest Progress row per student and item so the constraints
+    can be created, and recount the rollups of the enrollments that had
+    duplicates
+    """
+    Progress = apps.get_model('courses', 'Progress')
+    EnrollmentProgress = apps.get_model('courses', 'EnrollmentProgress')
+
+    affected = set()
+    for column in ('video', 'quiz', 'assignment'):
+        duplicates = Progress.objects.filter(**{f'{column}__isnull': False}).values(
+            'student_id', column
+        ).annotate(keep=Min('id'), rows=Count('id')).filter(rows__gt=1)
+        for row in duplicates.iterator():
+            extra = Progress.objects.filter(
+                student_id=row['student_id'], **{column: row[column]}
+            ).exclude(id=row['keep'])
+            affected.update(extra.values_list('student_id', 'course_id'))
+            extra.delete()
+
+    for student_id, course_id in affected:
+        completed = Progress.objects.filter(student_id=student_id, course_id=course_id).aggregate(
+            videos=Count('id', filter=Q(video__isnull=False)),
+            quizzes=Count('id', filter=Q(quiz__isnull=False)),
+            assignments=Count('id', filter=Q(assignment__isnull=False)),
+        )
+        for rollup in EnrollmentProgress.objects.filter(
+            enrollment__student_id=student_id, enrollment__course_id=course_id
+        ):
+            rollup.completed_videos = completed['videos']
+            rollup.completed_quizzes = completed['quizzes']
+            rollup.completed_assignments = completed['assignments']
+            rollup.completed_items = sum(completed.values())
+            rollup.percentage = (
+                rollup.completed_items * 100 / rollup.total_items if rollup.total_items else 0
+            )
+            rollup.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('courses', '0015_backfill_enrollment_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_progress, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='progress',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='progress',
+            constraint=models.UniqueConstraint(condition=models.Q(('video__isnull', False)), fields=('student', 'video'), name='unique_video_progress'),
+        ),
+        migrations.AddConstraint(
+            model_name='progress',
+            constraint=models.UniqueConstraint(condition=models.Q(('quiz__isnull', False)), fields=('student', 'quiz'), name='unique_quiz_progress'),
+        ),
+        migrations.AddConstraint(
+            model_name='progress',
+            constraint=models.UniqueConstraint(condition=models.Q(('assignment__isnull', False)), fields=('student', 'assignment'), name='unique_assignment_progress'),
+        ),
+    ]
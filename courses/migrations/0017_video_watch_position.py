@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('courses', '0016_progress_item_constraints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoWatchPosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position_seconds', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watch_positions', to='authentication.studentprofile')),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watch_positions', to='courses.video')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('student', 'video'), name='unique_watch_position')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 15:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017_video_watch_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollmentprogress',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0018_enrollmentprogress_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSimilarity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+                ('score', models.FloatField(default=0)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='courses.course')),
+                ('similar_course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_to', to='courses.course')),
+            ],
+            options={
+                'ordering': ['course', 'rank'],
+                'indexes': [models.Index(fields=['similar_course', 'course'], name='courses_cou_similar_4b70ec_idx')],
+                'unique_together': {('course', 'rank')},
+            },
+        ),
+    ]
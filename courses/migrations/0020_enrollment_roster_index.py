@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('courses', '0019_course_similarity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['course', '-enrolled_at', '-id'], name='courses_enr_course__b84680_idx'),
+        ),
+    ]
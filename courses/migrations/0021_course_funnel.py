@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0020_enrollment_roster_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseFunnel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrolled_count', models.PositiveIntegerField(default=0)),
+                ('finished_count', models.PositiveIntegerField(default=0)),
+                ('median_seconds_to_finish', models.FloatField(blank=True, null=True)),
+                ('steps', models.JSONField(default=list)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='funnel', to='courses.course')),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 16:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0021_course_funnel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseSearchDocument',
+            fields=[
+                ('course', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='courses.course')),
+            ],
+            options={
+                'db_table': 'courses_course_search',
+                'managed': False,
+            },
+        ),
+    ]
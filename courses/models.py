@@ -1,10 +1,46 @@
 # course/model.py
 
 from django.db import models
+from django.db.models import F, Q, Value, Case, When, Count, Sum, OuterRef, Subquery
+from django.db.models.functions import Cast, Greatest, Coalesce
+from django.db.models.lookups import GreaterThan
 
 from django.utils import timezone
 from authentication.models import TeacherProfile,StudentProfile,User
 
+
+def format_duration(seconds):
+    """Render a number of seconds as "M:SS" (or "H:MM:SS" past an hour)"""
+    hours, remainder = divmod(int(seconds or 0), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
+
+
+def parse_duration(value):
+    """
+    Turn "SS", "MM:SS" or "H:MM:SS" (or a plain number) into whole seconds.
+    Raises ValueError for anything else.
+    """
+    if value is None or value == '':
+        return 0
+    if isinstance(value, (int, float)):
+        if value < 0:
+            raise ValueError(f"Negative duration: {value}")
+        return int(value)
+
+    parts = str(value).strip().split(':')
+    if len(parts) > 3:
+        raise ValueError(f"Invalid duration: {value}")
+    seconds = 0
+    for part in parts:
+        number = int(part)
+        if number < 0:
+            raise ValueError(f"Invalid duration: {value}")
+        seconds = seconds * 60 + number
+    return seconds
+
 class Teacher(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(blank=True)
@@ -29,32 +65,194 @@ class Course(models.Model):
     thumbnail = models.ImageField(upload_to='course_thumbnails/', blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     is_active = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            # Newest-first catalog pages (lms.pagination.KeysetPagination)
+            models.Index(fields=['is_active', '-created_at', '-id']),
+        ]
     
     def __str__(self):
         return self.title
     
+    def get_stats(self):
+        """Return the denormalized counters, building them on first access"""
+        try:
+            return self.stats
+        except CourseStats.DoesNotExist:
+            return CourseStats.rebuild(self)
+
     def get_total_videos(self):
-        return self.videos.count()
-    
+        return self.get_stats().total_videos
+
+    def get_total_topics(self):
+        return self.get_stats().total_topics
+
     def get_total_enrollments(self):
-        return self.enrollments.count()
+        return self.get_stats().total_enrollments
+
+    def get_total_duration(self):
+        return format_duration(self.get_stats().total_duration_seconds)
     
     def get_live_classes(self):
         from meetings.models import Meeting
         return Meeting.objects.filter(course=self, meeting_type='lecture')
 
+    @classmethod
+    def with_teacher_counts(cls, queryset):
+        """
+        Annotate the counts the teacher course listings show. Each is a
+        correlated subquery, so the joins cannot multiply into each other.
+        """
+        from meetings.models import Meeting
+
+        def count_of(model, **filters):
+            rows = model.objects.filter(course=OuterRef('pk'), **filters).order_by().values('course')
+            return Coalesce(Subquery(rows.annotate(total=Count('pk')).values('total')), 0)
+
+        return queryset.annotate(
+            video_total=count_of(Video),
+            quiz_total=count_of(Quiz),
+            enrollment_total=count_of(Enrollment),
+            live_class_total=count_of(Meeting, meeting_type='lecture'),
+        )
+
     def has_user_paid(self, user):
+        # Set lookup against the user's cached entitlements (courses/entitlements.py)
+        from .entitlements import user_can_access
+        return user_can_access(user, self)
+
+
 
-        if self.course_type == 'free':
-            return True
-        
-        from payments.models import Payment
-        return Payment.objects.filter(
-            user=user,
-            course=self,
-            is_successful=True
-        ).exists()
+class CourseStats(models.Model):
+    """
+    Denormalized per-course counters. Kept up to date incrementally by the
+    signals in courses/signals.py and rebuilt with `manage.py rebuild_course_stats`.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, related_name='stats')
+    total_videos = models.PositiveIntegerField(default=0)
+    total_topics = models.PositiveIntegerField(default=0)
+    total_quizzes = models.PositiveIntegerField(default=0)
+    total_assignments = models.PositiveIntegerField(default=0)
+    total_enrollments = models.PositiveIntegerField(default=0)
+    total_reviews = models.PositiveIntegerField(default=0)
+    total_duration_seconds = models.PositiveIntegerField(default=0)
+    # Bumped whenever the course or its videos/topics/quizzes/assignments change;
+    # used to version cached course content and build ETags
+    content_version = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.course.title}"
+
+    @classmethod
+    def rebuild(cls, course):
+        """Recount every counter for a course from its source tables"""
+        stats, _ = cls.objects.update_or_create(
+            course=course,
+            defaults={
+                'total_videos': course.videos.count(),
+                'total_topics': course.topics.count(),
+                'total_quizzes': course.quizzes.count(),
+                'total_assignments': course.assignments.count(),
+                'total_enrollments': course.enrollments.count(),
+                'total_reviews': course.reviews.count(),
+                'total_duration_seconds': course.videos.aggregate(
+                    total=Coalesce(Sum('duration_seconds'), 0)
+                )['total'],
+            }
+        )
+        course.stats = stats
+        return stats
+
+    @classmethod
+    def bump(cls, course_id, **deltas):
+        """
+        Atomically add the given deltas to counters, e.g. bump(1, total_videos=1).
+        Missing rows are left alone and get rebuilt lazily by Course.get_stats().
+        """
+        updates = {
+            field: Greatest(F(field) + delta, Value(0))
+            for field, delta in deltas.items()
+        }
+        cls.objects.filter(course_id=course_id).update(updated_at=timezone.now(), **updates)
+
+    @classmethod
+    def refresh_duration(cls, course_id):
+        """Re-sum the course's video durations in the database"""
+        total = Video.objects.filter(course_id=OuterRef('course_id')).values('course_id').annotate(
+            total=Sum('duration_seconds')
+        ).values('total')
+        cls.objects.filter(course_id=course_id).update(
+            total_duration_seconds=Coalesce(Subquery(total), 0),
+            updated_at=timezone.now()
+        )
+
+
+class CourseSearchDocument(models.Model):
+    """
+    A course's row in the SQLite FTS5 search index (see search.py). The table
+    is created and filled outside the ORM; the model only lets course queries
+    join it.
+    """
+    course = models.OneToOneField(
+        Course, primary_key=True, db_column='rowid', db_constraint=False,
+        on_delete=models.DO_NOTHING, related_name='search_document'
+    )
+
+    class Meta:
+        managed = False
+        db_table = 'courses_course_search'
+
+
+
+class CourseRanking(models.Model):
+    """
+    Precomputed top-N course lists for the homepage, one row per position.
+    Rebuilt by `courses.tasks.refresh_course_rankings` (celery beat, and on
+    enrollment bursts) so listing them is an indexed read.
+    """
+    MODES = [
+        ('featured', 'Featured'),
+        ('trending', 'Trending'),
+        ('newest', 'Newest'),
+    ]
+
+    mode = models.CharField(max_length=20, choices=MODES)
+    position = models.PositiveIntegerField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='rankings')
+    score = models.FloatField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['mode', 'position']
+        unique_together = ['mode', 'position']
+
+    def __str__(self):
+        return f"{self.mode} #{self.position}: {self.course.title}"
+
+
+class CourseSimilarity(models.Model):
+    """
+    Top-K co-enrollment neighbours of a course, one row per neighbour.
+    Rebuilt nightly by `courses.tasks.refresh_course_similarities`; see
+    recommendations.py.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='neighbours')
+    similar_course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='similar_to')
+    rank = models.PositiveIntegerField()
+    score = models.FloatField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['course', 'rank']
+        unique_together = ['course', 'rank']
+        indexes = [
+            models.Index(fields=['similar_course', 'course']),
+        ]
 
+    def __str__(self):
+        return f"{self.course.title} ~ {self.similar_course.title} ({self.score:.2f})"
 
 
 # NEW MODEL: Topic
@@ -74,32 +272,47 @@ class Topic(models.Model):
         return f"{self.course.title} - {self.title}"
     
     def get_total_videos(self):
-        return self.videos.count()
+        total = getattr(self, 'video_total', None)
+        return self.videos.count() if total is None else total
     
+    @classmethod
+    def with_totals(cls, queryset):
+        """Annotate video counts and summed durations so listings skip per-topic queries"""
+        return queryset.annotate(
+            video_total=Count('videos'),
+            total_duration_seconds=Coalesce(Sum('videos__duration_seconds'), 0),
+        )
+
     def get_total_duration(self):
-        # Calculate total duration of all videos in this topic
-        videos = self.videos.all()
-        total_minutes = 0
-        for video in videos:
-            if video.duration:
-                # Assuming duration is in format "10:30"
-                try:
-                    minutes, seconds = map(int, video.duration.split(':'))
-                    total_minutes += minutes + (seconds / 60)
-                except:
-                    pass
-        return f"{int(total_minutes)}:{int((total_minutes % 1) * 60):02d}"
+        total = getattr(self, 'total_duration_seconds', None)
+        if total is None:
+            total = self.videos.aggregate(total=Coalesce(Sum('duration_seconds'), 0))['total']
+        return format_duration(total)
 
 
 class Video(models.Model):
+    PROCESSING_STATUS = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='videos')
     topic = models.ForeignKey(Topic, on_delete=models.CASCADE, related_name='videos', null=True, blank=True)
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     video_file = models.FileField(upload_to='course_videos/')
-    duration = models.CharField(max_length=10, blank=True)  # Format: "10:30"
+    duration_seconds = models.PositiveIntegerField(default=0)
     order = models.PositiveIntegerField(default=0)
+    is_free_preview = models.BooleanField(default=False)
     created_at = models.DateTimeField(default=timezone.now)
+
+    # Transcoding output (see courses/transcoding.py)
+    processing_status = models.CharField(max_length=20, choices=PROCESSING_STATUS, default='pending')
+    processing_error = models.TextField(blank=True)
+    hls_manifest = models.CharField(max_length=255, blank=True)  # Relative to MEDIA_ROOT
+    poster = models.ImageField(upload_to='video_posters/', blank=True)
     
     class Meta:
         ordering = ['order']
@@ -107,6 +320,14 @@ class Video(models.Model):
     def __str__(self):
         return f"{self.course.title} - {self.title}"
 
+    @property
+    def duration(self):
+        return format_duration(self.duration_seconds)
+
+    @property
+    def is_hls_ready(self):
+        return self.processing_status == 'ready' and bool(self.hls_manifest)
+
 class Quiz(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='quizzes')
     video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='quizzes', null=True, blank=True)
@@ -150,10 +371,21 @@ class Enrollment(models.Model):
     is_completed = models.BooleanField(default=False)
     class Meta:
         unique_together = ['student', 'course']  # Prevent duplicate enrollments
+        indexes = [
+            # Newest-first course rosters (teacher_dashbord.views.RosterPagination)
+            models.Index(fields=['course', '-enrolled_at', '-id']),
+        ]
     
     def __str__(self):
         return f"{self.student.full_name} - Enrollment in {self.course.title}"
 
+    def get_progress(self):
+        """Return the completion counters, building them on first access"""
+        try:
+            return self.progress
+        except EnrollmentProgress.DoesNotExist:
+            return EnrollmentProgress.rebuild(self)
+
 class Progress(models.Model):
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE) 
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
@@ -163,7 +395,231 @@ class Progress(models.Model):
     completed_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
-        unique_together = ['student', 'course', 'video', 'quiz', 'assignment']
+        # One row per completed item. Each row sets exactly one item column,
+        # and NULLs never collide in a plain unique index, so every column
+        # gets its own partial constraint.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['student', 'video'], condition=Q(video__isnull=False), name='unique_video_progress'
+            ),
+            models.UniqueConstraint(
+                fields=['student', 'quiz'], condition=Q(quiz__isnull=False), name='unique_quiz_progress'
+            ),
+            models.UniqueConstraint(
+                fields=['student', 'assignment'], condition=Q(assignment__isnull=False),
+                name='unique_assignment_progress'
+            ),
+        ]
     
     def __str__(self):
-        return f"{self.student.username} - {self.course.title}"
\ No newline at end of file
+        return f"{self.student.username} - {self.course.title}"
+
+
+def course_total_items(course_id):
+    """Videos, quizzes and assignments a student can complete in a course"""
+    return (
+        Video.objects.filter(course_id=course_id).count()
+        + Quiz.objects.filter(course_id=course_id).count()
+        + Assignment.objects.filter(course_id=course_id).count()
+    )
+
+
+class EnrollmentProgress(models.Model):
+    """
+    Denormalized completion counters per enrollment. Kept up to date
+    incrementally by the Progress and content signals in courses/signals.py
+    and rebuilt with `manage.py rebuild_enrollment_progress`.
+    """
+    # Progress column -> counter it feeds
+    COUNTERS = {
+        'video_id': 'completed_videos',
+        'quiz_id': 'completed_quizzes',
+        'assignment_id': 'completed_assignments',
+    }
+
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, related_name='progress')
+    completed_videos = models.PositiveIntegerField(default=0)
+    completed_quizzes = models.PositiveIntegerField(default=0)
+    completed_assignments = models.PositiveIntegerField(default=0)
+    completed_items = models.PositiveIntegerField(default=0)
+    total_items = models.PositiveIntegerField(default=0)
+    percentage = models.FloatField(default=0)
+    # Bumped on every change to the enrollment's Progress rows; part of the
+    # completed-items cache key (courses/progress.py)
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.enrollment} - {self.percentage:.0f}%"
+
+    @staticmethod
+    def _percentage(completed, total):
+        """Database expression for completed / total as a percentage"""
+        return Case(
+            When(GreaterThan(total, 0), then=Cast(completed, models.FloatField()) * 100.0 / total),
+            default=Value(0.0),
+            output_field=models.FloatField(),
+        )
+
+    @classmethod
+    def rebuild(cls, enrollment):
+        """Recount one enrollment from its Progress rows"""
+        completed = Progress.objects.filter(
+            student_id=enrollment.student_id, course_id=enrollment.course_id
+        ).aggregate(
+            videos=Count('id', filter=Q(video__isnull=False)),
+            quizzes=Count('id', filter=Q(quiz__isnull=False)),
+            assignments=Count('id', filter=Q(assignment__isnull=False)),
+        )
+        completed_items = sum(completed.values())
+        total_items = course_total_items(enrollment.course_id)
+        rollup, _ = cls.objects.update_or_create(
+            enrollment=enrollment,
+            defaults={
+                'completed_videos': completed['videos'],
+                'completed_quizzes': completed['quizzes'],
+                'completed_assignments': completed['assignments'],
+                'completed_items': completed_items,
+                'total_items': total_items,
+                'percentage': completed_items * 100 / total_items if total_items else 0,
+            }
+        )
+        enrollment.progress = rollup
+        return rollup
+
+    @classmethod
+    def bump(cls, student_id, course_id, **deltas):
+        """
+        Atomically add deltas to one enrollment's completion counters,
+        e.g. bump(student_id, course_id, completed_videos=1)
+        """
+        updates = {
+            field: Greatest(F(field) + delta, Value(0))
+            for field, delta in deltas.items()
+        }
+        completed = Greatest(F('completed_items') + sum(deltas.values()), Value(0))
+        cls.objects.filter(
+            enrollment__student_id=student_id, enrollment__course_id=course_id
+        ).update(
+            completed_items=completed,
+            percentage=cls._percentage(completed, F('total_items')),
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+            **updates
+        )
+
+    @classmethod
+    def bump_version(cls, student_id, course_id):
+        """Mark the enrollment's completed items as changed without recounting"""
+        cls.objects.filter(
+            enrollment__student_id=student_id, enrollment__course_id=course_id
+        ).update(version=F('version') + 1, updated_at=timezone.now())
+
+    @classmethod
+    def refresh_totals(cls, course_id):
+        """Recount the course's content and re-derive every enrollment's percentage"""
+        total = course_total_items(course_id)
+        cls.objects.filter(enrollment__course_id=course_id).update(
+            total_items=total,
+            percentage=cls._percentage(F('completed_items'), Value(total)),
+            updated_at=timezone.now(),
+        )
+
+    @classmethod
+    def counter_for(cls, progress):
+        """The counter a Progress row counts towards"""
+        for column, counter in cls.COUNTERS.items():
+            if getattr(progress, column):
+                return counter
+        return None
+
+
+class VideoWatchPosition(models.Model):
+    """
+    Last known playback position per student and video. Written in bulk
+    from the heartbeat buffer in watch.py, never per heartbeat.
+    """
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='watch_positions')
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name='watch_positions')
+    position_seconds = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'video'], name='unique_watch_position'),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username} - {self.video.title} @ {format_duration(self.position_seconds)}"
+
+
+class QuizAttempt(models.Model):
+    """
+    One graded quiz submission (see grading.py). `answers` maps every
+    question id of the graded quiz version to the chosen option index (None
+    when unanswered); `results` holds one '1'/'0' per question in ascending
+    question id order.
+    """
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='quiz_attempts')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempts')
+    answers = models.JSONField(default=dict)
+    results = models.TextField(blank=True)
+    correct_count = models.PositiveIntegerField(default=0)
+    total_questions = models.PositiveIntegerField(default=0)
+    score = models.PositiveSmallIntegerField(default=0)
+    passed = models.BooleanField(default=False)
+    # CourseStats.content_version the answer key was taken from
+    quiz_version = models.PositiveIntegerField(default=1)
+    submitted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-submitted_at']
+        indexes = [
+            models.Index(fields=['student', 'quiz', '-submitted_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.student.username} - {self.quiz.title} ({self.score}%)"
+
+
+class QuizAnalytics(models.Model):
+    """
+    Item analysis of a quiz's attempts, computed in batch by analytics.py.
+    `question_stats` maps question id to its difficulty, discrimination and
+    per-option answer counts.
+    """
+    quiz = models.OneToOneField(Quiz, on_delete=models.CASCADE, related_name='analytics')
+    attempt_count = models.PositiveIntegerField(default=0)
+    student_count = models.PositiveIntegerField(default=0)
+    mean_score = models.FloatField(default=0)
+    median_score = models.FloatField(default=0)
+    score_std = models.FloatField(default=0)
+    pass_rate = models.FloatField(default=0)
+    # Students per 10-point score band, 0-9 ... 90-100
+    score_histogram = models.JSONField(default=list)
+    question_stats = models.JSONField(default=dict)
+    # Newest attempt included, to skip quizzes with nothing new
+    last_attempt_id = models.PositiveBigIntegerField(default=0)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Analytics for {self.quiz.title}"
+
+
+class CourseFunnel(models.Model):
+    """
+    Completion funnel of a course, computed nightly by analytics.py.
+    `steps` lists the course's videos, quizzes and assignments in course
+    order with the share of enrolled students who completed each and the
+    median time it took them from the previous step.
+    """
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, related_name='funnel')
+    enrolled_count = models.PositiveIntegerField(default=0)
+    # Students who completed every step
+    finished_count = models.PositiveIntegerField(default=0)
+    median_seconds_to_finish = models.FloatField(null=True, blank=True)
+    steps = models.JSONField(default=list)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Funnel for {self.course.title}"
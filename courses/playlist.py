@@ -0,0 +1,111 @@
+# courses/playlist.py
+
+"""
+Sidebar playlist for a course.
+
+The topic/video tree is the same for every viewer, so it is built with a
+single annotated query and cached under the course's content version
+(CourseStats.content_version). Per-user access flags are applied on top of
+the cached tree by `apply_access`.
+"""
+
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from django.utils.http import quote_etag
+
+from .models import Topic, Quiz, Assignment, format_duration
+
+PLAYLIST_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def build_playlist(course):
+    """
+    Build the access-independent topic/video tree in one query
+    """
+    rows = Topic.objects.filter(course=course, is_active=True).annotate(
+        video_has_quiz=Exists(Quiz.objects.filter(video=OuterRef('videos'))),
+        video_has_assignment=Exists(Assignment.objects.filter(video=OuterRef('videos'))),
+    ).order_by('order', 'id', 'videos__order', 'videos__id').values(
+        'id', 'title', 'order',
+        'videos__id', 'videos__title', 'videos__duration_seconds', 'videos__order',
+        'videos__is_free_preview', 'video_has_quiz', 'video_has_assignment',
+    )
+
+    topics = []
+    for row in rows:
+        if not topics or topics[-1]['id'] != row['id']:
+            topics.append({
+                'id': row['id'],
+                'title': row['title'],
+                'order': row['order'],
+                'videos': []
+            })
+        # Topics without videos come back as a single row with empty video columns
+        if row['videos__id'] is not None:
+            topics[-1]['videos'].append({
+                'id': row['videos__id'],
+                'title': row['videos__title'],
+                'duration': format_duration(row['videos__duration_seconds']),
+                'duration_seconds': row['videos__duration_seconds'],
+                'order': row['videos__order'],
+                'has_quiz': row['video_has_quiz'],
+                'has_assignment': row['video_has_assignment'],
+                'is_free_preview': row['videos__is_free_preview'],
+            })
+    return topics
+
+
+def get_playlist(course):
+    """
+    Cached playlist tree for the course's current content version
+    """
+    version = course.get_stats().content_version
+    cache_key = f'course_playlist:{course.id}:{version}'
+    topics = cache.get(cache_key)
+    if topics is None:
+        topics = build_playlist(course)
+        cache.set(cache_key, topics, PLAYLIST_CACHE_TIMEOUT)
+    return topics
+
+
+def apply_access(topics, user_has_access, resume_positions=None):
+    """
+    Per-user copy of the playlist with can_access flags and resume positions
+    filled in
+    """
+    resume_positions = resume_positions or {}
+    topics_data = []
+    for topic in topics:
+        videos_data = []
+        for video in topic['videos']:
+            can_access = user_has_access or video['is_free_preview']
+            videos_data.append({
+                **video,
+                'can_access': can_access,
+                'resume_at': resume_positions.get(video['id'], 0),
+            })
+        topics_data.append({
+            'id': topic['id'],
+            'title': topic['title'],
+            'order': topic['order'],
+            'video_count': len(videos_data),
+            'total_duration': format_duration(sum(video['duration_seconds'] for video in videos_data)),
+            'videos': videos_data
+        })
+    return topics_data
+
+
+def playlist_video_ids(topics):
+    return [video['id'] for topic in topics for video in topic['videos']]
+
+
+def playlist_etag(course, user_has_access, resume_positions=None):
+    version = course.get_stats().content_version
+    tag = f'{course.id}-{version}-{int(user_has_access)}'
+    if resume_positions:
+        # Resume positions move on every heartbeat flush, so they are part of the tag
+        digest = hashlib.sha1(repr(sorted(resume_positions.items())).encode()).hexdigest()[:12]
+        tag = f'{tag}-{digest}'
+    return quote_etag(tag)
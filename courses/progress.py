@@ -0,0 +1,198 @@
+# courses/progress.py
+
+"""
+Progress reads and bulk writes.
+
+Batched callers (the student events endpoint, quiz grading) insert their
+completions with one bulk_create. bulk_create skips the post_save signal
+that feeds EnrollmentProgress, so the rollup is bumped here once per
+course and counter instead.
+
+The per-course progress page is assembled from two cached pieces: the
+course outline (shared by every student, versioned by the course content
+version) and the ids a student has completed, one set per content type,
+versioned by `EnrollmentProgress.version`. Every change to a student's
+Progress rows bumps that version in the database (with the counters, or
+through invalidate()), so a process-local cache in another web worker or
+the Celery flush never serves a stale set.
+"""
+
+import hashlib
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.http import quote_etag
+
+from .models import Assignment, EnrollmentProgress, Progress, Quiz, Video, format_duration
+
+PROGRESS_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Progress column for each kind of completable item
+ITEM_COLUMNS = {
+    'video': 'video_id',
+    'quiz': 'quiz_id',
+    'assignment': 'assignment_id',
+}
+
+
+@transaction.atomic
+def record_completions(student_profile, completions):
+    """
+    Insert Progress rows for (kind, item_id, course_id, completed_at) tuples
+    the student has not completed yet. Returns the created rows.
+    """
+    completions = list(completions)
+    done = set()
+    for kind, column in ITEM_COLUMNS.items():
+        item_ids = {item_id for item_kind, item_id, _, _ in completions if item_kind == kind}
+        if item_ids:
+            done.update(
+                (kind, item_id) for item_id in Progress.objects.filter(
+                    student=student_profile, **{f'{column}__in': item_ids}
+                ).values_list(column, flat=True)
+            )
+
+    rows, seen = [], set()
+    for kind, item_id, course_id, completed_at in completions:
+        if (kind, item_id) in done or (kind, item_id) in seen:
+            continue
+        seen.add((kind, item_id))
+        rows.append(Progress(
+            student=student_profile, course_id=course_id,
+            completed_at=completed_at or timezone.now(),
+            **{ITEM_COLUMNS[kind]: item_id}
+        ))
+    Progress.objects.bulk_create(rows, ignore_conflicts=True)
+
+    # ignore_conflicts hands back every object whether or not it was written,
+    # so read back which of the rows are now ours: same item, same course and
+    # the completion time this call stored
+    written = {
+        (progress.course_id, column, getattr(progress, column), progress.completed_at)
+        for progress in rows for column in ITEM_COLUMNS.values() if getattr(progress, column)
+    }
+    created = []
+    for column in ITEM_COLUMNS.values():
+        item_ids = {item_id for _, item_column, item_id, _ in written if item_column == column}
+        if item_ids:
+            created.extend(
+                progress for progress in Progress.objects.filter(
+                    student=student_profile, **{f'{column}__in': item_ids}
+                )
+                if (progress.course_id, column, getattr(progress, column), progress.completed_at) in written
+            )
+
+    bumps = Counter(
+        (progress.course_id, EnrollmentProgress.counter_for(progress)) for progress in created
+    )
+    # bump() also moves the version the completed-items cache is keyed on
+    for (course_id, counter), count in bumps.items():
+        EnrollmentProgress.bump(student_profile.id, course_id, **{counter: count})
+    return created
+
+
+def build_outline(course):
+    """
+    Videos, quizzes and assignments of a course in display order
+    """
+    return {
+        'videos': [
+            {'id': video_id, 'title': title, 'duration': format_duration(seconds), 'order': order}
+            for video_id, title, seconds, order in Video.objects.filter(course=course).order_by(
+                'order', 'id'
+            ).values_list('id', 'title', 'duration_seconds', 'order')
+        ],
+        'quizzes': list(Quiz.objects.filter(course=course).order_by('order', 'id').values(
+            'id', 'title', 'passing_score'
+        )),
+        'assignments': list(Assignment.objects.filter(course=course).order_by('order', 'id').values(
+            'id', 'title', 'due_date'
+        )),
+    }
+
+
+def get_outline(course):
+    """
+    Cached outline for the course's current content version
+    """
+    version = course.get_stats().content_version
+    cache_key = f'course_outline:{course.id}:{version}'
+    outline = cache.get(cache_key)
+    if outline is None:
+        outline = build_outline(course)
+        cache.set(cache_key, outline, PROGRESS_CACHE_TIMEOUT)
+    return outline
+
+
+def _completed_cache_key(student_id, course_id, version):
+    return f'course_progress:{student_id}:{course_id}:{version}'
+
+
+def _load_completed(student_id, course_id):
+    completed = {'videos': set(), 'quizzes': set(), 'assignments': set()}
+    rows = Progress.objects.filter(student_id=student_id, course_id=course_id).values_list(
+        'video_id', 'quiz_id', 'assignment_id'
+    )
+    for video_id, quiz_id, assignment_id in rows:
+        for section, item_id in (('videos', video_id), ('quizzes', quiz_id), ('assignments', assignment_id)):
+            if item_id is not None:
+                completed[section].add(item_id)
+    return completed
+
+
+def completed_item_ids(enrollment):
+    """
+    {'videos': set, 'quizzes': set, 'assignments': set} of completed ids,
+    loaded with one query and cached per progress version
+    """
+    try:
+        version = enrollment.progress.version
+    except EnrollmentProgress.DoesNotExist:
+        # Nothing would bump the version of a missing rollup, so never cache
+        return _load_completed(enrollment.student_id, enrollment.course_id)
+
+    cache_key = _completed_cache_key(enrollment.student_id, enrollment.course_id, version)
+    completed = cache.get(cache_key)
+    if completed is None:
+        completed = _load_completed(enrollment.student_id, enrollment.course_id)
+        cache.set(cache_key, completed, PROGRESS_CACHE_TIMEOUT)
+    return completed
+
+
+def invalidate(student_id, course_id):
+    EnrollmentProgress.bump_version(student_id, course_id)
+
+
+def course_progress(outline, completed):
+    """
+    Merge the outline with the completed sets into per-section lists and counts
+    """
+    sections = {}
+    for section, items in outline.items():
+        done = completed[section]
+        # Counting along the outline ignores Progress rows of deleted items
+        listed = [{**item, 'completed': item['id'] in done} for item in items]
+        completed_count = sum(item['completed'] for item in listed)
+        sections[section] = {
+            'total': len(listed),
+            'completed': completed_count,
+            'pending': len(listed) - completed_count,
+            'list': listed,
+        }
+    total_items = sum(section['total'] for section in sections.values())
+    completed_items = sum(section['completed'] for section in sections.values())
+    sections['progress'] = {
+        'percentage': round(completed_items / total_items * 100, 2) if total_items else 0,
+        'completed_items': completed_items,
+        'total_items': total_items,
+    }
+    return sections
+
+
+def progress_etag(course, completed):
+    version = course.get_stats().content_version
+    ids = repr(sorted((section, sorted(ids)) for section, ids in completed.items()))
+    digest = hashlib.sha1(ids.encode()).hexdigest()[:12]
+    return quote_etag(f'{course.id}-{version}-{digest}')
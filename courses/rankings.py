@@ -0,0 +1,111 @@
+# courses/rankings.py
+
+"""
+Homepage course rankings.
+
+Scoring every course on each homepage hit does not scale, so the rankings
+are computed in bulk into CourseRanking and the catalog reads them back by
+(mode, position). `refresh_rankings` is run by celery beat and, through
+`note_enrollment`, whenever a burst of enrollments comes in between runs.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Course, CourseRanking, Enrollment
+
+RANKING_SIZE = getattr(settings, 'COURSE_RANKING_SIZE', 24)
+TRENDING_WINDOW_DAYS = 7
+
+# Enrollments since the last refresh that trigger an early one
+BURST_THRESHOLD = getattr(settings, 'COURSE_RANKING_BURST_THRESHOLD', 25)
+BURST_COUNTER_KEY = 'course_rankings:enrollments_since_refresh'
+REFRESH_QUEUED_KEY = 'course_rankings:refresh_queued'
+
+
+def _featured():
+    # Most enrolled overall, read from the denormalized counters
+    courses = Course.objects.filter(is_active=True).order_by(
+        '-stats__total_enrollments', '-created_at'
+    ).values_list('id', 'stats__total_enrollments')[:RANKING_SIZE]
+    return [(course_id, total or 0) for course_id, total in courses]
+
+
+def _trending(now):
+    # Enrollment velocity: new enrollments per day over the trailing window
+    since = now - timedelta(days=TRENDING_WINDOW_DAYS)
+    counts = Enrollment.objects.filter(
+        enrolled_at__gte=since, course__is_active=True
+    ).values('course_id').annotate(
+        recent=Count('id')
+    ).order_by('-recent', 'course_id').values_list('course_id', 'recent')[:RANKING_SIZE]
+    return [(course_id, recent / TRENDING_WINDOW_DAYS) for course_id, recent in counts]
+
+
+def _newest():
+    courses = Course.objects.filter(is_active=True).order_by(
+        '-created_at', '-id'
+    ).values_list('id', 'created_at')[:RANKING_SIZE]
+    return [(course_id, created_at.timestamp()) for course_id, created_at in courses]
+
+
+def compute_rankings(now=None):
+    """
+    Return {mode: [(course_id, score), ...]} best first
+    """
+    now = now or timezone.now()
+    return {
+        'featured': _featured(),
+        'trending': _trending(now),
+        'newest': _newest(),
+    }
+
+
+def refresh_rankings():
+    """
+    Recompute every ranking mode and swap the rows in one transaction
+    """
+    now = timezone.now()
+    rankings = compute_rankings(now)
+    rows = [
+        CourseRanking(mode=mode, position=position, course_id=course_id, score=score, computed_at=now)
+        for mode, ranked in rankings.items()
+        for position, (course_id, score) in enumerate(ranked, start=1)
+    ]
+    with transaction.atomic():
+        CourseRanking.objects.all().delete()
+        CourseRanking.objects.bulk_create(rows)
+
+    cache.delete_many([BURST_COUNTER_KEY, REFRESH_QUEUED_KEY])
+    return len(rows)
+
+
+def ranked_course_ids(mode, limit=None):
+    """
+    Course ids for a ranking mode in rank order. Fills the table on first use
+    so a fresh deployment does not serve an empty homepage.
+    """
+    rankings = CourseRanking.objects.filter(mode=mode).order_by('position')
+    if not CourseRanking.objects.exists():
+        refresh_rankings()
+    course_ids = rankings.values_list('course_id', flat=True)
+    return list(course_ids[:limit] if limit else course_ids)
+
+
+def note_enrollment():
+    """
+    Count an enrollment towards the burst threshold. Returns True when the
+    caller should queue an early refresh (at most once until it has run).
+    """
+    cache.add(BURST_COUNTER_KEY, 0, None)
+    try:
+        count = cache.incr(BURST_COUNTER_KEY)
+    except ValueError:
+        # The key was evicted between add() and incr()
+        return False
+    return count >= BURST_THRESHOLD and cache.add(REFRESH_QUEUED_KEY, True, 60 * 10)
@@ -0,0 +1,123 @@
+# courses/recommendations.py
+
+"""
+"Recommended for you" courses from co-enrollment.
+
+Nightly, every enrollment becomes a 1 in a sparse students x courses
+matrix X. Item-item cosine similarity is X^T X scaled by the course norms,
+computed with SciPy sparse algebra, and the top NEIGHBOURS_PER_COURSE
+neighbours of every course are stored in CourseSimilarity. A student's
+recommendations are the not-yet-enrolled neighbours of their courses,
+ranked by summed similarity in one query over that table. Students with
+no usable neighbours fall back to the featured ranking.
+"""
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from scipy import sparse
+
+from .models import Course, CourseSimilarity, Enrollment
+from . import rankings
+
+NEIGHBOURS_PER_COURSE = getattr(settings, 'COURSE_NEIGHBOURS_PER_COURSE', 20)
+# Pairs sharing fewer students than this are noise, not a signal
+MIN_CO_ENROLLMENTS = getattr(settings, 'COURSE_MIN_CO_ENROLLMENTS', 2)
+
+
+def enrollment_matrix():
+    """
+    (X, course_ids): binary students x courses CSR matrix and the course id
+    of every column
+    """
+    pairs = np.array(
+        list(Enrollment.objects.filter(course__is_active=True).values_list('student_id', 'course_id')),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    student_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    course_ids, columns = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (rows, columns)),
+        shape=(len(student_ids), len(course_ids)),
+    )
+    return matrix, course_ids
+
+
+def item_similarity(matrix):
+    """
+    Cosine similarity between course columns, with the diagonal and pairs
+    below MIN_CO_ENROLLMENTS removed
+    """
+    co_enrollments = (matrix.T @ matrix).tocsr()
+    norms = np.sqrt(co_enrollments.diagonal())
+    inverse = sparse.diags(np.divide(1, norms, out=np.zeros_like(norms), where=norms > 0))
+
+    co_enrollments.setdiag(0)
+    co_enrollments.data[co_enrollments.data < MIN_CO_ENROLLMENTS] = 0
+    co_enrollments.eliminate_zeros()
+    return (inverse @ co_enrollments @ inverse).tocsr()
+
+
+def top_neighbours(similarity, k):
+    """
+    Yield (column, [(neighbour column, score), ...]) best first for every column
+    """
+    for column in range(similarity.shape[0]):
+        start, end = similarity.indptr[column], similarity.indptr[column + 1]
+        if start == end:
+            continue
+        neighbours, scores = similarity.indices[start:end], similarity.data[start:end]
+        if len(scores) > k:
+            keep = np.argpartition(-scores, k)[:k]
+            neighbours, scores = neighbours[keep], scores[keep]
+        order = np.lexsort((neighbours, -scores))
+        yield column, list(zip(neighbours[order].tolist(), scores[order].tolist()))
+
+
+def refresh_similarities():
+    """
+    Recompute the neighbour table and swap it in one transaction
+    """
+    now = timezone.now()
+    matrix, course_ids = enrollment_matrix()
+    rows = []
+    if matrix.nnz:
+        for column, neighbours in top_neighbours(item_similarity(matrix), NEIGHBOURS_PER_COURSE):
+            rows.extend(
+                CourseSimilarity(
+                    course_id=int(course_ids[column]), similar_course_id=int(course_ids[neighbour]),
+                    rank=rank, score=score, computed_at=now,
+                )
+                for rank, (neighbour, score) in enumerate(neighbours, start=1)
+            )
+    with transaction.atomic():
+        CourseSimilarity.objects.all().delete()
+        CourseSimilarity.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def recommended_courses(student_profile, limit=10, queryset=None):
+    """
+    Active courses the student is not enrolled in, best recommendation
+    first, annotated with `recommendation_score`. `queryset` may carry
+    select/prefetch lookups for serializing the result.
+    """
+    queryset = Course.objects.all() if queryset is None else queryset
+    courses = list(queryset.filter(
+        is_active=True,
+        similar_to__course__enrollments__student=student_profile,
+    ).exclude(
+        enrollments__student=student_profile
+    ).annotate(
+        recommendation_score=Sum('similar_to__score')
+    ).order_by('-recommendation_score', '-created_at')[:limit])
+    if courses:
+        return courses
+
+    # Cold start: nothing enrolled yet, or no neighbours computed
+    enrolled = set(Enrollment.objects.filter(student=student_profile).values_list('course_id', flat=True))
+    ids = [course_id for course_id in rankings.ranked_course_ids('featured') if course_id not in enrolled][:limit]
+    by_id = queryset.filter(is_active=True).in_bulk(ids)
+    return [by_id[course_id] for course_id in ids if course_id in by_id]
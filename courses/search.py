@@ -0,0 +1,165 @@
+# courses/search.py
+
+"""
+Full-text search index for the course catalog.
+
+On SQLite the catalog is mirrored into an FTS5 table (created by migration
+0006) holding one row per active course: title, description, teacher name and
+the titles of its topics. Queries are ranked with bm25, support prefix matching
+and return highlighted snippets. Matching and ranking happen inside the
+course query, so a search pages in SQL like any other listing and snippets
+are only built for the page being served. Other database backends fall back
+to plain `icontains` filtering.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'courses_course_search'
+
+# bm25 weights for the title, description, teacher and topics columns
+COLUMN_WEIGHTS = (10.0, 1.0, 3.0, 5.0)
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_END = '</mark>'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def is_supported():
+    """FTS5 is only available on SQLite"""
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(query):
+    """
+    Turn free user input into an FTS5 MATCH expression where every word must
+    match as a prefix, e.g. 'pyth djan' -> '"pyth"* "djan"*'
+    """
+    tokens = TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _course_document(course_id):
+    from .models import Course
+
+    course = Course.objects.filter(id=course_id, is_active=True).select_related(
+        'teacher__user'
+    ).first()
+    if course is None:
+        return None
+
+    topics = ' '.join(course.topics.values_list('title', flat=True))
+    teacher = f"{course.teacher.user.username or ''} {course.teacher.full_name or ''}"
+    return (course.id, course.title, course.description, teacher, topics)
+
+
+def index_course(course_id):
+    """
+    (Re)index one course. Inactive or deleted courses are dropped from the index.
+    """
+    if not is_supported():
+        return
+
+    document = _course_document(course_id)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [course_id])
+        if document is not None:
+            cursor.execute(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, title, description, teacher, topics) '
+                f'VALUES (%s, %s, %s, %s, %s)',
+                document
+            )
+
+
+def index_teacher_courses(teacher_id):
+    """
+    Reindex every course of a teacher, whose name is part of each document
+    """
+    from .models import Course
+
+    if not is_supported():
+        return
+
+    for course_id in Course.objects.filter(teacher_id=teacher_id).values_list('id', flat=True):
+        index_course(course_id)
+
+
+def remove_course(course_id):
+    if not is_supported():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [course_id])
+
+
+def rebuild_index():
+    """
+    Rebuild the whole index from the course tables. Returns the number of
+    indexed courses.
+    """
+    if not is_supported():
+        return 0
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+        cursor.execute(
+            f"""
+            INSERT INTO {SEARCH_TABLE} (rowid, title, description, teacher, topics)
+            SELECT c.id, c.title, c.description,
+                   COALESCE(u.username, '') || ' ' || COALESCE(tp.full_name, ''),
+                   COALESCE((SELECT group_concat(t.title, ' ')
+                             FROM courses_topic t WHERE t.course_id = c.id), '')
+            FROM courses_course c
+            JOIN authentication_teacherprofile tp ON tp.id = c.teacher_id
+            JOIN users u ON u.id = tp.user_id
+            WHERE c.is_active
+            """
+        )
+        cursor.execute(f'SELECT count(*) FROM {SEARCH_TABLE}')
+        return cursor.fetchone()[0]
+
+
+def filter_courses(queryset, match):
+    """
+    Narrow a Course queryset to the hits of a MATCH expression, annotated
+    with `search_rank` (bm25, lower is more relevant).
+
+    The index is joined on rowid (through CourseSearchDocument) rather than
+    ranked in a correlated subquery: bm25 re-reads the doclists of the query
+    terms for every row it scores, so a subquery re-running the MATCH per hit
+    grows with the square of the hits.
+    """
+    weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+    return queryset.filter(
+        RawSQL(f'{SEARCH_TABLE} MATCH %s', [match], output_field=BooleanField()),
+        search_document__isnull=False,
+    ).annotate(
+        search_rank=RawSQL(f'bm25({SEARCH_TABLE}, {weights})', [], output_field=FloatField())
+    )
+
+
+def course_snippets(match, course_ids):
+    """
+    {course_id: highlighted snippet} for the given hits of a MATCH expression
+    """
+    course_ids = list(course_ids)
+    if not course_ids:
+        return {}
+
+    placeholders = ', '.join(['%s'] * len(course_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT rowid, snippet({SEARCH_TABLE}, -1, %s, %s, '…', 16)
+            FROM {SEARCH_TABLE}
+            WHERE {SEARCH_TABLE} MATCH %s AND rowid IN ({placeholders})
+            """,
+            [HIGHLIGHT_START, HIGHLIGHT_END, match, *course_ids]
+        )
+        return dict(cursor.fetchall())
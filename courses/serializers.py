@@ -1,11 +1,16 @@
 # course/serializers.py
 
+import posixpath
+
+from django.db.models import Count, Prefetch
+from django.urls import reverse
 from rest_framework import serializers
-from .models import Course, Video, Quiz, Assignment, Enrollment, Progress,Topic
+from .models import Course, Video, Quiz, Assignment, Enrollment, Progress,Topic, format_duration, parse_duration
 from authentication.models import User,TeacherProfile,StudentProfile
 from support_feedback.models import CourseFeedback
 from support_feedback.models import TeacherFeedback
 from support_feedback.serializers import TeacherFeedbackSerializer
+from lms.images import responsive_image
 
 class CourseSerializer(serializers.ModelSerializer):
     total_students = serializers.SerializerMethodField()
@@ -15,9 +20,10 @@ class CourseSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'price', 'total_students']
 
     def get_total_students(self, obj):
-        if hasattr(obj, 'enrolled_students'):
-            return obj.enrolled_students.count()
-        return 0
+        # Annotated by teacher_prefetches(); count directly otherwise
+        if hasattr(obj, 'student_count'):
+            return obj.student_count
+        return obj.enrolled_students.count()
 
 class TeacherSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
@@ -25,6 +31,7 @@ class TeacherSerializer(serializers.ModelSerializer):
     last_name = serializers.CharField(source='user.last_name', read_only=True)
    
     profile_picture = serializers.SerializerMethodField()
+    profile_picture_srcset = serializers.SerializerMethodField()
     email = serializers.EmailField(read_only=True)
     expertise_areas = serializers.JSONField(required=True)
     education = serializers.JSONField(required=True)
@@ -40,30 +47,76 @@ class TeacherSerializer(serializers.ModelSerializer):
     class Meta:
         model = TeacherProfile
         fields = ['id', 'username', 'first_name', 'last_name','age', 'bio', 'gender','date_of_birth','phone','address','city','country','headline','expertise_level','years_of_experience','employment_type','department',
-                  'hourly_rate','total_courses','total_students','average_rating','teaching_style','courses_created','profile_picture','email','expertise_areas','education'
+                  'hourly_rate','total_courses','total_students','average_rating','teaching_style','courses_created','profile_picture','profile_picture_srcset','email','expertise_areas','education'
                   ,'languages_spoken','availability_schedule','preferred_teaching_methods','course_categories','feedbacks','created_at']
     
     def get_profile_picture(self, obj):
         if obj.profile_picture:
             return self.context['request'].build_absolute_uri(obj.profile_picture.url)
         return None
+
+    def get_profile_picture_srcset(self, obj):
+        return responsive_image(obj.profile_picture, 'avatar', self.context.get('request'))
     
     def get_total_courses(self, obj):
         return obj.courses_created.count()
 
     def get_total_students(self, obj):
-        # assume har course me enrolled_students M2M field hoga
-        students = set()
-        for course in obj.courses_created.all():
-            if hasattr(course, 'enrolled_students'):
-                students.update(course.enrolled_students.values_list('id', flat=True))
-        return len(students)
+        # Distinct students across the teacher's courses, annotated by teacher_prefetches()
+        if hasattr(obj, 'student_count'):
+            return obj.student_count
+        return StudentProfile.objects.filter(enrolled_courses__instructors=obj).distinct().count()
+
+
+class VideoDurationField(serializers.Field):
+    """
+    Video length stored as whole seconds, shown as "M:SS". Accepts either
+    "MM:SS"/"H:MM:SS" strings or a number of seconds on input.
+    """
+    default_error_messages = {
+        'invalid': 'Enter a duration as "MM:SS" or a number of seconds.',
+    }
+
+    def to_representation(self, value):
+        return format_duration(value)
+
+    def to_internal_value(self, data):
+        try:
+            return parse_duration(data)
+        except (TypeError, ValueError):
+            self.fail('invalid')
+
+
+def video_playback(video, request=None):
+    """
+    Where a player should load a video from: the HLS master playlist once
+    transcoding is done, otherwise the original file through the range
+    streaming endpoint. Both go through access-checked views.
+    """
+    if video.is_hls_ready:
+        master = posixpath.basename(video.hls_manifest)
+        playback_type, url = 'hls', reverse('video_hls', args=[video.id, master])
+    else:
+        playback_type, url = 'file', reverse('stream_video', args=[video.id])
+
+    if request is not None:
+        url = request.build_absolute_uri(url)
+    return {'type': playback_type, 'url': url}
 
 
 class VideoSerializer(serializers.ModelSerializer):
+    duration = VideoDurationField(source='duration_seconds', read_only=True)
+    playback = serializers.SerializerMethodField()
+
     class Meta:
         model = Video
-        fields = ['id', 'title', 'description', 'video_file', 'duration', 'order', 'created_at']
+        fields = [
+            'id', 'title', 'description', 'video_file', 'duration', 'duration_seconds',
+            'order', 'created_at', 'processing_status', 'poster', 'playback'
+        ]
+
+    def get_playback(self, obj):
+        return video_playback(obj, self.context.get('request'))
 
 
 class QuizSerializer(serializers.ModelSerializer):
@@ -78,17 +131,28 @@ class AssignmentSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'description', 'due_date', 'order']
 
 
+def thumbnail_srcsets(course, request=None):
+    """Card and detail sized renditions of a course thumbnail"""
+    if not course.thumbnail:
+        return None
+    return {
+        'card': responsive_image(course.thumbnail, 'card', request),
+        'detail': responsive_image(course.thumbnail, 'detail', request),
+    }
+
+
 class CourseListSerializer(serializers.ModelSerializer):
     teacher = TeacherSerializer(read_only=True)
     total_videos = serializers.SerializerMethodField()
     total_enrollments = serializers.SerializerMethodField()
     thumbnail = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
         fields = [
             'id', 'title', 'description', 'teacher', 'price', 
-            'course_type', 'thumbnail', 'created_at', 'is_active',
+            'course_type', 'thumbnail', 'thumbnail_srcset', 'created_at', 'is_active',
             'total_videos', 'total_enrollments'
         ]
     
@@ -103,6 +167,9 @@ class CourseListSerializer(serializers.ModelSerializer):
             return self.context['request'].build_absolute_uri(obj.thumbnail.url)
         return None
 
+    def get_thumbnail_srcset(self, obj):
+        return thumbnail_srcsets(obj, self.context.get('request'))
+
 class TopicSerializer(serializers.ModelSerializer):
     video_count = serializers.SerializerMethodField()
     total_duration = serializers.SerializerMethodField()
@@ -115,7 +182,7 @@ class TopicSerializer(serializers.ModelSerializer):
         ]
     
     def get_video_count(self, obj):
-        return obj.videos.count()
+        return obj.get_total_videos()
     
     def get_total_duration(self, obj):
         return obj.get_total_duration()
@@ -123,13 +190,14 @@ class TopicSerializer(serializers.ModelSerializer):
 
 class VideoWithTopicSerializer(serializers.ModelSerializer):
     topic_title = serializers.CharField(source='topic.title', read_only=True)
+    duration = VideoDurationField(source='duration_seconds', read_only=True)
     has_quiz = serializers.SerializerMethodField()
     has_assignment = serializers.SerializerMethodField()
     
     class Meta:
         model = Video
         fields = [
-            'id', 'title', 'description', 'duration', 'order',
+            'id', 'title', 'description', 'duration', 'duration_seconds', 'order',
             'topic_title', 'has_quiz', 'has_assignment', 'is_free_preview'
         ]
     
@@ -168,13 +236,14 @@ class CourseWithTopicsSerializer(serializers.ModelSerializer):
     teacher_name = serializers.CharField(source='teacher.user.username', read_only=True)
     total_videos = serializers.SerializerMethodField()
     total_topics = serializers.SerializerMethodField()
+    total_duration = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
         fields = [
             'id', 'title', 'description', 'price', 'course_type',
             'thumbnail', 'teacher_name', 'total_videos', 'total_topics',
-            'topics', 'created_at', 'has_live_classes'
+            'total_duration', 'topics', 'created_at', 'has_live_classes'
         ]
     
     def get_total_videos(self, obj):
@@ -183,6 +252,54 @@ class CourseWithTopicsSerializer(serializers.ModelSerializer):
     def get_total_topics(self, obj):
         return obj.get_total_topics()
 
+    def get_total_duration(self, obj):
+        return obj.get_total_duration()
+
+
+
+def teacher_prefetches(prefix=''):
+    """
+    Prefetches for the nested TeacherSerializer. Student totals arrive as
+    `student_count` annotations (one grouped count per teacher and per
+    course) instead of loading every enrolled student.
+    """
+    return [
+        Prefetch(prefix + 'teacher', queryset=TeacherProfile.objects.select_related('user').annotate(
+            student_count=Count('courses_created__enrolled_students', distinct=True)
+        )),
+        prefix + 'teacher__feedbacks',
+        Prefetch(prefix + 'teacher__courses_created', queryset=Course.objects.annotate(
+            student_count=Count('enrolled_students')
+        )),
+    ]
+
+
+def course_list_prefetches(prefix=''):
+    """
+    (select_related, prefetch_related) lookups for CourseListSerializer.
+    Pass a prefix such as 'course__' when the courses are reached through
+    another model.
+    """
+    return [prefix + 'stats'], teacher_prefetches(prefix)
+
+
+def course_detail_prefetches(prefix=''):
+    """
+    Lookups that let CourseDetailSerializer render a page of courses in a fixed
+    number of queries; course_list_prefetches() plus the course content.
+    """
+    lookups, teacher_lookups = course_list_prefetches(prefix)
+    prefetches = [
+        'topics__videos__quizzes',
+        'topics__videos__assignments',
+        'topics__quizzes',
+        'topics__assignments',
+        'videos',
+        'quizzes',
+        'assignments',
+        'reviews__user',
+    ]
+    return lookups, [prefix + lookup for lookup in prefetches] + teacher_lookups
 
 
 class CourseDetailSerializer(serializers.ModelSerializer):
@@ -193,19 +310,26 @@ class CourseDetailSerializer(serializers.ModelSerializer):
     assignments = AssignmentSerializer(many=True, read_only=True)
     total_videos = serializers.SerializerMethodField()
     total_enrollments = serializers.SerializerMethodField()
+    total_duration = serializers.SerializerMethodField()
     reviews = serializers.SerializerMethodField()
     thumbnail = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
+    search_snippet = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
         fields = [
             'id', 'title', 'description', 'teacher', 'price', 
-            'course_type', 'thumbnail', 'topics','created_at', 'is_active',
-            'videos', 'quizzes', 'assignments', 'total_videos', 'total_enrollments','reviews'
+            'course_type', 'thumbnail', 'thumbnail_srcset', 'topics','created_at', 'is_active',
+            'videos', 'quizzes', 'assignments', 'total_videos', 'total_enrollments',
+            'total_duration', 'reviews', 'search_snippet'
         ]
     
     def get_total_videos(self, obj):
         return obj.get_total_videos()
+
+    def get_total_duration(self, obj):
+        return obj.get_total_duration()
     
     def get_total_enrollments(self, obj):
         return obj.get_total_enrollments()
@@ -221,19 +345,32 @@ class CourseDetailSerializer(serializers.ModelSerializer):
             return self.context['request'].build_absolute_uri(obj.thumbnail.url)
         return None
 
+    def get_thumbnail_srcset(self, obj):
+        return thumbnail_srcsets(obj, self.context.get('request'))
+
+    def get_search_snippet(self, obj):
+        # Highlighted match from the catalog search index, only set for ?q= searches
+        return self.context.get('search_snippets', {}).get(obj.id)
+
 
 class VideoDetailSerializer(serializers.ModelSerializer):
     quizzes = QuizSerializer(many=True, read_only=True)
     assignments = AssignmentSerializer(many=True, read_only=True)
     course_title = serializers.CharField(source='course.title', read_only=True)
+    duration = VideoDurationField(source='duration_seconds', read_only=True)
+    playback = serializers.SerializerMethodField()
     
     class Meta:
         model = Video
         fields = [
-            'id', 'title', 'description', 'video_file', 'duration', 
-            'order', 'created_at', 'course_title', 'quizzes', 'assignments'
+            'id', 'title', 'description', 'video_file', 'duration', 'duration_seconds',
+            'order', 'created_at', 'course_title', 'quizzes', 'assignments',
+            'processing_status', 'poster', 'playback'
         ]
 
+    def get_playback(self, obj):
+        return video_playback(obj, self.context.get('request'))
+
 
 class EnrollmentSerializer(serializers.ModelSerializer):
     course = CourseListSerializer(read_only=True)
@@ -260,12 +397,13 @@ class CourseFeedbackSerializer(serializers.ModelSerializer):
     first_name = serializers.CharField(source="user.first_name", read_only=True)
     last_name = serializers.CharField(source="user.last_name", read_only=True)
     profile_picture = serializers.SerializerMethodField()
+    profile_picture_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = CourseFeedback
         fields = [
             'id', 'user_name', 'first_name', 'last_name',
-            'profile_picture', 'rating', 'feedback_text', 'created_at'
+            'profile_picture', 'profile_picture_srcset', 'rating', 'feedback_text', 'created_at'
         ]
 
     def get_profile_picture(self, obj):
@@ -274,3 +412,9 @@ class CourseFeedbackSerializer(serializers.ModelSerializer):
         if student_profile and student_profile.profile_picture:
             return self.context['request'].build_absolute_uri(student_profile.profile_picture.url)
         return None
+
+    def get_profile_picture_srcset(self, obj):
+        student_profile = getattr(obj.user, 'student_profile', None)
+        if student_profile:
+            return responsive_image(student_profile.profile_picture, 'avatar', self.context.get('request'))
+        return None
@@ -0,0 +1,240 @@
+# courses/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from authentication.models import StudentProfile, TeacherProfile, User
+from payments.models import Payment
+from support_feedback.models import CourseFeedback
+from .models import (
+    Course, CourseStats, Topic, Video, Quiz, Question, Assignment, Enrollment,
+    EnrollmentProgress, Progress
+)
+from . import entitlements, progress, rankings, search
+from .tasks import queue_transcode, refresh_course_rankings
+
+
+# Which CourseStats counter each content model feeds
+COUNTED_MODELS = {
+    Video: 'total_videos',
+    Topic: 'total_topics',
+    Quiz: 'total_quizzes',
+    Assignment: 'total_assignments',
+    Enrollment: 'total_enrollments',
+    CourseFeedback: 'total_reviews',
+}
+
+
+# Models whose edits change what a course page shows
+VERSIONED_MODELS = (Video, Topic, Quiz, Assignment)
+
+# Models a student completes; adding or removing one changes every
+# enrollment's total
+COMPLETABLE_MODELS = (Video, Quiz, Assignment)
+
+
+@receiver(post_save, sender=Course)
+def create_course_stats(sender, instance, created, **kwargs):
+    """
+    Give every new course an empty statistics row, and version course edits
+    """
+    if created:
+        CourseStats.objects.get_or_create(course=instance)
+    else:
+        CourseStats.bump(instance.id, content_version=1)
+
+
+def track_content_saved(sender, instance, created, **kwargs):
+    """
+    Count newly created rows and bump the content version on any edit
+    """
+    if not instance.course_id:
+        return
+
+    deltas = {}
+    if created:
+        deltas[COUNTED_MODELS[sender]] = 1
+    if sender in VERSIONED_MODELS:
+        deltas['content_version'] = 1
+    if deltas:
+        CourseStats.bump(instance.course_id, **deltas)
+    if created and sender in COMPLETABLE_MODELS:
+        EnrollmentProgress.refresh_totals(instance.course_id)
+
+
+def _course_being_deleted(origin):
+    """True when a delete cascaded from the course itself (or a course queryset)"""
+    return isinstance(origin, Course) or getattr(origin, 'model', None) is Course
+
+
+def track_content_deleted(sender, instance, origin=None, **kwargs):
+    """
+    Uncount deleted rows and bump the content version
+    """
+    if not instance.course_id:
+        return
+
+    deltas = {COUNTED_MODELS[sender]: -1}
+    if sender in VERSIONED_MODELS:
+        deltas['content_version'] = 1
+    CourseStats.bump(instance.course_id, **deltas)
+    # The course's enrollments go with it; recounting their totals once per
+    # cascaded item would only rewrite rows about to be deleted
+    if sender in COMPLETABLE_MODELS and not _course_being_deleted(origin):
+        EnrollmentProgress.refresh_totals(instance.course_id)
+
+
+for counted_model in COUNTED_MODELS:
+    post_save.connect(
+        track_content_saved, sender=counted_model,
+        dispatch_uid=f'course_stats_saved_{counted_model.__name__}'
+    )
+    post_delete.connect(
+        track_content_deleted, sender=counted_model,
+        dispatch_uid=f'course_stats_deleted_{counted_model.__name__}'
+    )
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def version_question_change(sender, instance, **kwargs):
+    """
+    Questions carry no course of their own; version their quiz's course so
+    cached answer keys (grading.py) are rebuilt
+    """
+    course_id = Quiz.objects.filter(id=instance.quiz_id).values_list('course_id', flat=True).first()
+    if course_id:
+        CourseStats.bump(course_id, content_version=1)
+
+
+@receiver(post_save, sender=Video)
+@receiver(post_delete, sender=Video)
+def refresh_course_duration(sender, instance, **kwargs):
+    """
+    Keep the course's cached total duration equal to the sum of its videos
+    """
+    if instance.course_id:
+        CourseStats.refresh_duration(instance.course_id)
+
+
+@receiver(post_init, sender=Video)
+def remember_video_file(sender, instance, **kwargs):
+    # Read from __dict__ so deferred loads (.only()) don't query the file name
+    value = instance.__dict__.get('video_file')
+    instance._saved_video_file = getattr(value, 'name', value)
+
+
+@receiver(post_save, sender=Video)
+def transcode_new_video_file(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """
+    Queue an HLS transcode whenever a video gets a new file, however it was saved
+    """
+    if raw or (update_fields is not None and 'video_file' not in update_fields):
+        return
+
+    name = instance.video_file.name
+    if name and name != instance._saved_video_file:
+        instance._saved_video_file = name
+        queue_transcode(instance)
+
+
+@receiver(post_save, sender=Course)
+def index_course_for_search(sender, instance, **kwargs):
+    """
+    Keep the catalog search index in step with course edits
+    """
+    search.index_course(instance.id)
+
+
+@receiver(post_delete, sender=Course)
+def remove_course_from_search(sender, instance, **kwargs):
+    search.remove_course(instance.id)
+
+
+@receiver(post_save, sender=Topic)
+@receiver(post_delete, sender=Topic)
+def reindex_course_topics(sender, instance, **kwargs):
+    """
+    Topic titles are part of the course search document
+    """
+    search.index_course(instance.course_id)
+
+
+@receiver(post_save, sender=User)
+def reindex_teacher_username(sender, instance, update_fields=None, **kwargs):
+    """
+    The teacher's username is part of their courses' search documents
+    """
+    if update_fields is not None and 'username' not in update_fields:
+        return
+    teacher_id = TeacherProfile.objects.filter(user=instance).values_list('id', flat=True).first()
+    if teacher_id is not None:
+        search.index_teacher_courses(teacher_id)
+
+
+@receiver(post_save, sender=TeacherProfile)
+def reindex_teacher_name(sender, instance, created, update_fields=None, **kwargs):
+    """
+    So is their full name
+    """
+    if created or (update_fields is not None and 'full_name' not in update_fields):
+        return
+    search.index_teacher_courses(instance.id)
+
+
+@receiver(post_save, sender=Enrollment)
+def refresh_rankings_on_enrollment_burst(sender, instance, created, **kwargs):
+    """
+    Refresh the homepage rankings early when many enrollments arrive between
+    scheduled runs
+    """
+    if created and rankings.note_enrollment():
+        transaction.on_commit(lambda: refresh_course_rankings.delay())
+
+
+@receiver(post_save, sender=Enrollment)
+def create_enrollment_progress(sender, instance, created, **kwargs):
+    """
+    Start every enrollment with its completion counters
+    """
+    if created:
+        EnrollmentProgress.rebuild(instance)
+
+
+@receiver(post_save, sender=Progress)
+def count_progress_saved(sender, instance, created, **kwargs):
+    counter = EnrollmentProgress.counter_for(instance)
+    if created and counter:
+        # Also moves the completed-items cache version
+        EnrollmentProgress.bump(instance.student_id, instance.course_id, **{counter: 1})
+    else:
+        progress.invalidate(instance.student_id, instance.course_id)
+
+
+@receiver(post_delete, sender=Progress)
+def count_progress_deleted(sender, instance, **kwargs):
+    counter = EnrollmentProgress.counter_for(instance)
+    if counter:
+        EnrollmentProgress.bump(instance.student_id, instance.course_id, **{counter: -1})
+    else:
+        progress.invalidate(instance.student_id, instance.course_id)
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def invalidate_payment_entitlements(sender, instance, **kwargs):
+    """
+    A payment succeeding, failing or disappearing changes what its user can open
+    """
+    entitlements.invalidate(instance.user if Payment.user.is_cached(instance) else instance.user_id)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_enrollment_entitlements(sender, instance, **kwargs):
+    """
+    Verified enrollments also grant access to paid courses
+    """
+    student = instance.student
+    entitlements.invalidate(student.user if StudentProfile.user.is_cached(student) else student.user_id)
@@ -0,0 +1,154 @@
+# courses/streaming.py
+
+"""
+Byte-range delivery of uploaded video files and their HLS renditions.
+
+When a front proxy is configured the transfer is handed off to it
+(nginx X-Accel-Redirect or an X-Sendfile style header), so Python workers
+never touch video bytes. Otherwise files are served directly: full and
+open-ended ranges go through FileResponse, which lets the WSGI server use
+sendfile(), and bounded ranges are streamed in fixed-size chunks.
+"""
+
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Not in every platform's mime table (.ts is often TypeScript)
+HLS_CONTENT_TYPES = {
+    '.m3u8': 'application/vnd.apple.mpegurl',
+    '.ts': 'video/mp2t',
+}
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range `Range` header into inclusive (start, end) offsets.
+    Returns None when the header is missing or not a simple byte range, in
+    which case the whole file is served.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+
+def _iter_range(file, length):
+    try:
+        remaining = length
+        while remaining > 0:
+            chunk = file.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def _proxy_response(name, path, content_type):
+    """
+    Let the front proxy send the file; it also takes care of Range handling
+    """
+    accel_prefix = getattr(settings, 'VIDEO_ACCEL_REDIRECT_PREFIX', None)
+    sendfile_header = getattr(settings, 'VIDEO_SENDFILE_HEADER', None)
+    if not accel_prefix and not sendfile_header:
+        return None
+
+    response = HttpResponse(content_type=content_type)
+    if accel_prefix:
+        # Header values must be ASCII; nginx unquotes the URI before the lookup
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + quote(name)
+    else:
+        response[sendfile_header] = path
+    return response
+
+
+def hls_file_name(video, name):
+    """
+    Media-relative name of a playlist or segment inside the video's HLS
+    directory, or None when `name` points anywhere else
+    """
+    if not video.is_hls_ready:
+        return None
+    hls_dir = posixpath.dirname(video.hls_manifest)
+    relative_name = posixpath.normpath(posixpath.join(hls_dir, name))
+    if not relative_name.startswith(hls_dir + '/'):
+        return None
+    if posixpath.splitext(relative_name)[1] not in HLS_CONTENT_TYPES:
+        return None
+    return relative_name
+
+
+def serve_file(request, fieldfile):
+    """
+    Serve a FileField's file honouring `Range` requests
+    """
+    return serve_media(request, fieldfile.name, fieldfile.path)
+
+
+def serve_media(request, name, path):
+    """
+    Serve the file at `path` (`name` relative to MEDIA_ROOT) honouring `Range` requests
+    """
+    content_type = (
+        HLS_CONTENT_TYPES.get(os.path.splitext(name)[1])
+        or mimetypes.guess_type(name)[0]
+        or 'application/octet-stream'
+    )
+
+    response = _proxy_response(name, path, content_type)
+    if response is not None:
+        return response
+
+    size = os.path.getsize(path)
+    try:
+        byte_range = parse_range(request.headers.get('Range'), size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        file.seek(start)
+        if end == size - 1:
+            # Open-ended range: FileResponse sends from the current offset to EOF
+            response = FileResponse(file, status=206, content_type=content_type)
+        else:
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _iter_range(file, length), status=206, content_type=content_type
+            )
+            response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,144 @@
+# courses/tasks.py
+import logging
+import os
+import shutil
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+
+from .models import Video, CourseStats
+from . import analytics, rankings, recommendations, transcoding, watch
+
+logger = logging.getLogger(__name__)
+
+
+def queue_transcode(video):
+    """
+    Mark a freshly uploaded video as pending and transcode it once the upload
+    transaction has committed
+    """
+    video.processing_status, video.processing_error, video.hls_manifest = 'pending', '', ''
+    Video.objects.filter(id=video.id).update(
+        processing_status='pending', processing_error='', hls_manifest=''
+    )
+    video_id = video.id
+    transaction.on_commit(lambda: transcode_video.delay(video_id=video_id))
+
+
+@shared_task
+def transcode_video(video_id: int):
+    """
+    Produce HLS renditions, a poster frame and the real duration for an upload
+    """
+    try:
+        video = Video.objects.get(id=video_id)
+    except Video.DoesNotExist:
+        logger.warning(f"Video {video_id} disappeared before transcoding")
+        return False
+
+    if not video.video_file:
+        return False
+
+    if not transcoding.is_available():
+        logger.error("ffmpeg/ffprobe not found, cannot transcode video %s", video_id)
+        Video.objects.filter(id=video_id).update(
+            processing_status='failed', processing_error='ffmpeg is not installed'
+        )
+        return False
+
+    Video.objects.filter(id=video_id).update(processing_status='processing', processing_error='')
+
+    source = video.video_file.path
+    hls_relative_dir = f'hls/{video_id}'
+    hls_dir = os.path.join(settings.MEDIA_ROOT, hls_relative_dir)
+    poster_relative_path = f'video_posters/{video_id}.jpg'
+
+    try:
+        info = transcoding.probe(source)
+        # Start from a clean directory so stale renditions never linger
+        shutil.rmtree(hls_dir, ignore_errors=True)
+        renditions = transcoding.select_renditions(info['height'])
+        transcoding.transcode_to_hls(source, hls_dir, renditions, info['has_audio'])
+        transcoding.extract_poster(
+            source,
+            os.path.join(settings.MEDIA_ROOT, poster_relative_path),
+            at_seconds=min(info['duration'] * 0.1, 10)
+        )
+    except (transcoding.TranscodingError, OSError, ValueError) as e:
+        logger.error(f"Failed to transcode video {video_id}: {str(e)}")
+        Video.objects.filter(id=video_id).update(
+            processing_status='failed', processing_error=str(e)
+        )
+        return False
+
+    # queryset.update() keeps this out of the post_save handlers, so bump the
+    # content version by hand for the new duration to reach cached playlists
+    Video.objects.filter(id=video_id).update(
+        processing_status='ready',
+        hls_manifest=f'{hls_relative_dir}/{transcoding.MASTER_PLAYLIST}',
+        poster=poster_relative_path,
+        duration_seconds=int(round(info['duration'])),
+    )
+    CourseStats.bump(video.course_id, content_version=1)
+    CourseStats.refresh_duration(video.course_id)
+
+    logger.info(f"Video {video_id} transcoded into {len(renditions)} renditions")
+    return True
+
+
+@shared_task
+def refresh_course_rankings():
+    """
+    Rebuild the featured/trending/newest course rankings
+    """
+    rows = rankings.refresh_rankings()
+    logger.info(f"Refreshed course rankings ({rows} rows)")
+    return rows
+
+
+@shared_task
+def refresh_quiz_analytics():
+    """
+    Recompute item analytics for quizzes that received new attempts
+    """
+    refreshed = 0
+    for quiz in analytics.stale_quizzes().iterator():
+        analytics.compute_quiz_analytics(quiz)
+        refreshed += 1
+    logger.info(f"Refreshed analytics for {refreshed} quizzes")
+    return refreshed
+
+
+@shared_task
+def refresh_course_funnels():
+    """
+    Recompute the completion funnel of every course with enrollments
+    """
+    refreshed = 0
+    for course in analytics.funnel_courses().iterator():
+        analytics.compute_course_funnel(course)
+        refreshed += 1
+    logger.info(f"Refreshed completion funnels for {refreshed} courses")
+    return refreshed
+
+
+@shared_task
+def flush_watch_positions():
+    """
+    Write buffered playback positions to the database
+    """
+    written = watch.flush()
+    if written:
+        logger.info(f"Flushed {written} watch positions")
+    return written
+
+
+@shared_task
+def refresh_course_similarities():
+    """
+    Rebuild the co-enrollment neighbour table behind course recommendations
+    """
+    rows = recommendations.refresh_similarities()
+    logger.info(f"Refreshed course similarities ({rows} rows)")
+    return rows
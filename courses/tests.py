@@ -1,3 +1,1082 @@
-from django.test import TestCase
+import importlib
+import io
+import os
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from payments.models import Payment
+from . import analytics, grading, importer, rankings, search, transcoding, watch
+from .models import (
+    Assignment, Course, CourseFunnel, CourseStats, Enrollment, EnrollmentProgress, Progress, Question, Quiz,
+    QuizAnalytics, QuizAttempt, Topic, Video, VideoWatchPosition, format_duration, parse_duration
+)
+from .serializers import VideoDurationField, video_playback
+from .tasks import refresh_course_funnels, refresh_quiz_analytics, transcode_video
+
+
+def make_teacher(n=0):
+    user = User.objects.create_user(email=f'teacher{n}@example.com', username=f'teacher{n}', password='x', role='teacher')
+    return user.teacher_profile
+
+
+def make_student(n=0):
+    user = User.objects.create_user(email=f'student{n}@example.com', username=f'student{n}', password='x', role='student')
+    return user.student_profile
+
+
+class TemporaryMediaMixin:
+    """Point MEDIA_ROOT at a scratch directory for the duration of a test"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+
+class CourseStatsTests(TestCase):
+    def setUp(self):
+        self.teacher = make_teacher()
+        self.course = Course.objects.create(title='Stats', description='d', teacher=self.teacher)
+
+    def test_counters_follow_content_changes(self):
+        Topic.objects.create(course=self.course, title='t', order=1)
+        videos = [Video.objects.create(course=self.course, title='v', video_file='x.mp4') for _ in range(3)]
+        Quiz.objects.create(course=self.course, title='q')
+        Enrollment.objects.create(student=make_student(), course=self.course)
+
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual(
+            (stats.total_videos, stats.total_topics, stats.total_quizzes, stats.total_enrollments),
+            (3, 1, 1, 1)
+        )
+
+        videos[0].delete()
+        self.assertEqual(CourseStats.objects.get(course=self.course).total_videos, 2)
+
+    def test_rebuild_command_restores_counters(self):
+        Video.objects.create(course=self.course, title='v', video_file='x.mp4')
+        CourseStats.objects.all().delete()
+
+        call_command('rebuild_course_stats')
+
+        self.assertEqual(CourseStats.objects.get(course=self.course).total_videos, 1)
+
+    def test_course_list_query_count_does_not_grow_with_courses(self):
+        client = APIClient()
+        with CaptureQueriesContext(connection) as ctx:
+            client.get('/api/courses/')
+        baseline = len(ctx)
+
+        for i in range(5):
+            course = Course.objects.create(title=f'More {i}', description='d', teacher=make_teacher(i + 1))
+            Video.objects.create(course=course, title='v', video_file='x.mp4')
+            Enrollment.objects.create(student=make_student(i), course=course)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get('/api/courses/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(ctx), baseline)
+
+    def test_teacher_student_count_is_distinct_across_courses(self):
+        second = Course.objects.create(title='Second', description='d', teacher=self.teacher)
+        self.teacher.courses_created.add(self.course, second)
+        students = [make_student(i) for i in range(3)]
+        for student in students:
+            Enrollment.objects.create(student=student, course=self.course)
+        Enrollment.objects.create(student=students[0], course=second)
+
+        response = APIClient().get('/api/courses/?ordering=title')
+
+        results = response.json()['results']
+        self.assertEqual([c['total_enrollments'] for c in results], [1, 3])
+        self.assertEqual(results[0]['teacher']['total_students'], 3)
+
+
+class CourseSearchTests(TestCase):
+    def setUp(self):
+        self.teacher = make_teacher()
+        self.python = Course.objects.create(title='Python for beginners', description='learn programming', teacher=self.teacher)
+        self.cooking = Course.objects.create(title='Cooking', description='python snake recipes', teacher=self.teacher)
+        self.art = Course.objects.create(title='Art', description='drawing', teacher=self.teacher)
+        Topic.objects.create(course=self.art, title='Pythonic brushes', order=1)
+        self.client = APIClient()
+
+    def search(self, query):
+        return self.client.get('/api/courses/', {'q': query}).json()
+
+    def test_prefix_search_ranks_title_matches_first(self):
+        data = self.search('pyth')
+
+        ids = [c['id'] for c in data['results']]
+        self.assertEqual(ids[0], self.python.id)
+        self.assertEqual(set(ids), {self.python.id, self.cooking.id, self.art.id})
+        self.assertIn('<mark>', data['results'][0]['search_snippet'])
+
+    def test_explicit_ordering_overrides_rank(self):
+        response = self.client.get('/api/courses/', {'q': 'pyth', 'ordering': 'title'})
+
+        self.assertEqual([c['title'] for c in response.json()['results']], ['Art', 'Cooking', 'Python for beginners'])
+
+    def test_index_follows_course_and_teacher_changes(self):
+        self.art.is_active = False
+        self.art.save()
+        self.assertEqual(self.search('brushes')['count'], 0)
+
+        self.teacher.full_name = 'Grace Hopper'
+        self.teacher.save()
+        self.assertEqual(self.search('hopper')['count'], 2)
+
+        self.teacher.user.username = 'amazingteach'
+        self.teacher.user.save()
+        self.assertEqual(self.search('amazing')['count'], 2)
+
+    def test_rebuild_index(self):
+        self.assertEqual(search.rebuild_index(), 3)
+        self.assertEqual(self.search('drawing')['count'], 1)
+
+    def test_ranking_scans_the_index_once_for_many_hits(self):
+        Course.objects.bulk_create([
+            Course(title=f'Python {n}', description='d', teacher=self.teacher) for n in range(500)
+        ])
+        search.rebuild_index()
+
+        match = search.build_match_query('pyth')
+        queryset = search.filter_courses(Course.objects.filter(is_active=True), match).order_by('search_rank', 'id')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        # bm25 comes from the joined index row, not a subquery run per hit
+        self.assertFalse([step for step in plan if 'SUBQUERY' in step], plan)
+        self.assertEqual(len([step for step in plan if search.SEARCH_TABLE in step]), 1, plan)
+        self.assertEqual(self.search('pyth')['count'], 503)
+
+
+class CoursePlaylistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(title='P', description='d', teacher=make_teacher(), course_type='paid', price=5)
+        first = Topic.objects.create(course=self.course, title='t1', order=1)
+        second = Topic.objects.create(course=self.course, title='t2', order=2)
+        Topic.objects.create(course=self.course, title='t3', order=3)
+        self.videos = [
+            Video.objects.create(
+                course=self.course, topic=first if i < 3 else second, title=f'v{i}',
+                video_file='x.mp4', order=i, is_free_preview=(i == 0)
+            )
+            for i in range(4)
+        ]
+        Quiz.objects.create(course=self.course, video=self.videos[1], title='q')
+        Assignment.objects.create(course=self.course, video=self.videos[2], title='a', description='x')
+        self.url = f'/api/courses/{self.course.id}/videos/'
+        self.client = APIClient()
+
+    def test_playlist_groups_videos_by_topic(self):
+        data = self.client.get(self.url).json()
+
+        self.assertEqual([t['video_count'] for t in data['topics']], [3, 1, 0])
+        preview, quizzed, assigned = data['topics'][0]['videos']
+        self.assertTrue(preview['can_access'])
+        self.assertEqual((quizzed['has_quiz'], quizzed['has_assignment'], quizzed['can_access']), (True, False, False))
+        self.assertEqual((assigned['has_quiz'], assigned['has_assignment']), (False, True))
+
+    def test_query_count_does_not_grow_with_videos(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        baseline = len(ctx)
+        for i in range(10):
+            Video.objects.create(course=self.course, title=f'extra{i}', video_file='x.mp4', order=10 + i)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        self.assertLessEqual(len(ctx), baseline)
+
+    def test_etag_changes_when_content_changes(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.videos[3].title = 'renamed'
+        self.videos[3].save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['topics'][1]['videos'][0]['title'], 'renamed')
+
+
+class VideoStreamTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        course = Course.objects.create(title='P', description='d', teacher=make_teacher(), course_type='paid', price=5)
+        self.preview = Video.objects.create(course=course, title='preview', order=1, is_free_preview=True)
+        self.preview.video_file.save('a.mp4', ContentFile(bytes(range(256)) * 4))
+        self.locked = Video.objects.create(course=course, title='locked', order=2, video_file='x.mp4')
+        self.url = f'/api/courses/videos/{self.preview.id}/stream/'
+        self.client = APIClient()
+
+    def test_paid_video_requires_access(self):
+        response = self.client.get(f'/api/courses/videos/{self.locked.id}/stream/')
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_full_response(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(len(b''.join(response.streaming_content)), 1024)
+
+    def test_range_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=1000-')
+        self.assertEqual(response['Content-Range'], 'bytes 1000-1023/1024')
+
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-4')
+        self.assertEqual(response['Content-Range'], 'bytes 1020-1023/1024')
+
+    def test_unsatisfiable_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2000-')
+
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    @override_settings(VIDEO_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_accel_redirect_hands_off_to_proxy(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.preview.video_file.name)
+        self.assertEqual(response.content, b'')
+
+    @override_settings(VIDEO_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_accel_redirect_quotes_file_names(self):
+        # Imported files keep their names; only uploads are sanitised
+        default_storage.save('course_videos/intro café.mp4', ContentFile(b'video'))
+        self.preview.video_file = 'course_videos/intro café.mp4'
+        self.preview.save()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/course_videos/intro%20caf%C3%A9.mp4')
+
+    def test_missing_file_is_not_found(self):
+        os.remove(self.preview.video_file.path)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 404)
+
+
+class VideoTranscodingTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = Course.objects.create(title='T', description='d', teacher=make_teacher())
+        self.video = Video.objects.create(course=self.course, title='v', order=1)
+        self.video.video_file.save('a.mp4', ContentFile(b'video'))
+
+    def test_renditions_never_upscale(self):
+        self.assertEqual([r['name'] for r in transcoding.select_renditions(720)], ['360p', '720p'])
+        self.assertEqual([r['name'] for r in transcoding.select_renditions(240)], ['360p'])
+
+    def test_missing_ffmpeg_marks_video_failed(self):
+        with mock.patch.object(transcoding, 'is_available', return_value=False):
+            self.assertFalse(transcode_video(self.video.id))
+
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.processing_status, 'failed')
+        self.assertEqual(self.video.processing_error, 'ffmpeg is not installed')
+
+    def test_successful_transcode_publishes_manifest_and_duration(self):
+        info = {'duration': 125.4, 'height': 720, 'has_audio': True}
+        with mock.patch.object(transcoding, 'is_available', return_value=True), \
+                mock.patch.object(transcoding, 'probe', return_value=info), \
+                mock.patch.object(transcoding, 'transcode_to_hls') as transcode_to_hls, \
+                mock.patch.object(transcoding, 'extract_poster'):
+            self.assertTrue(transcode_video(self.video.id))
+
+        renditions = transcode_to_hls.call_args.args[2]
+        self.assertEqual([r['name'] for r in renditions], ['360p', '720p'])
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.processing_status, 'ready')
+        self.assertEqual(self.video.hls_manifest, f'hls/{self.video.id}/{transcoding.MASTER_PLAYLIST}')
+        self.assertEqual(self.video.duration_seconds, 125)
+        self.assertEqual(CourseStats.objects.get(course=self.course).total_duration_seconds, 125)
+
+    def test_probe_failure_marks_video_failed(self):
+        with mock.patch.object(transcoding, 'is_available', return_value=True), \
+                mock.patch.object(transcoding, 'probe', side_effect=transcoding.TranscodingError('No video stream found')):
+            self.assertFalse(transcode_video(self.video.id))
+
+        self.video.refresh_from_db()
+        self.assertEqual((self.video.processing_status, self.video.processing_error), ('failed', 'No video stream found'))
+
+    def test_only_new_files_are_queued(self):
+        with mock.patch.object(transcode_video, 'delay') as delay, self.captureOnCommitCallbacks(execute=True):
+            self.video.title = 'renamed'
+            self.video.save()
+            Video.objects.get(id=self.video.id).save()
+            self.video.video_file.save('b.mp4', ContentFile(b'other'))
+
+        delay.assert_called_once_with(video_id=self.video.id)
+        self.video.refresh_from_db()
+        self.assertEqual(self.video.processing_status, 'pending')
+
+
+class VideoHlsTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.course = Course.objects.create(title='P', description='d', teacher=make_teacher(), course_type='paid', price=5)
+        self.video = Video.objects.create(course=self.course, title='v', order=1, processing_status='ready')
+        self.video.hls_manifest = f'hls/{self.video.id}/{transcoding.MASTER_PLAYLIST}'
+        self.video.save()
+        hls_dir = os.path.join(self.media_root, 'hls', str(self.video.id))
+        os.makedirs(os.path.join(hls_dir, '720p'))
+        with open(os.path.join(hls_dir, transcoding.MASTER_PLAYLIST), 'w') as f:
+            f.write('#EXTM3U\n720p/index.m3u8\n')
+        with open(os.path.join(hls_dir, '720p', 'segment_0000.ts'), 'wb') as f:
+            f.write(b'x' * 100)
+        with open(os.path.join(self.media_root, 'secret.ts'), 'wb') as f:
+            f.write(b'secret')
+        self.url = video_playback(self.video, None)['url']
+        self.client = APIClient()
+
+    def authenticate_enrolled_student(self):
+        student = make_student()
+        user = User.objects.get(id=student.user_id)
+        Payment.objects.bulk_create([
+            Payment(user=user, course=self.course, gateway='jazzcash', txn_ref='hls', amount=5, is_successful=True)
+        ])
+        Enrollment.objects.create(student=student, course=self.course, payment_status='verified')
+        self.client.force_authenticate(user)
+
+    def test_playback_url_points_at_the_checked_view(self):
+        self.assertEqual(self.url, f'/api/courses/videos/{self.video.id}/hls/{transcoding.MASTER_PLAYLIST}')
+
+    def test_paid_renditions_require_access(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(f'/api/courses/videos/{self.video.id}/hls/720p/segment_0000.ts').status_code, 403)
+
+    def test_entitled_student_gets_playlists_and_segments(self):
+        self.authenticate_enrolled_student()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/vnd.apple.mpegurl')
+
+        response = self.client.get(f'/api/courses/videos/{self.video.id}/hls/720p/segment_0000.ts', HTTP_RANGE='bytes=0-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Type'], 'video/mp2t')
+
+    def test_names_outside_the_hls_directory_are_not_served(self):
+        self.authenticate_enrolled_student()
+
+        for name in ('../../secret.ts', '720p/%2E%2E/%2E%2E/%2E%2E/secret.ts', 'missing.ts'):
+            self.assertEqual(self.client.get(f'/api/courses/videos/{self.video.id}/hls/{name}').status_code, 404)
+
+    @override_settings(VIDEO_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_accel_redirect_uses_media_relative_name(self):
+        self.authenticate_enrolled_student()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.video.hls_manifest}')
+
+
+class VideoDurationTests(TestCase):
+    def test_parse_and_format(self):
+        self.assertEqual(parse_duration('10:30'), 630)
+        self.assertEqual(parse_duration('1:02:03'), 3723)
+        self.assertEqual(format_duration(3723), '1:02:03')
+        self.assertEqual(format_duration(90), '1:30')
+        with self.assertRaises(ValueError):
+            parse_duration('ab')
+
+    def test_serializer_field_accepts_strings_and_seconds(self):
+        field = VideoDurationField()
+
+        self.assertEqual(field.to_internal_value('4:30'), 270)
+        self.assertEqual(field.to_internal_value(270), 270)
+        self.assertEqual(field.to_representation(270), '4:30')
+
+    def test_topic_and_course_totals_are_summed_in_sql(self):
+        course = Course.objects.create(title='D', description='d', teacher=make_teacher())
+        for i in range(3):
+            topic = Topic.objects.create(course=course, title=f't{i}', order=i)
+            for _ in range(3):
+                Video.objects.create(course=course, topic=topic, title='v', video_file='x.mp4', duration_seconds=90)
+        self.assertEqual(CourseStats.objects.get(course=course).total_duration_seconds, 9 * 90)
+
+        client = APIClient()
+        with CaptureQueriesContext(connection) as ctx:
+            topics = client.get(f'/api/courses/{course.id}/topics/').json()['topics']
+        self.assertLessEqual(len(ctx), 3)
+        self.assertEqual((topics[0]['video_count'], topics[0]['total_duration']), (3, '4:30'))
+
+        Video.objects.filter(course=course).first().delete()
+        self.assertEqual(CourseStats.objects.get(course=course).total_duration_seconds, 8 * 90)
+        self.assertEqual(client.get(f'/api/courses/{course.id}/').json()['total_duration'], '12:00')
+
+
+class CourseRankingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = make_teacher()
+        self.courses = [Course.objects.create(title=f'R{i}', description='d', teacher=teacher) for i in range(6)]
+        # Course i gets 5 - i enrollments; only R0's are outside the trending window
+        now = timezone.now()
+        for n in range(5):
+            student = make_student(n)
+            for course in self.courses[:5 - n]:
+                enrolled_at = now - timedelta(days=10 if course == self.courses[0] else 1)
+                Enrollment.objects.create(student=student, course=course, enrolled_at=enrolled_at)
+        self.client = APIClient()
+
+    def titles(self, params):
+        return [c['title'] for c in self.client.get('/api/courses/', params).json()['results']]
+
+    def test_featured_orders_by_enrollments(self):
+        self.assertEqual(self.titles({'featured': 'true'}), ['R0', 'R1', 'R2', 'R3', 'R4', 'R5'])
+
+    def test_trending_counts_recent_enrollments_only(self):
+        self.assertEqual(self.titles({'ranking': 'trending'}), ['R1', 'R2', 'R3', 'R4'])
+
+    def test_refresh_replaces_rows(self):
+        rankings.refresh_rankings()
+        self.courses[0].is_active = False
+        self.courses[0].save()
+
+        rankings.refresh_rankings()
+
+        self.assertNotIn('R0', self.titles({'featured': 'true'}))
+
+    def test_enrollment_burst_queues_one_refresh(self):
+        rankings.refresh_rankings()
+        for _ in range(rankings.BURST_THRESHOLD - 1):
+            self.assertFalse(rankings.note_enrollment())
+        self.assertTrue(rankings.note_enrollment())
+        self.assertFalse(rankings.note_enrollment())
+
+        rankings.refresh_rankings()
+
+        self.assertFalse(rankings.note_enrollment())
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        teacher = make_teacher()
+        now = timezone.now()
+        # Pairs of courses share a created_at so the id tie-breaker is exercised
+        for i in range(25):
+            Course.objects.create(title=f'K{i}', description='d', teacher=teacher, created_at=now - timedelta(minutes=i // 2))
+        self.client = APIClient()
+
+    def test_cursor_pages_cover_every_course_once_without_counting(self):
+        seen, pages = [], 0
+        url = '/api/courses/?cursor='
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            self.assertFalse(any('COUNT(*)' in query['sql'] for query in ctx.captured_queries))
+            seen += [c['id'] for c in data['results']]
+            url = data['next']
+            pages += 1
+
+        self.assertEqual(pages, 2)
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+
+    def test_page_numbers_and_reordered_lists_keep_counts(self):
+        self.assertEqual(self.client.get('/api/courses/?page=2').json()['count'], 25)
+        self.assertIn('count', self.client.get('/api/courses/?cursor=&ordering=title').json())
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get('/api/courses/?cursor=garbage!').status_code, 404)
+
+    def test_catalog_page_size_is_fixed(self):
+        for url in ('/api/courses/?page_size=5', '/api/courses/?cursor=&page_size=5'):
+            self.assertEqual(len(self.client.get(url).json()['results']), 20)
+
+
+class ImageDerivativeTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.teacher = make_teacher()
+        self.client = APIClient()
+
+    def png(self, size):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'PNG')
+        return ContentFile(buffer.getvalue())
+
+    def course_with_thumbnail(self, content):
+        course = Course.objects.create(title='I', description='d', teacher=self.teacher)
+        course.thumbnail.save('thumb.png', content)
+        return course
+
+    def open_derivative(self, url):
+        return Image.open(os.path.join(self.media_root, url.split('/media/', 1)[1]))
+
+    def test_thumbnail_and_avatar_srcsets(self):
+        course = self.course_with_thumbnail(self.png((2000, 1500)))
+        self.teacher.profile_picture.save('face.png', self.png((600, 600)))
+
+        data = self.client.get(f'/api/courses/{course.id}/').json()
+
+        card = data['thumbnail_srcset']['card']
+        self.assertEqual((card['width'], card['height']), (640, 360))
+        self.assertIn('480w', card['srcset'])
+        self.assertEqual(data['thumbnail_srcset']['detail']['height'], 720)
+        with self.open_derivative(card['src']) as image:
+            self.assertEqual(image.size, (640, 360))
+        self.assertIn('128w', data['teacher']['profile_picture_srcset']['webp_srcset'])
+
+    def test_small_sources_are_not_upscaled(self):
+        course = self.course_with_thumbnail(self.png((200, 100)))
+
+        card = self.client.get(f'/api/courses/{course.id}/').json()['thumbnail_srcset']['card']
+
+        with self.open_derivative(card['src']) as image:
+            width, height = image.size
+        self.assertLessEqual(width, 200)
+        self.assertLessEqual(height, 100)
+
+    def test_unreadable_upload_has_no_derivatives(self):
+        course = self.course_with_thumbnail(ContentFile(b'not an image'))
+
+        data = self.client.get(f'/api/courses/{course.id}/').json()
+
+        self.assertIsNone(data['thumbnail_srcset']['card'])
+
+    def test_backfill_command(self):
+        course = self.course_with_thumbnail(self.png((1280, 720)))
+
+        call_command('generate_image_derivatives')
+
+        derivatives = os.path.join(self.media_root, 'derivatives')
+        self.assertTrue(os.path.isdir(derivatives) and os.listdir(derivatives))
+        self.assertIsNotNone(self.client.get(f'/api/courses/{course.id}/').json()['thumbnail_srcset']['card'])
+
+
+class EntitlementTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = make_teacher()
+        self.paid = Course.objects.create(title='P', description='d', teacher=teacher, course_type='paid', price=5)
+        self.free = Course.objects.create(title='F', description='d', teacher=teacher)
+        self.student = make_student()
+
+    def fresh_user(self):
+        # Each request loads the user row, and with it the entitlements version
+        return User.objects.get(id=self.student.user_id)
+
+    def test_free_courses_need_no_entitlement(self):
+        user = self.fresh_user()
+
+        self.assertTrue(self.free.has_user_paid(user))
+        self.assertFalse(self.paid.has_user_paid(user))
+
+    def test_entitlements_are_loaded_once_per_user(self):
+        self.paid.has_user_paid(self.fresh_user())
+
+        with CaptureQueriesContext(connection) as ctx:
+            user = self.fresh_user()
+            for _ in range(5):
+                self.paid.has_user_paid(user)
+        self.assertEqual(len(ctx), 1)
+
+    def test_verified_enrollment_grants_and_revokes_access(self):
+        enrollment = Enrollment.objects.create(student=self.student, course=self.paid, payment_status='verified')
+        self.assertTrue(self.paid.has_user_paid(self.fresh_user()))
+
+        enrollment.payment_status = 'pending'
+        enrollment.save()
+        self.assertFalse(self.paid.has_user_paid(self.fresh_user()))
+
+    def test_payment_invalidates_caches_in_other_processes(self):
+        self.assertFalse(self.paid.has_user_paid(self.fresh_user()))
+
+        # Another worker's local cache is never told about the payment; the
+        # bumped version in the user row is what makes it miss
+        with mock.patch('courses.entitlements.cache.delete'):
+            Payment.objects.create(
+                user=self.fresh_user(), course=self.paid, gateway='jazzcash',
+                txn_ref='txn-1', amount=5, is_successful=True
+            )
+        self.assertTrue(self.paid.has_user_paid(self.fresh_user()))
+
+        Payment.objects.filter(txn_ref='txn-1').delete()
+        self.assertFalse(self.paid.has_user_paid(self.fresh_user()))
+
+    def test_stale_user_saves_keep_the_version(self):
+        stale = self.fresh_user()
+        self.assertFalse(self.paid.has_user_paid(stale))
+        Enrollment.objects.create(student=self.student, course=self.paid, payment_status='verified')
+
+        stale.first_name = 'Renamed'
+        stale.save()
+
+        self.assertTrue(self.paid.has_user_paid(self.fresh_user()))
+        self.assertEqual(self.fresh_user().first_name, 'Renamed')
+
+    def test_change_is_seen_later_in_the_same_request(self):
+        user = self.fresh_user()
+        self.assertFalse(self.paid.has_user_paid(user))
+
+        Payment.objects.create(user=user, course=self.paid, gateway='jazzcash', txn_ref='txn-2', amount=5, is_successful=True)
+
+        self.assertTrue(self.paid.has_user_paid(user))
+
+
+class ContentImportTests(TemporaryMediaMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.teacher = make_teacher()
+        self.course = Course.objects.create(title='Import', description='d', teacher=self.teacher)
+        Topic.objects.create(course=self.course, title='existing', order=1)
+        self.video_name = default_storage.save('course_videos/a.mp4', ContentFile(b'x'))
+        self.url = f'/api/teacher/courses/{self.course.id}/import/'
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(id=self.teacher.user_id))
+
+    def manifest(self, topic_count):
+        question = {'question': 'q', 'options': ['a', 'b', 'c'], 'correct_answer': 2}
+        return {'topics': [
+            {
+                'title': f'T{i}',
+                'videos': [
+                    {
+                        'title': f'V{i}-{j}', 'video_file': self.video_name, 'duration': '1:30', 'order': j,
+                        'quizzes': [{'title': 'video quiz', 'questions': [question]}],
+                        'assignments': [{'title': 'homework', 'description': 'x'}],
+                    }
+                    for j in range(4)
+                ],
+                'quizzes': [{'title': f'Q{i}', 'questions': [question] * 3}],
+            }
+            for i in range(topic_count)
+        ]}
+
+    def test_import_creates_content_and_updates_counters(self):
+        response = self.client.post(self.url, self.manifest(5), format='json')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual((stats.total_topics, stats.total_videos, stats.total_quizzes), (6, 20, 25))
+        self.assertEqual(stats.total_duration_seconds, 20 * 90)
+        self.assertEqual(Question.objects.filter(quiz__course=self.course).count(), 20 + 15)
+        self.assertEqual(Assignment.objects.filter(course=self.course).count(), 20)
+
+    def test_query_count_does_not_grow_with_manifest_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(self.url, self.manifest(1), format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post(self.url, self.manifest(10), format='json')
+
+        self.assertEqual(len(large), len(small))
+
+    def test_dry_run_writes_nothing(self):
+        response = self.client.post(self.url + '?dry_run=true', self.manifest(2), format='json')
+
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(Topic.objects.filter(course=self.course).count(), 1)
+
+    def test_invalid_manifest_is_rejected_whole(self):
+        manifest = self.manifest(2)
+        manifest['topics'][1]['videos'][0]['video_file'] = 'course_videos/missing.mp4'
+
+        response = self.client.post(self.url, manifest, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Topic.objects.filter(course=self.course).count(), 1)
+
+    def test_video_paths_must_be_uploads_not_used_elsewhere(self):
+        other = Course.objects.create(title='Other', description='d', teacher=make_teacher(1))
+        taken = default_storage.save('course_videos/other.mp4', ContentFile(b'x'))
+        Video.objects.create(course=other, title='v', video_file=taken)
+
+        for path in ('../../etc/passwd', 'course_videos/../../x.mp4', 'thumbnails/a.jpg', taken):
+            data = {'topics': [{'title': 'T', 'videos': [{'title': 'v', 'video_file': path}]}]}
+            with self.assertRaises(importer.ManifestError):
+                importer.validate_manifest(self.course, data)
+
+    def test_csv_manifest(self):
+        rows = [
+            'type,title,description,order,video_file,duration,options,correct_answer',
+            'topic,CSV topic,,50,,,,',
+            f'video,CSV video,,1,{self.video_name},2:00,,',
+            'quiz,CSV quiz,,,,,,',
+            'question,What?,,,,,yes|no,0',
+        ]
+        upload = SimpleUploadedFile('manifest.csv', '\n'.join(rows).encode())
+
+        response = self.client.post(self.url, {'manifest': upload}, format='multipart')
+
+        self.assertEqual(response.status_code, 201, response.content)
+        question = Question.objects.get(question='What?')
+        self.assertEqual((question.quiz.topic.order, question.options), (50, ['yes', 'no']))
+
+
+class QuizGradingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        course = Course.objects.create(title='C', description='d', teacher=make_teacher())
+        self.quiz = Quiz.objects.create(course=course, title='Q', passing_score=60)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, question=f'q{i}', options=['a', 'b', 'c'], correct_answer=i % 3)
+            for i in range(5)
+        ]
+        self.student = make_student()
+        Enrollment.objects.create(student=self.student, course=course)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(id=self.student.user_id))
+
+    def answers(self, correct):
+        # The first `correct` questions right, the rest wrong
+        return {
+            str(q.id): q.correct_answer if i < correct else (q.correct_answer + 1) % 3
+            for i, q in enumerate(self.questions)
+        }
+
+    def test_failed_attempt_records_no_progress(self):
+        response = self.client.post(f'/api/students/quizzes/{self.quiz.id}/submit/', {'answers': self.answers(2)}, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual((response.data['data']['score'], response.data['data']['passed']), (40, False))
+        self.assertFalse(Progress.objects.filter(quiz=self.quiz).exists())
+        self.assertEqual(self.client.post(f'/api/students/quizzes/{self.quiz.id}/complete/').status_code, 400)
+
+    def test_passing_attempt_completes_the_quiz(self):
+        response = self.client.post(f'/api/students/quizzes/{self.quiz.id}/submit/', {'answers': self.answers(3)}, format='json')
+
+        self.assertTrue(response.data['data']['passed'])
+        self.assertEqual(Progress.objects.filter(quiz=self.quiz, student=self.student).count(), 1)
+        self.assertEqual(self.client.post(f'/api/students/quizzes/{self.quiz.id}/complete/').status_code, 200)
+
+    def test_batched_submissions(self):
+        answers = self.answers(5)
+        answers['999999'] = 1
+
+        response = self.client.post(
+            '/api/students/quizzes/submit/',
+            [{'quiz': self.quiz.id, 'answers': answers}, {'quiz': self.quiz.id, 'answers': self.answers(0)}],
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([a['score'] for a in response.data['data']], [100, 0])
+        self.assertEqual(QuizAttempt.objects.filter(student=self.student).count(), 2)
+        self.assertEqual(Progress.objects.filter(quiz=self.quiz).count(), 1)
+
+    def test_score_is_not_rounded_up_to_a_pass(self):
+        key = {'question_ids': [1, 2, 3], 'correct': [0, 0, 0], 'options': [3, 3, 3], 'passing_score': 67, 'version': 1}
+
+        result = grading.grade(key, {1: 0, 2: 0, 3: 1})
+
+        self.assertEqual((result['score'], result['passed']), (67, False))
+
+    def test_answer_key_is_cached_until_a_question_changes(self):
+        grading.get_answer_key(self.quiz)
+        with CaptureQueriesContext(connection) as ctx:
+            grading.get_answer_key(self.quiz)
+        self.assertFalse(any('courses_question' in q['sql'] for q in ctx.captured_queries))
+
+        question = self.questions[0]
+        question.correct_answer = 2
+        question.save()
+
+        quiz = Quiz.objects.get(id=self.quiz.id)
+        attempt = grading.submit_attempt(self.student, quiz, {str(question.id): 2})
+        self.assertEqual(attempt.correct_count, 1)
+
+
+class QuizAnalyticsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = make_teacher()
+        course = Course.objects.create(title='C', description='d', teacher=self.teacher)
+        self.quiz = Quiz.objects.create(course=course, title='Q', passing_score=50)
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, question=f'q{i}', options=['a', 'b', 'c'], correct_answer=0)
+            for i in range(4)
+        ]
+        # Student k answers the first k questions right; their retakes are all
+        # right but only first attempts count
+        for k in range(4):
+            student = make_student(k)
+            grading.submit_attempt(student, self.quiz, {str(q.id): 0 if j < k else 1 for j, q in enumerate(self.questions)})
+            grading.submit_attempt(student, self.quiz, {str(q.id): 0 for q in self.questions})
+
+    def test_item_statistics(self):
+        refresh_quiz_analytics()
+
+        analytics = QuizAnalytics.objects.get(quiz=self.quiz)
+        self.assertEqual((analytics.attempt_count, analytics.student_count), (8, 4))
+        self.assertEqual((analytics.mean_score, analytics.median_score, analytics.pass_rate), (37.5, 37.5, 0.5))
+        self.assertEqual(analytics.score_histogram, [1, 0, 1, 0, 0, 1, 0, 1, 0, 0])
+        stats = [analytics.question_stats[str(q.id)] for q in self.questions]
+        self.assertEqual([s['difficulty'] for s in stats], [0.75, 0.5, 0.25, 0.0])
+        self.assertEqual([s['discrimination'] for s in stats], [1.0, 1.0, 1.0, 0.0])
+        self.assertEqual(stats[3]['option_counts'], [0, 4, 0])
+
+    def test_only_quizzes_with_new_attempts_are_refreshed(self):
+        self.assertEqual(refresh_quiz_analytics(), 1)
+        self.assertEqual(refresh_quiz_analytics(), 0)
+
+        grading.submit_attempt(make_student(10), self.quiz, {})
+
+        self.assertEqual(refresh_quiz_analytics(), 1)
+
+    def test_teacher_quiz_detail_includes_analytics(self):
+        refresh_quiz_analytics()
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=self.teacher.user_id))
+
+        response = client.get(f'/api/teacher/quizzes/{self.quiz.id}/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['analytics']['student_count'], 4)
+
+
+class EnrollmentProgressTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(title='C', description='d', teacher=make_teacher())
+        self.videos = [Video.objects.create(course=self.course, title='v', video_file='x.mp4') for _ in range(3)]
+        self.quiz = Quiz.objects.create(course=self.course, title='Q')
+        self.student = make_student()
+        Enrollment.objects.create(student=self.student, course=self.course)
+
+    def rollup(self):
+        return EnrollmentProgress.objects.get(enrollment__course=self.course, enrollment__student=self.student)
+
+    def test_rollup_follows_completions(self):
+        self.assertEqual((self.rollup().total_items, self.rollup().completed_items), (4, 0))
+
+        Progress.objects.create(student=self.student, course=self.course, video=self.videos[0])
+        grading.submit_attempt(self.student, self.quiz, {})
+
+        rollup = self.rollup()
+        self.assertEqual((rollup.completed_items, rollup.completed_quizzes, rollup.percentage), (2, 1, 50.0))
+
+    def test_rollup_follows_content_changes(self):
+        Progress.objects.create(student=self.student, course=self.course, video=self.videos[0])
+
+        self.videos[1].delete()
+        self.assertEqual((self.rollup().total_items, self.rollup().completed_items), (3, 1))
+
+        # Deleting completed content takes its completion with it
+        self.videos[0].delete()
+        rollup = self.rollup()
+        self.assertEqual((rollup.total_items, rollup.completed_items, rollup.percentage), (2, 0, 0.0))
+
+    def test_course_delete_does_not_recount_per_item(self):
+        other = Course.objects.create(title='D', description='d', teacher=self.course.teacher)
+        Video.objects.create(course=other, title='v', video_file='x.mp4')
+
+        with mock.patch.object(EnrollmentProgress, 'refresh_totals') as refresh_totals:
+            self.course.delete()
+            Course.objects.filter(id=other.id).delete()
+
+        refresh_totals.assert_not_called()
+        self.assertFalse(EnrollmentProgress.objects.exists())
+
+    def test_rebuild_command(self):
+        Progress.objects.create(student=self.student, course=self.course, video=self.videos[0])
+        EnrollmentProgress.objects.all().delete()
+
+        call_command('rebuild_enrollment_progress')
+
+        self.assertEqual(self.rollup().percentage, 25.0)
+
+    def test_backfill_migration(self):
+        migration = importlib.import_module('courses.migrations.0015_backfill_enrollment_progress')
+        Progress.objects.create(student=self.student, course=self.course, video=self.videos[0])
+        EnrollmentProgress.objects.all().delete()
+
+        migration.backfill_enrollment_progress(apps, None)
+
+        rollup = self.rollup()
+        self.assertEqual((rollup.completed_videos, rollup.total_items, rollup.percentage), (1, 4, 25.0))
+
+    def test_enrolled_courses_read_the_rollup(self):
+        Progress.objects.create(student=self.student, course=self.course, video=self.videos[0])
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=self.student.user_id))
+
+        response = client.get('/api/students/courses/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['courses'][0]['progress_percentage'], 25.0)
+
+
+class WatchPositionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(watch.flush_local)
+        course = Course.objects.create(title='C', description='d', teacher=make_teacher())
+        topic = Topic.objects.create(course=course, title='t', order=1)
+        self.course = course
+        self.video = Video.objects.create(course=course, topic=topic, title='v', video_file='x.mp4', duration_seconds=100)
+        self.students = [make_student(i) for i in range(3)]
+        self.clients = []
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=course)
+            client = APIClient()
+            client.force_authenticate(User.objects.get(id=student.user_id))
+            self.clients.append(client)
+
+    def heartbeat(self, client, position, video=None, **extra):
+        video = video or self.video
+        return client.post(
+            f'/api/students/videos/{video.id}/position/', {'position_seconds': position, **extra}, format='json'
+        )
+
+    def position(self, student, video=None):
+        return VideoWatchPosition.objects.get(student=student, video=video or self.video).position_seconds
+
+    def test_shared_cache_buffers_until_the_window_closes(self):
+        now = [time.time()]
+        with mock.patch('courses.watch.time.time', lambda: now[0]), \
+                mock.patch('courses.watch.is_buffered', return_value=True):
+            for client in self.clients:
+                self.assertEqual(self.heartbeat(client, 10).status_code, 202)
+            # Only a viewer's first heartbeat touches the database
+            with CaptureQueriesContext(connection) as ctx:
+                for position in range(20, 100, 10):
+                    for client in self.clients:
+                        self.heartbeat(client, position)
+            self.assertEqual(len(ctx), 0)
+            self.assertFalse(VideoWatchPosition.objects.exists())
+
+            now[0] += watch.FLUSH_SECONDS * 2
+            self.assertEqual(watch.flush(), 3)
+
+        self.assertEqual([self.position(student) for student in self.students], [90, 90, 90])
+        # 90 of 100 seconds counts as watched
+        self.assertEqual(Progress.objects.filter(video=self.video).count(), 3)
+
+    def test_process_local_buffer_flushes_by_size_and_interval(self):
+        self.assertFalse(watch.is_buffered())
+
+        for position in (10, 20, 40):
+            self.heartbeat(self.clients[0], position)
+        self.assertFalse(VideoWatchPosition.objects.exists())
+        self.assertEqual(watch.flush_local(), 1)
+        self.assertEqual(self.position(self.students[0]), 40)
+
+        with mock.patch('courses.watch.LOCAL_FLUSH_SIZE', 2):
+            self.heartbeat(self.clients[0], 50)
+            self.assertEqual(self.position(self.students[0]), 40)
+            self.heartbeat(self.clients[1], 5)
+            self.assertEqual((self.position(self.students[0]), self.position(self.students[1])), (50, 5))
+
+        later = time.time() + watch.FLUSH_SECONDS
+        with mock.patch('courses.watch.time.time', lambda: later):
+            self.heartbeat(self.clients[2], 95)
+        self.assertEqual(self.position(self.students[2]), 95)
+        self.assertEqual(Progress.objects.filter(video=self.video).count(), 1)
+
+    def test_player_duration_never_completes_a_video(self):
+        untranscoded = Video.objects.create(course=self.course, title='raw', video_file='x.mp4', duration_seconds=0)
+
+        self.heartbeat(self.clients[0], 500, video=untranscoded, duration_seconds=60)
+        self.heartbeat(self.clients[1], 1, video=untranscoded, duration_seconds=1)
+        watch.flush_local()
+
+        # The player's duration bounds the position but proves nothing
+        self.assertEqual(self.position(self.students[0], untranscoded), 60)
+        self.assertFalse(Progress.objects.filter(video=untranscoded).exists())
+
+        # Once transcoding stores the real duration, later flushes judge by it
+        Video.objects.filter(id=untranscoded.id).update(duration_seconds=60)
+        self.heartbeat(self.clients[0], 58, video=untranscoded)
+        self.heartbeat(self.clients[1], 1, video=untranscoded)
+        watch.flush_local()
+
+        self.assertEqual(list(Progress.objects.filter(video=untranscoded).values_list('student', flat=True)), [self.students[0].id])
+
+    def test_playlist_resumes_from_buffered_position(self):
+        self.heartbeat(self.clients[0], 30)
+
+        response = self.clients[0].get(f'/api/courses/{self.course.id}/videos/')
+
+        self.assertEqual(response.data['topics'][0]['videos'][0]['resume_at'], 30)
+
+    def test_students_outside_the_course_are_rejected(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=make_student(99).user_id))
+
+        self.assertEqual(self.heartbeat(client, 1).status_code, 400)
+
+
+class CourseFunnelTests(TestCase):
+    def setUp(self):
+        self.teacher = make_teacher()
+        self.course = Course.objects.create(title='F', description='d', teacher=self.teacher)
+        # Created out of order on purpose; steps follow topic and video order
+        second = Topic.objects.create(course=self.course, title='two', order=2)
+        first = Topic.objects.create(course=self.course, title='one', order=1)
+        video_2 = Video.objects.create(course=self.course, topic=second, title='v2', video_file='x.mp4', order=1)
+        video_1 = Video.objects.create(course=self.course, topic=first, title='v1', video_file='x.mp4', order=1)
+        quiz_1 = Quiz.objects.create(course=self.course, topic=first, video=video_1, title='q1')
+        assignment_2 = Assignment.objects.create(course=self.course, topic=second, title='a2', description='d')
+        self.items = [('video', video_1), ('quiz', quiz_1), ('video', video_2), ('assignment', assignment_2)]
+
+        # Student k completes the first 4 - k steps, one hour apart
+        enrolled_at = timezone.now() - timedelta(days=10)
+        for k in range(4):
+            student = make_student(k)
+            Enrollment.objects.create(student=student, course=self.course, enrolled_at=enrolled_at)
+            for n, (kind, item) in enumerate(self.items[:4 - k]):
+                Progress.objects.create(
+                    student=student, course=self.course,
+                    completed_at=enrolled_at + timedelta(hours=n + 1), **{kind: item}
+                )
+
+    def test_steps_follow_course_order(self):
+        self.assertEqual([title for _, _, title in analytics.course_steps(self.course)], ['v1', 'q1', 'v2', 'a2'])
+
+    def test_funnel_counts_and_timings(self):
+        self.assertEqual(refresh_course_funnels(), 1)
+
+        funnel = CourseFunnel.objects.get(course=self.course)
+        self.assertEqual((funnel.enrolled_count, funnel.finished_count), (4, 1))
+        self.assertEqual([step['completed'] for step in funnel.steps], [4, 3, 2, 1])
+        self.assertEqual([step['drop_off'] for step in funnel.steps], [None, 0.25, 0.25, 0.25])
+        self.assertEqual([step['median_seconds_from_previous'] for step in funnel.steps], [3600.0] * 4)
+        self.assertEqual(funnel.median_seconds_to_finish, 4 * 3600.0)
+
+    def test_teacher_course_detail_includes_funnel(self):
+        refresh_course_funnels()
+        client = APIClient()
+        client.force_authenticate(User.objects.get(id=self.teacher.user_id))
+
+        response = client.get(f'/api/teacher/courses/{self.course.id}/')
+
+        self.assertEqual(response.json()['data']['funnel']['enrolled_count'], 4)
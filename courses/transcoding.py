@@ -0,0 +1,139 @@
+# courses/transcoding.py
+
+"""
+ffmpeg helpers for turning an uploaded lecture into adaptive-bitrate HLS.
+
+Everything here shells out to the local ffmpeg/ffprobe binaries
+(FFMPEG_BINARY / FFPROBE_BINARY settings) and is meant to run inside the
+`courses.tasks.transcode_video` worker task, never in a request.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+
+from django.conf import settings
+
+DEFAULT_RENDITIONS = [
+    {'name': '360p', 'height': 360, 'video_bitrate': '800k', 'audio_bitrate': '96k'},
+    {'name': '720p', 'height': 720, 'video_bitrate': '2800k', 'audio_bitrate': '128k'},
+    {'name': '1080p', 'height': 1080, 'video_bitrate': '5000k', 'audio_bitrate': '192k'},
+]
+
+HLS_SEGMENT_SECONDS = 6
+MASTER_PLAYLIST = 'master.m3u8'
+
+
+class TranscodingError(Exception):
+    pass
+
+
+def ffmpeg_binary():
+    return getattr(settings, 'FFMPEG_BINARY', 'ffmpeg')
+
+
+def ffprobe_binary():
+    return getattr(settings, 'FFPROBE_BINARY', 'ffprobe')
+
+
+def is_available():
+    return bool(shutil.which(ffmpeg_binary()) and shutil.which(ffprobe_binary()))
+
+
+def _run(command):
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise TranscodingError(result.stderr.strip()[-2000:] or f'{command[0]} failed')
+    return result.stdout
+
+
+def probe(path):
+    """
+    Return duration (seconds), video height and whether the file has audio
+    """
+    output = _run([
+        ffprobe_binary(), '-v', 'error', '-print_format', 'json',
+        '-show_format', '-show_streams', path
+    ])
+    info = json.loads(output)
+    streams = info.get('streams', [])
+    video_streams = [stream for stream in streams if stream.get('codec_type') == 'video']
+    if not video_streams:
+        raise TranscodingError('No video stream found')
+
+    return {
+        'duration': float(info.get('format', {}).get('duration') or 0),
+        'height': int(video_streams[0].get('height') or 0),
+        'has_audio': any(stream.get('codec_type') == 'audio' for stream in streams),
+    }
+
+
+def select_renditions(source_height):
+    """
+    Renditions that do not upscale the source; always keeps the smallest one
+    """
+    renditions = sorted(
+        getattr(settings, 'VIDEO_HLS_RENDITIONS', DEFAULT_RENDITIONS),
+        key=lambda rendition: rendition['height']
+    )
+    selected = [rendition for rendition in renditions if rendition['height'] <= source_height]
+    return selected or renditions[:1]
+
+
+def transcode_to_hls(source, output_dir, renditions, has_audio):
+    """
+    Encode every rendition in a single ffmpeg pass and write a master playlist.
+    Returns the master playlist path.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    split = f"[0:v]split={len(renditions)}" + ''.join(f'[v{i}]' for i in range(len(renditions)))
+    scales = [
+        f"[v{i}]scale=-2:{rendition['height']}[v{i}out]"
+        for i, rendition in enumerate(renditions)
+    ]
+    command = [
+        ffmpeg_binary(), '-y', '-v', 'error', '-i', source,
+        '-filter_complex', ';'.join([split] + scales),
+    ]
+
+    stream_map = []
+    for i, rendition in enumerate(renditions):
+        command += [
+            '-map', f'[v{i}out]',
+            f'-c:v:{i}', 'libx264', '-preset', 'veryfast',
+            f'-b:v:{i}', rendition['video_bitrate'],
+            f'-maxrate:v:{i}', rendition['video_bitrate'],
+            f'-bufsize:v:{i}', rendition['video_bitrate'],
+        ]
+        if has_audio:
+            command += ['-map', 'a:0', f'-c:a:{i}', 'aac', f'-b:a:{i}', rendition['audio_bitrate']]
+            stream_map.append(f"v:{i},a:{i},name:{rendition['name']}")
+        else:
+            stream_map.append(f"v:{i},name:{rendition['name']}")
+
+    command += [
+        '-g', str(HLS_SEGMENT_SECONDS * 30), '-sc_threshold', '0',
+        '-f', 'hls',
+        '-hls_time', str(HLS_SEGMENT_SECONDS),
+        '-hls_playlist_type', 'vod',
+        '-hls_segment_filename', os.path.join(output_dir, '%v', 'segment_%04d.ts'),
+        '-master_pl_name', MASTER_PLAYLIST,
+        '-var_stream_map', ' '.join(stream_map),
+        os.path.join(output_dir, '%v', 'index.m3u8'),
+    ]
+    _run(command)
+    return os.path.join(output_dir, MASTER_PLAYLIST)
+
+
+def extract_poster(source, destination, at_seconds):
+    """
+    Grab a single JPEG frame to use as the video poster
+    """
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    _run([
+        ffmpeg_binary(), '-y', '-v', 'error', '-ss', f'{at_seconds:.2f}', '-i', source,
+        '-frames:v', '1', '-q:v', '3', destination
+    ])
+    return destination
@@ -18,6 +18,8 @@ urlpatterns = [
     path('videos/<int:video_id>/', views.video_detail, name='video_detail'),
     path('videos/<int:video_id>/deatil/', views.video_detail_with_topic, name='video_topics_detail'),
     path('videos/<int:video_id>/quiz-assignments/', views.video_quiz_assignments, name='video_quiz_assignments'),
+    path('videos/<int:video_id>/stream/', views.stream_video, name='stream_video'),
+    path('videos/<int:video_id>/hls/<path:name>', views.video_hls, name='video_hls'),
 # for teacher
      path('teachers/', views.list_all_teachers, name='list-all-teachers'),
      path('teachers/<int:teacher_id>/', views.view_teacher_profile, name='view-teacher-profile')
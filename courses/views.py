@@ -1,29 +1,34 @@
 # courses/views.py
 
+import os
+
+from django.conf import settings
 from rest_framework import status, filters
 from rest_framework.decorators import api_view,permission_classes
 from rest_framework.response import Response
 from rest_framework.generics import ListAPIView
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import Q, Case, When, Value, IntegerField
 from rest_framework.permissions import   AllowAny
-from django.db.models import Count
 from django.shortcuts import get_object_or_404
+from django.utils.http import parse_etags
 from support_feedback.models import CourseFeedback
 from django.db.models import Prefetch
-from .models import Course, Video, Quiz, Assignment,Enrollment,Topic
+from .models import Course, CourseRanking, Video, Quiz, Assignment,Enrollment,Topic
 from meetings.models import Meeting
+from . import search, playlist, rankings, streaming, watch
 from .serializers import (
     CourseListSerializer, CourseDetailSerializer, VideoDetailSerializer,
     QuizSerializer, AssignmentSerializer,TeacherSerializer,CourseWithTopicsSerializer,TopicDetailSerializer,TopicSerializer,
-    VideoWithTopicSerializer,VideoSerializer
+    VideoWithTopicSerializer,VideoSerializer, course_detail_prefetches
 )
 from authentication.models import TeacherProfile,User
+from lms.pagination import KeysetPagination
 
 
 class CourseListView(ListAPIView):
     """
-    Course listing with filtering, search, ordering, and featured option
+    Course listing with filtering, search, ordering, and featured/ranking options
     """
     serializer_class = CourseDetailSerializer
     permission_classes = [AllowAny]
@@ -32,19 +37,25 @@ class CourseListView(ListAPIView):
     search_fields = ['title', 'description', 'teacher__user__username']
     ordering_fields = ['created_at', 'title', 'price']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    search_match = None
+    search_snippets = None
+    ranked = False
+    # How many courses the homepage shows for ?featured=true
+    FEATURED_LIMIT = 6
     
     def get_queryset(self):
-        queryset = Course.objects.filter(is_active=True).select_related('teacher__user').prefetch_related('topics')
+        # Counters come from CourseStats and nested rows from prefetches, so a
+        # page costs the same number of queries however many courses it holds
+        select_lookups, prefetch_lookups = course_detail_prefetches()
+        queryset = Course.objects.filter(is_active=True).select_related(
+            *select_lookups
+        ).prefetch_related(*prefetch_lookups)
         
         # 🔍 Search by ?q=
         query = self.request.query_params.get('q')
         if query:
-            queryset = queryset.filter(
-                Q(title__icontains=query) |
-                Q(description__icontains=query) |
-                Q(teacher__user__username__icontains=query) |
-                Q(topics__title__incontains=query)
-            )
+            queryset = self.search_queryset(queryset, query)
 
         # 🎯 Filter by price
         min_price = self.request.query_params.get('min_price')
@@ -54,15 +65,72 @@ class CourseListView(ListAPIView):
         if max_price:
             queryset = queryset.filter(price__lte=max_price)
 
-        # 🌟 Featured courses (most enrolled)
-        is_featured = self.request.query_params.get('featured')
-        if is_featured == 'true':
-            queryset = queryset.annotate(
-                enrollment_count=Count('enrollments')
-            ).order_by('-enrollment_count')[:6]
+        # 🌟 Featured / trending / newest courses, precomputed in CourseRanking
+        mode = self.request.query_params.get('ranking')
+        limit = None
+        if self.request.query_params.get('featured') == 'true':
+            mode, limit = 'featured', self.FEATURED_LIMIT
+        if mode in dict(CourseRanking.MODES):
+            queryset = self.ranking_queryset(queryset, mode, limit)
+
+        return queryset
+
+    def ranking_queryset(self, queryset, mode, limit=None):
+        """
+        Restrict the catalog to a precomputed ranking, keeping its order
+        """
+        course_ids = rankings.ranked_course_ids(mode, limit)
+        if not course_ids:
+            return queryset.none()
+
+        self.ranked = True
+        return queryset.filter(id__in=course_ids).annotate(
+            ranking_position=Case(
+                *[When(id=course_id, then=Value(position)) for position, course_id in enumerate(course_ids)],
+                output_field=IntegerField()
+            )
+        )
 
+    def search_queryset(self, queryset, query):
+        """
+        Narrow the catalog to courses matching ?q=, ranked by relevance
+        """
+        if not search.is_supported():
+            return queryset.filter(
+                Q(title__icontains=query) |
+                Q(description__icontains=query) |
+                Q(teacher__user__username__icontains=query) |
+                Q(topics__title__icontains=query)
+            ).distinct()
+
+        self.search_match = search.build_match_query(query)
+        if self.search_match is None:
+            return queryset.none()
+        return search.filter_courses(queryset, self.search_match)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # Keep relevance order for searches unless the client asked for another one
+        if 'ordering' not in self.request.query_params:
+            if self.ranked:
+                queryset = queryset.order_by('ranking_position')
+            elif self.search_match:
+                queryset = queryset.order_by('search_rank', 'id')
         return queryset
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if self.search_match:
+            # Snippets only for the courses being served
+            courses = page if page is not None else queryset
+            self.search_snippets = search.course_snippets(self.search_match, [course.id for course in courses])
+        return page
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['search_snippets'] = self.search_snippets or {}
+        return context
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -71,12 +139,10 @@ def course_detail(request, course_id):
     Get detailed information about a specific course
     """
     try:
-        course = Course.objects.select_related('teacher__user').prefetch_related(
-            'topics__videos__quizzes',
-            'topics__videos__assignments',
-            'topics__quizzes',
-            'topics__assignments',
-            'reviews'  ).get(id=course_id, is_active=True)
+        select_lookups, prefetch_lookups = course_detail_prefetches()
+        course = Course.objects.select_related(*select_lookups).prefetch_related(
+            *prefetch_lookups
+        ).get(id=course_id, is_active=True)
         
         serializer = CourseDetailSerializer(course,context = {'request': request})
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -99,7 +165,9 @@ def course_topics(request, course_id):
     """
     try:
         course = Course.objects.get(id=course_id, is_active=True)
-        topics = Topic.objects.filter(course=course, is_active=True).prefetch_related('videos').order_by('order')
+        topics = Topic.with_totals(
+            Topic.objects.filter(course=course, is_active=True)
+        ).order_by('order')
         
         serializer = TopicSerializer(topics, many=True)
         return Response({
@@ -301,6 +369,84 @@ def video_detail(request, video_id):
         )
 
 
+def _video_access_error(request, video):
+    """
+    403 response when the user may not watch the video, otherwise None.
+    Same rules as the course playlist: paid content or a free preview.
+    """
+    user_has_access = True
+    if hasattr(request, 'user') and request.user.is_authenticated:
+        user_has_access = video.course.has_user_paid(request.user)
+    elif video.course.course_type == 'paid':
+        user_has_access = False
+
+    if not user_has_access and not video.is_free_preview:
+        return Response(
+            {'error': 'Access denied. Purchase the course to watch this video.'}, 
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return None
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def stream_video(request, video_id):
+    """
+    Stream a video file with HTTP Range support (206 partial content)
+    """
+    try:
+        video = Video.objects.select_related('course').get(id=video_id, course__is_active=True)
+    except Video.DoesNotExist:
+        return Response(
+            {'error': 'Video not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    denied = _video_access_error(request, video)
+    if denied is not None:
+        return denied
+
+    # The row can outlive its file, e.g. after storage was cleaned up by hand
+    if not video.video_file or not os.path.isfile(video.video_file.path):
+        return Response(
+            {'error': 'Video file not available'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    return streaming.serve_file(request, video.video_file)
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def video_hls(request, video_id, name):
+    """
+    Serve the HLS playlists and segments of a transcoded video behind the
+    same access check as stream_video. Playlists reference their variants
+    and segments by relative path, so players stay under this URL.
+    """
+    try:
+        video = Video.objects.select_related('course').get(id=video_id, course__is_active=True)
+    except Video.DoesNotExist:
+        return Response(
+            {'error': 'Video not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    denied = _video_access_error(request, video)
+    if denied is not None:
+        return denied
+
+    relative_name = streaming.hls_file_name(video, name)
+    path = relative_name and os.path.join(settings.MEDIA_ROOT, relative_name)
+    if not path or not os.path.isfile(path):
+        return Response(
+            {'error': 'File not found'}, 
+            status=status.HTTP_404_NOT_FOUND
+        )
+
+    return streaming.serve_media(request, relative_name, path)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def course_videos(request, course_id):
@@ -308,53 +454,25 @@ def course_videos(request, course_id):
     Get all videos for a specific course (for sidebar playlist)
     """
     try:
-        course = Course.objects.get(id=course_id, is_active=True)
+        course = Course.objects.select_related('stats').get(id=course_id, is_active=True)
         user_has_access = True
         if hasattr(request, 'user') and request.user.is_authenticated:
             user_has_access = course.has_user_paid(request.user)
         elif course.course_type == 'paid':
             user_has_access = False
 
-        topics = Topic.objects.filter(course=course, is_active=True).prefetch_related('videos').order_by('order')
+        topics = playlist.get_playlist(course)
+        resume_positions = None
+        if request.user.is_authenticated and request.user.role == 'student':
+            resume_positions = watch.resume_positions(request.user, playlist.playlist_video_ids(topics))
 
-        videos = Video.objects.filter(course=course).order_by('order')
-        
-        # Add progress information for each video (you can expand this later)
-        topics_data = []
-        for topic in topics:
-            videos_data = []
-            for video in topic.videos.order_by('order'):
-                if user_has_access or video.is_free_preview:
-                    video_info = {
-                        'id': video.id,
-                        'title': video.title,
-                        'duration': video.duration,
-                        'order': video.order,
-                        'has_quiz': video.quizzes.exists(),
-                        'has_assignment': video.assignments.exists(),
-                        'is_free_preview': video.is_free_preview,
-                        'can_access': True
-                    }
-                else:
-                    video_info = {
-                        'id': video.id,
-                        'title': video.title,
-                        'duration': video.duration,
-                        'order': video.order,
-                        'has_quiz': video.quizzes.exists(),
-                        'has_assignment': video.assignments.exists(),
-                        'is_free_preview': False,
-                        'can_access': False
-                    }
-                videos_data.append(video_info)
-            
-            topics_data.append({
-                'id': topic.id,
-                'title': topic.title,
-                'order': topic.order,
-                'video_count': len(videos_data),
-                'videos': videos_data
-            })
+        # The tree only changes with the course content version, so clients
+        # holding the current ETag get an empty 304
+        etag = playlist.playlist_etag(course, user_has_access, resume_positions)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        topics_data = playlist.apply_access(topics, user_has_access, resume_positions)
         
         return Response({
             'course_id': course_id,
@@ -363,7 +481,7 @@ def course_videos(request, course_id):
             'user_has_access': user_has_access,
             'total_topics': len(topics_data),
             'topics': topics_data
-        }, status=status.HTTP_200_OK)
+        }, status=status.HTTP_200_OK, headers={'ETag': etag})
         
     except Course.DoesNotExist:
         return Response(
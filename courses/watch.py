@@ -0,0 +1,283 @@
+# courses/watch.py
+
+"""
+Playback positions with write-behind buffering.
+
+Player heartbeats only touch the cache: the latest position of each
+(user, video) pair is kept under its own key, and the first heartbeat of a
+pair in every FLUSH_SECONDS window also appends the pair to that window's
+dirty list (an `incr`-allocated slot per entry, so concurrent writers never
+overwrite each other). Closed windows are flushed by `flush()`, which
+upserts all their positions into VideoWatchPosition with one bulk query
+and marks videos watched past COMPLETION_THRESHOLD as completed. However
+many viewers are watching, the database sees one write batch per window.
+
+Completion is judged against the duration stored on the video at flush
+time. The player's reported duration only bounds the stored position of
+videos that have none yet; it never completes anything, since a client
+could claim any length.
+
+The enrollment check and the video lookup happen on the first heartbeat of
+a pair only; their results ride along in the buffered entry.
+
+The dirty lists need a cache shared by every web and worker process. With
+a process-local cache (LocMemCache, the default when REDIS_URL is not set)
+the Celery flush would never see the web processes' heartbeats, so each
+process buffers its own positions in memory instead and writes them with
+the same bulk upsert once LOCAL_FLUSH_SIZE pairs are waiting or
+FLUSH_SECONDS have passed since its last write, and again at exit.
+"""
+
+import atexit
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from authentication.models import StudentProfile
+from .models import Enrollment, Video, VideoWatchPosition
+from . import progress
+
+FLUSH_SECONDS = getattr(settings, 'WATCH_POSITION_FLUSH_SECONDS', 30)
+COMPLETION_THRESHOLD = getattr(settings, 'WATCH_COMPLETION_THRESHOLD', 0.9)
+# Buffered positions double as the resume source until they are flushed
+POSITION_CACHE_TIMEOUT = 60 * 60 * 24
+# Windows older than this are assumed lost (e.g. a cache restart) and skipped
+MAX_BACKLOG_WINDOWS = 120
+
+# Pending pairs that make a process-local buffer write early
+LOCAL_FLUSH_SIZE = getattr(settings, 'WATCH_POSITION_LOCAL_FLUSH_SIZE', 500)
+
+LAST_FLUSHED_KEY = 'watch_flushed_window'
+FLUSH_LOCK_KEY = 'watch_flush_lock'
+
+
+class WatchError(Exception):
+    """The heartbeat cannot be recorded; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+# Process-local buffer, used when the cache is not shared: {position key: entry}
+_local_entries = {}
+_local_lock = threading.Lock()
+_local_flushed_at = time.time()
+
+
+def is_buffered():
+    """True when heartbeats can wait in a cache every process shares"""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def _window(now=None):
+    return int((now or time.time()) // FLUSH_SECONDS)
+
+
+def _position_key(user_id, video_id):
+    return f'watch_position:{user_id}:{video_id}'
+
+
+def _dirty_count_key(window):
+    return f'watch_dirty:{window}'
+
+
+def _dirty_slot_key(window, slot):
+    return f'watch_dirty:{window}:{slot}'
+
+
+def _mark_dirty(window, user_id, video_id):
+    """
+    Append the pair to the window's dirty list, once per window
+    """
+    timeout = FLUSH_SECONDS * (MAX_BACKLOG_WINDOWS + 2)
+    if not cache.add(f'watch_dirty_seen:{window}:{user_id}:{video_id}', 1, timeout):
+        return
+    cache.add(_dirty_count_key(window), 0, timeout)
+    try:
+        slot = cache.incr(_dirty_count_key(window))
+    except ValueError:
+        # The counter was evicted between add() and incr(); the position
+        # itself stays buffered and is picked up by the next window
+        cache.delete(f'watch_dirty_seen:{window}:{user_id}:{video_id}')
+        return
+    cache.set(_dirty_slot_key(window, slot), (user_id, video_id), timeout)
+
+
+def _authorize(user, video_id):
+    """
+    Cold-path checks for the first heartbeat of a (user, video) pair
+    """
+    try:
+        video = Video.objects.only('id', 'course_id', 'duration_seconds').get(id=video_id)
+    except Video.DoesNotExist:
+        raise WatchError('Video not found', 404)
+    student_id = StudentProfile.objects.filter(user=user).values_list('id', flat=True).first()
+    if student_id is None or not Enrollment.objects.filter(student_id=student_id, course_id=video.course_id).exists():
+        raise WatchError('Not enrolled in this course', 400)
+    return {
+        'student': student_id,
+        'course': video.course_id,
+        'duration': video.duration_seconds,
+        'completed': False,
+    }
+
+
+def record_heartbeat(user, video_id, position_seconds, duration_seconds=None):
+    """
+    Buffer the current position of a viewer; returns the buffered entry
+    """
+    key = _position_key(user.id, video_id)
+    entry = cache.get(key) or _authorize(user, video_id)
+
+    # Untranscoded videos have no duration yet; the player's only bounds the
+    # position, completion waits for the server to know the length
+    duration = entry['duration'] or duration_seconds
+    if duration:
+        position_seconds = min(position_seconds, duration)
+
+    entry['position'] = position_seconds
+    entry['at'] = time.time()
+
+    cache.set(key, entry, POSITION_CACHE_TIMEOUT)
+    if is_buffered():
+        _mark_dirty(_window(entry['at']), user.id, video_id)
+    else:
+        _buffer_locally(key, entry)
+    return entry
+
+
+def _buffer_locally(key, entry):
+    with _local_lock:
+        _local_entries[key] = dict(entry)
+        due = len(_local_entries) >= LOCAL_FLUSH_SIZE or entry['at'] - _local_flushed_at >= FLUSH_SECONDS
+    if due:
+        flush_local()
+
+
+def flush_local():
+    """
+    Write this process's buffered positions to the database. Returns the
+    number of positions written.
+    """
+    global _local_flushed_at
+    with _local_lock:
+        entries = dict(_local_entries)
+        _local_entries.clear()
+        _local_flushed_at = time.time()
+    if not entries:
+        return 0
+    return _write_positions(entries)
+
+
+# Positions still buffered when a worker stops would otherwise be lost
+atexit.register(flush_local)
+
+
+def is_flush_due():
+    """
+    True once per closed window, for the first caller that asks
+    """
+    previous = _window() - 1
+    return is_buffered() and cache.add(f'watch_flush_queued:{previous}', 1, FLUSH_SECONDS * 4)
+
+
+def _write_positions(entries):
+    """
+    Upsert {position key: entry} into VideoWatchPosition and record the
+    videos watched past COMPLETION_THRESHOLD. Returns the number of
+    positions written.
+    """
+    # Videos deleted since the heartbeat would break the foreign key. The
+    # stored durations also cover videos transcoded since the first heartbeat.
+    durations = dict(Video.objects.filter(
+        id__in={int(key.rsplit(':', 1)[1]) for key in entries}
+    ).values_list('id', 'duration_seconds'))
+
+    positions, completions = [], {}
+    for key, entry in entries.items():
+        video_id = int(key.rsplit(':', 1)[1])
+        if video_id not in durations:
+            continue
+        positions.append(VideoWatchPosition(
+            student_id=entry['student'], video_id=video_id,
+            position_seconds=entry['position'],
+            updated_at=datetime.fromtimestamp(entry['at'], tz=dt_timezone.utc),
+        ))
+        duration = durations[video_id]
+        if (
+            not entry['completed'] and duration
+            and entry['position'] >= duration * COMPLETION_THRESHOLD
+        ):
+            completions.setdefault(entry['student'], []).append(('video', video_id, entry['course'], None))
+            entry['completed'] = True
+            entry['duration'] = duration
+            cache.set(key, entry, POSITION_CACHE_TIMEOUT)
+
+    VideoWatchPosition.objects.bulk_create(
+        positions,
+        update_conflicts=True,
+        unique_fields=['student', 'video'],
+        update_fields=['position_seconds', 'updated_at'],
+    )
+    students = StudentProfile.objects.in_bulk(completions)
+    for student_id, items in completions.items():
+        progress.record_completions(students[student_id], items)
+    return len(positions)
+
+
+def _flush_window(window):
+    count = cache.get(_dirty_count_key(window)) or 0
+    if not count:
+        return 0
+    pairs = set(cache.get_many([_dirty_slot_key(window, slot) for slot in range(1, count + 1)]).values())
+    entries = cache.get_many([_position_key(user_id, video_id) for user_id, video_id in pairs])
+
+    written = _write_positions(entries)
+    cache.delete_many(
+        [_dirty_count_key(window)] + [_dirty_slot_key(window, slot) for slot in range(1, count + 1)]
+    )
+    return written
+
+
+def flush():
+    """
+    Write every closed window since the last flush to the database. Returns
+    the number of positions written.
+    """
+    if not cache.add(FLUSH_LOCK_KEY, 1, FLUSH_SECONDS * 2):
+        return 0
+    try:
+        current = _window()
+        last = cache.get(LAST_FLUSHED_KEY)
+        start = max(last + 1 if last is not None else 0, current - MAX_BACKLOG_WINDOWS)
+        written = 0
+        for window in range(start, current):
+            written += _flush_window(window)
+            cache.set(LAST_FLUSHED_KEY, window, None)
+        return written
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+def resume_positions(user, video_ids):
+    """
+    {video_id: seconds} for the given videos, preferring buffered positions
+    over flushed ones
+    """
+    video_ids = list(video_ids)
+    if not video_ids:
+        return {}
+    positions = dict(VideoWatchPosition.objects.filter(
+        student__user=user, video_id__in=video_ids
+    ).values_list('video_id', 'position_seconds'))
+    buffered = cache.get_many([_position_key(user.id, video_id) for video_id in video_ids])
+    for key, entry in buffered.items():
+        positions[int(key.rsplit(':', 1)[1])] = entry['position']
+    return positions
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('courses', '0011_keyset_indexes'),
+        ('job_board', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='jobpost',
+            name='job_board_j_status_b90250_idx',
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['job_post', '-applied_at', '-id'], name='job_board_j_job_pos_3beda2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='job_board_j_status_a1cf29_idx'),
+        ),
+    ]
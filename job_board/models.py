@@ -114,7 +114,7 @@ class JobPost(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['status', '-created_at', '-id']),
             models.Index(fields=['student', 'status']),
         ]
     
@@ -187,6 +187,7 @@ class JobApplication(models.Model):
         unique_together = ['job_post', 'teacher']  # Prevent duplicate applications
         indexes = [
             models.Index(fields=['job_post', 'status']),
+            models.Index(fields=['job_post', '-applied_at', '-id']),
             models.Index(fields=['teacher', 'status']),
         ]
     
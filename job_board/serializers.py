@@ -5,6 +5,7 @@ from django.utils import timezone
 from .models import JobPost, JobApplication, JobReview
 from authentication.models import StudentProfile, TeacherProfile
 from courses.models import Course
+from lms.images import responsive_image
 
 
 class CourseBasicSerializer(serializers.ModelSerializer):
@@ -17,10 +18,11 @@ class StudentBasicSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     full_name = serializers.SerializerMethodField()
     profile_picture = serializers.SerializerMethodField()
+    profile_picture_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = StudentProfile
-        fields = ['id', 'username', 'full_name','profile_picture']
+        fields = ['id', 'username', 'full_name','profile_picture', 'profile_picture_srcset']
     
     def get_full_name(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}".strip()
@@ -31,6 +33,9 @@ class StudentBasicSerializer(serializers.ModelSerializer):
             # Return absolute URL for frontend usage
             return request.build_absolute_uri(obj.profile_picture.url) if request else obj.profile_picture.url
         return None
+
+    def get_profile_picture_srcset(self, obj):
+        return responsive_image(obj.profile_picture, 'avatar', self.context.get('request'))
          
 
 
@@ -38,10 +43,11 @@ class TeacherBasicSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     full_name = serializers.SerializerMethodField()
     profile_picture = serializers.SerializerMethodField()
+    profile_picture_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = TeacherProfile
-        fields = ['id', 'username', 'full_name','profile_picture']
+        fields = ['id', 'username', 'full_name','profile_picture', 'profile_picture_srcset']
     
     def get_full_name(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}".strip()
@@ -53,6 +59,9 @@ class TeacherBasicSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.profile_picture.url) if request else obj.profile_picture.url
         return None
 
+    def get_profile_picture_srcset(self, obj):
+        return responsive_image(obj.profile_picture, 'avatar', self.context.get('request'))
+
 
 class JobPostCreateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -22,6 +22,11 @@ from .permissions import (
     CanReviewJob, IsJobParticipant
 )
 from .filters import JobPostFilter
+from lms.pagination import KeysetPagination
+
+
+class JobApplicationPagination(KeysetPagination):
+    keyset_field = 'applied_at'
 
 
 # Job Post Views
@@ -39,6 +44,7 @@ class JobPostListView(generics.ListAPIView):
     search_fields = ['title', 'description', 'subject_text', 'course__name']
     ordering_fields = ['created_at', 'budget_amount', 'deadline']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
 
 
 class JobPostCreateView(generics.CreateAPIView):
@@ -135,6 +141,7 @@ class JobApplicationListView(generics.ListAPIView):
     """
     serializer_class = JobApplicationBasicSerializer
     permission_classes = [IsAuthenticated, IsStudentOrTeacher]
+    pagination_class = JobApplicationPagination
 
     def get_queryset(self):
         job_post = get_object_or_404(JobPost, id=self.kwargs['job_id'])
@@ -30,4 +30,33 @@ app.conf.beat_schedule = {
         'task': 'email_automation.tasks.cleanup_old_email_logs',
         'schedule': crontab(hour=2, minute=0),  # Daily at 2 AM
     },
+    # Course catalog
+    'refresh-course-rankings': {
+        'task': 'courses.tasks.refresh_course_rankings',
+        'schedule': crontab(minute='*/15'),  # Every 15 minutes
+    },
+    'refresh-course-similarities': {
+        'task': 'courses.tasks.refresh_course_similarities',
+        'schedule': crontab(hour=4, minute=0),  # Nightly at 4 AM
+    },
+    'flush-watch-positions': {
+        'task': 'courses.tasks.flush_watch_positions',
+        'schedule': crontab(),  # Every minute, heartbeats also trigger flushes
+    },
+    'refresh-quiz-analytics': {
+        'task': 'courses.tasks.refresh_quiz_analytics',
+        'schedule': crontab(minute=30),  # Hourly at half past
+    },
+    'refresh-course-funnels': {
+        'task': 'courses.tasks.refresh_course_funnels',
+        'schedule': crontab(hour=4, minute=30),  # Nightly at 4:30 AM
+    },
+    'refresh-admin-overview': {
+        'task': 'admin_dashboard.tasks.refresh_admin_overview',
+        'schedule': crontab(),  # Every minute
+    },
+    'cleanup-stale-uploads': {
+        'task': 'teacher_dashbord.tasks.cleanup_stale_uploads',
+        'schedule': crontab(hour=3, minute=0),  # Daily at 3 AM
+    },
 }
\ No newline at end of file
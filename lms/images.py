@@ -0,0 +1,159 @@
+# lms/images.py
+
+"""
+Resized derivatives of uploaded images (course thumbnails, profile pictures).
+
+Variants are generated lazily with Pillow the first time an image is
+serialized, as WebP plus a JPEG fallback at a few widths, and written under
+MEDIA_ROOT/derivatives/ named by the SHA-1 of the source bytes, so identical
+uploads share their files and a re-upload never serves stale variants.
+What exists for an image is remembered in the cache, so serializing an
+already processed image costs one stat() and one cache lookup.
+
+Serializers call `responsive_image(fieldfile, variant, request)` and expose
+the result next to the original URL:
+
+    {"src": ".../<hash>-card-640.jpg", "width": 640, "height": 360,
+     "srcset": "... 320w, ... 480w, ... 640w", "webp_srcset": "..."}
+"""
+
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.core.cache import cache
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# name -> (aspect ratio width/height, widths to render)
+VARIANTS = {
+    'card': (16 / 9, (320, 480, 640)),
+    'detail': (16 / 9, (960, 1280)),
+    'avatar': (1, (64, 128, 256)),
+}
+
+FORMATS = (
+    ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+DERIVATIVES_DIR = 'derivatives'
+FAILED_IMAGE_TIMEOUT = 60 * 60
+
+
+def _digest(path):
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def content_digest(fieldfile):
+    """
+    SHA-1 of the uploaded file, cached against its name, size and mtime
+    """
+    stat = os.stat(fieldfile.path)
+    cache_key = f'image_digest:{fieldfile.name}:{stat.st_size}:{int(stat.st_mtime)}'
+    digest = cache.get(cache_key)
+    if digest is None:
+        digest = _digest(fieldfile.path)
+        cache.set(cache_key, digest, None)
+    return digest
+
+
+def _derivative_name(digest, variant, width, extension):
+    return f'{DERIVATIVES_DIR}/{digest[:2]}/{digest}-{variant}-{width}.{extension}'
+
+
+def _save(image, relative_name, image_format, options):
+    path = os.path.join(settings.MEDIA_ROOT, relative_name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write beside the target and rename so readers never see half a file
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    image.save(temp_path, image_format, **options)
+    os.replace(temp_path, path)
+
+
+def generate_variant(fieldfile, variant, digest=None):
+    """
+    Render every width/format of a variant that is not on disk yet.
+    Returns [(width, height, {extension: relative name})] smallest first.
+    """
+    aspect, widths = VARIANTS[variant]
+    digest = digest or content_digest(fieldfile)
+
+    with Image.open(fieldfile.path) as source:
+        source = ImageOps.exif_transpose(source)
+        # Never upscale: the widest crop of the variant's aspect the source
+        # can fill, and an image smaller than every width keeps that size
+        largest = max(1, min(source.width, int(source.height * aspect)))
+        usable = [width for width in widths if width <= largest] or [min(widths[0], largest)]
+
+        rendered = []
+        for width in usable:
+            height = round(width / aspect)
+            names = {
+                extension: _derivative_name(digest, variant, width, extension)
+                for extension, _, _ in FORMATS
+            }
+            resized = None
+            for extension, image_format, options in FORMATS:
+                if os.path.exists(os.path.join(settings.MEDIA_ROOT, names[extension])):
+                    continue
+                if resized is None:
+                    resized = ImageOps.fit(source.convert('RGB'), (width, height), Image.LANCZOS)
+                _save(resized, names[extension], image_format, options)
+            rendered.append((width, height, names))
+    return rendered
+
+
+def get_variant(fieldfile, variant):
+    """
+    Derivative file names for an image, generating them on first use.
+    Returns None when the source is missing or is not a readable image.
+    """
+    try:
+        digest = content_digest(fieldfile)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read {fieldfile.name}: {str(e)}")
+        return None
+
+    cache_key = f'image_variant:{digest}:{variant}'
+    rendered = cache.get(cache_key)
+    if rendered is None:
+        try:
+            rendered = generate_variant(fieldfile, variant, digest)
+            cache.set(cache_key, rendered, None)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            logger.warning(f"Could not build {variant} images for {fieldfile.name}: {str(e)}")
+            # Remember broken uploads for a while instead of re-decoding them per request
+            rendered = []
+            cache.set(cache_key, rendered, FAILED_IMAGE_TIMEOUT)
+    return rendered or None
+
+
+def responsive_image(fieldfile, variant, request=None):
+    """
+    src/srcset data for an ImageField value, or None if there is no image
+    """
+    if not fieldfile:
+        return None
+    rendered = get_variant(fieldfile, variant)
+    if not rendered:
+        return None
+
+    def url(name):
+        location = settings.MEDIA_URL + name
+        return request.build_absolute_uri(location) if request is not None else location
+
+    width, height, largest = rendered[-1]
+    return {
+        'src': url(largest['jpg']),
+        'width': width,
+        'height': height,
+        'srcset': ', '.join(f"{url(names['jpg'])} {w}w" for w, _, names in rendered),
+        'webp_srcset': ', '.join(f"{url(names['webp'])} {w}w" for w, _, names in rendered),
+    }
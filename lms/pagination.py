@@ -0,0 +1,117 @@
+# lms/pagination.py
+
+"""
+Opt-in keyset pagination for long, newest-first lists.
+
+`KeysetPagination` behaves exactly like the default PageNumberPagination
+until the client sends `?cursor=` (empty for the first page). From then on
+pages are fetched with `WHERE (created_at, id) < (cursor)` against a
+composite index instead of OFFSET, so page 500 costs the same as page 1,
+and no COUNT(*) is run. The response carries a `next` link holding the
+cursor for the following page; `count` and `previous` are omitted.
+
+Keyset mode only applies while the list is in its newest-first order. If
+the client re-orders it (or the view ranks results, e.g. search relevance)
+the request falls back to page numbers.
+"""
+
+import base64
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    cursor_query_param = 'cursor'
+    # Newest-first timestamp the cursor is keyed on, with the primary key as tie-breaker
+    keyset_field = 'created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    keyset = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            self.cursor_query_param in request.query_params
+            and self._is_keyset_ordered(queryset)
+        )
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.pk_field = queryset.model._meta.pk
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(f'-{self.keyset_field}', '-pk')
+
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+        if position is not None:
+            value, pk = position
+            queryset = queryset.filter(
+                Q(**{f'{self.keyset_field}__lt': value}) |
+                Q(**{self.keyset_field: value, 'pk__lt': pk})
+            )
+
+        # One extra row tells us whether there is a next page
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        results = results[:page_size]
+        self.next_position = (
+            (getattr(results[-1], self.keyset_field), results[-1].pk) if self.has_next else None
+        )
+        return results
+
+    def _is_keyset_ordered(self, queryset):
+        ordering = tuple(queryset.query.order_by) or tuple(queryset.model._meta.ordering)
+        newest_first = f'-{self.keyset_field}'
+        return ordering in ((newest_first,), (newest_first, '-id'), (newest_first, '-pk'))
+
+    def encode_cursor(self, position):
+        value, pk = position
+        raw = f'{value.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, token):
+        if not token:
+            return None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            value, pk = base64.urlsafe_b64decode(padded.encode()).decode().rsplit('|', 1)
+            timestamp = parse_datetime(value)
+            if timestamp is None:
+                raise ValueError(value)
+            # Integer or UUID primary keys
+            return timestamp, self.pk_field.to_python(pk)
+        except (TypeError, ValueError, UnicodeDecodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append({
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Keyset cursor; send it empty for the first page to skip page counts',
+            'schema': {'type': 'string'},
+        })
+        return parameters
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
     'django_filters',
     'authentication',
     'teacher_dashbord',
+    'student_dashboard',
     'courses',
     'admin_dashboard',
     'payments',
@@ -137,6 +138,15 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 
+# Video streaming: hand the byte transfer to the front proxy when there is one.
+# Video files and MEDIA_ROOT/hls/ are access-checked by the courses views, so the
+# proxy must not also expose them publicly under MEDIA_URL.
+# nginx: prefix of an `internal` location aliased to MEDIA_ROOT, e.g. '/protected-media/'
+VIDEO_ACCEL_REDIRECT_PREFIX = None
+# Apache mod_xsendfile / lighttpd: header carrying the file path, e.g. 'X-Sendfile'
+VIDEO_SENDFILE_HEADER = None
+
+
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024  # 10MB
@@ -244,6 +254,19 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Shared cache for every web and Celery process. Write-behind buffers such
+# as the watch positions in courses/watch.py only work when all processes
+# see the same cache; without REDIS_URL each process keeps its own
+# in-memory cache and those buffers write straight to the database.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
 
 # =====
 # setup for swagger
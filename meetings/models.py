@@ -2,8 +2,7 @@
 
 from django.db import models
 from authentication.models import User
-from courses.models import Course,Enrollment,Video,Progress
-from payments.models import Payment
+from courses.models import Course,Enrollment,Video,Progress,parse_duration
 
 from django.utils import timezone
 import uuid
@@ -116,12 +115,16 @@ class Meeting(models.Model):
     def create_recorded_video(self):
         """Create a video record from meeting recording"""
         if self.recording_url and self.course:
+            try:
+                duration_seconds = parse_duration(self.recording_duration)
+            except ValueError:
+                duration_seconds = 0
             video = Video.objects.create(
                 course=self.course,
                 title=f"Recorded Lecture: {self.title}",
                 description=f"Live lecture recorded on {self.started_at.strftime('%Y-%m-%d %H:%M')}",
                 video_file=self.recording_url,  # This would need to be handled properly
-                duration=self.recording_duration or "0:00",
+                duration_seconds=duration_seconds,
                 order=self.course.videos.count() + 1
             )
             return video
@@ -144,14 +147,7 @@ class Meeting(models.Model):
             
             # Check payment for paid courses
             if self.course.course_type == 'paid':
-              
-                payment_exists = Payment.objects.filter(
-                    user=user,
-                    is_successful=True,
-                    # You might want to link payment to course instead of meeting
-                ).exists()
-                
-                if not payment_exists:
+                if not self.course.has_user_paid(user):
                     return False, "Please complete payment first to attend this lecture"
         
         return True, "Can join"
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_keyset_indexes'),
+        ('meetings', '0002_meeting_allow_student_recording_access'),
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='notificatio_recipie_a972ce_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-created_at', '-id'], name='notificatio_recipie_e86c4c_idx'),
+        ),
+    ]
@@ -81,7 +81,7 @@ class Notification(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['recipient', '-created_at']),
+            models.Index(fields=['recipient', '-created_at', '-id']),
             models.Index(fields=['recipient', 'is_read']),
         ]
     
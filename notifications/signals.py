@@ -83,7 +83,7 @@ def notify_payment_completion(sender, instance, created, **kwargs):
         # Check if enrollment exists (payment successful means student is enrolled)
         try:
             enrollment = Enrollment.objects.get(
-                student=instance.user,
+                student__user=instance.user,
                 course=instance.course
             )
             
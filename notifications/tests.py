@@ -0,0 +1,30 @@
+from django.test import TestCase
+
+from authentication.models import User
+from courses.models import Course, Enrollment
+from payments.models import Payment
+from .models import Notification
+
+
+class PaymentNotificationTests(TestCase):
+    def test_successful_payment_notifies_the_teacher(self):
+        teacher = User.objects.create_user(
+            email='teacher@example.com', username='teacher', password='x', role='teacher'
+        )
+        student = User.objects.create_user(
+            email='student@example.com', username='student', password='x', role='student'
+        )
+        course = Course.objects.create(
+            title='P', description='d', teacher=teacher.teacher_profile, course_type='paid', price=5
+        )
+        Enrollment.objects.create(student=student.student_profile, course=course, payment_status='verified')
+
+        # The enrollment lookup used to compare Enrollment.student with the
+        # User, which raised ValueError on every successful course payment
+        Payment.objects.create(
+            user=student, course=course, gateway='jazzcash', txn_ref='txn-1', amount=5, is_successful=True
+        )
+
+        self.assertTrue(Notification.objects.filter(
+            recipient=teacher, sender=student, notification_type='student_enrolled', course=course
+        ).exists())
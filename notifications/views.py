@@ -4,7 +4,7 @@ from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.pagination import PageNumberPagination
+from lms.pagination import KeysetPagination
 from django.db.models import Q, Count
 from django.shortcuts import get_object_or_404
 from .models import Notification
@@ -16,8 +16,8 @@ from .serializers import (
 )
 
 
-class NotificationPagination(PageNumberPagination):
-    """Custom pagination for notifications"""
+class NotificationPagination(KeysetPagination):
+    """Custom pagination for notifications (send ?cursor= for keyset paging)"""
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
@@ -32,6 +32,7 @@ class NotificationListView(generics.ListAPIView):
     - notification_type: Filter by notification type
     - page: Page number for pagination
     - page_size: Number of items per page (max 100)
+    - cursor: Keyset cursor instead of page numbers (empty for the first page)
     """
     serializer_class = NotificationListSerializer
     permission_classes = [IsAuthenticated]
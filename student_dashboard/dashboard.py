@@ -0,0 +1,89 @@
+# student_dashboard/dashboard.py
+
+"""
+Student dashboard overview payload.
+
+Enrollment counts come from one conditional aggregate and the assembled
+payload is cached per student for a short time. The cache key carries
+`User.entitlements_version`, which the payment and enrollment signals in
+courses/signals.py bump in the database whenever one of the student's
+enrollments or payments changes. Every request loads the user row anyway,
+so each process moves to a fresh key at once, even when the cache itself
+is process-local. The TTL only bounds staleness of data the student does
+not own (e.g. newly published courses).
+
+Available courses are cached as model instances and serialized per
+request, so request-bound output such as absolute URLs always matches the
+caller.
+"""
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+from authentication.models import StudentProfile
+from courses.models import Course, Enrollment
+from courses.serializers import course_list_prefetches
+from payments.models import Payment
+
+DASHBOARD_CACHE_TIMEOUT = 60
+AVAILABLE_COURSES_LIMIT = 6
+
+
+def _cache_key(user):
+    return f'student_dashboard:{user.id}:{user.entitlements_version}'
+
+
+def build_dashboard(student, student_profile):
+    """
+    Dashboard payload, with the available courses as Course instances
+    """
+    enrollments = Enrollment.objects.filter(student=student_profile)
+    statistics = enrollments.aggregate(
+        total_enrollments=Count('id'),
+        completed_courses=Count('id', filter=Q(is_completed=True)),
+        in_progress_courses=Count('id', filter=Q(is_completed=False)),
+    )
+    total_spent = Payment.objects.filter(
+        user=student, is_successful=True
+    ).aggregate(total=Sum('amount'))['total'] or 0
+
+    recent_enrollments = enrollments.select_related('course').order_by('-enrolled_at')[:5]
+    select_lookups, prefetch_lookups = course_list_prefetches()
+    available_courses = Course.objects.filter(is_active=True).exclude(
+        enrollments__student=student_profile
+    ).select_related(*select_lookups).prefetch_related(*prefetch_lookups)[:AVAILABLE_COURSES_LIMIT]
+
+    return {
+        'profile_picture': student_profile.profile_picture.url if student_profile.profile_picture else None,
+        'student_name': student.username,
+        'student_email': student.email,
+        'statistics': {
+            **statistics,
+            'total_spent': float(total_spent)
+        },
+        'recent_enrollments': [{
+            'id': enrollment.id,
+            'course': {
+                'id': enrollment.course.id,
+                'title': enrollment.course.title,
+                'course_type': enrollment.course.course_type,
+                'price': float(enrollment.course.price)
+            },
+            'enrolled_at': enrollment.enrolled_at,
+            'is_completed': enrollment.is_completed
+        } for enrollment in recent_enrollments],
+        'available_courses': list(available_courses)
+    }
+
+
+def get_dashboard(user):
+    """
+    Cached build_dashboard() payload for a student user
+    """
+    cache_key = _cache_key(user)
+    data = cache.get(cache_key)
+    if data is None:
+        student_profile = StudentProfile.objects.get(user=user)
+        data = build_dashboard(user, student_profile)
+        cache.set(cache_key, data, DASHBOARD_CACHE_TIMEOUT)
+    return data
@@ -0,0 +1,129 @@
+# student_dashboard/events.py
+
+"""
+Batched learning events, e.g. the completions a mobile client queued while
+offline. Events are deduplicated, every referenced course is checked
+against the student's enrollments with one query, and the accepted
+completions go into Progress with one bulk insert (courses/progress.py).
+
+`video_progress` events carry a playback position. Only the latest one per
+video is kept, and it goes through the same write-behind buffer as player
+heartbeats (courses/watch.py), so watching past the completion threshold
+completes the video when the buffer is flushed.
+"""
+
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from courses.models import Enrollment, Question, Quiz, QuizAttempt, Video
+from courses import progress, watch
+
+# Event type -> kind of item it completes
+COMPLETION_EVENTS = {
+    'video_completed': 'video',
+    'quiz_completed': 'quiz',
+}
+
+POSITION_EVENT = 'video_progress'
+
+
+def _dedupe(events):
+    """
+    One event per (type, id), keeping the earliest occurrence
+    """
+    now = timezone.now()
+    unique = {}
+    for event in events:
+        key = (event['type'], event['id'])
+        occurred_at = min(event['occurred_at'] or now, now)
+        if key not in unique or occurred_at < unique[key]:
+            unique[key] = occurred_at
+    return unique
+
+
+def _latest_positions(events):
+    """
+    {video id: position} from the most recent progress event of each video
+    """
+    now = timezone.now()
+    latest = {}
+    for event in events:
+        occurred_at = min(event['occurred_at'] or now, now)
+        if event['id'] not in latest or occurred_at >= latest[event['id']][0]:
+            latest[event['id']] = (occurred_at, event['position_seconds'])
+    return {video_id: position for video_id, (_, position) in latest.items()}
+
+
+def _record_positions(student_profile, positions):
+    """
+    Buffer the positions like heartbeats; returns (recorded count, rejections)
+    """
+    recorded, rejected = 0, []
+    for video_id, position in positions.items():
+        try:
+            watch.record_heartbeat(student_profile.user, video_id, position)
+        except watch.WatchError as e:
+            rejected.append({'type': POSITION_EVENT, 'id': video_id, 'reason': e.message})
+        else:
+            recorded += 1
+    return recorded, rejected
+
+
+def apply_events(student_profile, events):
+    """
+    Apply a batch of validated events for a student and summarise the outcome
+    """
+    positions = _latest_positions([event for event in events if event['type'] == POSITION_EVENT])
+    unique = _dedupe([event for event in events if event['type'] != POSITION_EVENT])
+    ids = {kind: set() for kind in COMPLETION_EVENTS.values()}
+    for event_type, item_id in unique:
+        ids[COMPLETION_EVENTS[event_type]].add(item_id)
+
+    # item -> course, and whether a quiz can only be completed by passing it
+    courses = {
+        ('video', video_id): course_id
+        for video_id, course_id in Video.objects.filter(id__in=ids['video']).values_list('id', 'course_id')
+    }
+    graded_quizzes = set()
+    quizzes = Quiz.objects.filter(id__in=ids['quiz']).annotate(
+        graded=Exists(Question.objects.filter(quiz=OuterRef('pk')))
+    ).values_list('id', 'course_id', 'graded')
+    for quiz_id, course_id, graded in quizzes:
+        courses[('quiz', quiz_id)] = course_id
+        if graded:
+            graded_quizzes.add(quiz_id)
+
+    enrolled = set(Enrollment.objects.filter(
+        student=student_profile, course_id__in=set(courses.values())
+    ).values_list('course_id', flat=True))
+    passed = set()
+    if graded_quizzes:
+        passed = set(QuizAttempt.objects.filter(
+            student=student_profile, quiz_id__in=graded_quizzes, passed=True
+        ).values_list('quiz_id', flat=True).distinct())
+
+    completions, rejected = [], []
+    for (event_type, item_id), occurred_at in unique.items():
+        kind = COMPLETION_EVENTS[event_type]
+        course_id = courses.get((kind, item_id))
+        if course_id is None:
+            reason = f'{kind.capitalize()} not found'
+        elif course_id not in enrolled:
+            reason = 'Not enrolled in this course'
+        elif kind == 'quiz' and item_id in graded_quizzes and item_id not in passed:
+            reason = 'Submit a passing attempt to complete this quiz'
+        else:
+            completions.append((kind, item_id, course_id, occurred_at))
+            continue
+        rejected.append({'type': event_type, 'id': item_id, 'reason': reason})
+
+    created = progress.record_completions(student_profile, completions)
+    positions_recorded, positions_rejected = _record_positions(student_profile, positions) if positions else (0, [])
+    return {
+        'received': len(events),
+        'duplicates': len(events) - len(unique) - len(positions),
+        'applied': len(created),
+        'already_completed': len(completions) - len(created),
+        'positions_recorded': positions_recorded,
+        'rejected': rejected + positions_rejected,
+    }
@@ -1,7 +1,7 @@
 # student_dashboard/serializers.py
 
 from rest_framework import serializers
-from courses.models import Enrollment, Progress
+from courses.models import Enrollment, Progress, QuizAttempt
 from courses.serializers import CourseListSerializer
 
 
@@ -24,4 +24,54 @@ class StudentProgressSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'course_title', 'video_title', 'quiz_title', 
             'assignment_title', 'completed_at'
-        ]
\ No newline at end of file
+        ]
+
+class QuizSubmissionSerializer(serializers.Serializer):
+    """Answers as {question_id: chosen option index}"""
+    answers = serializers.DictField(child=serializers.IntegerField(min_value=0))
+
+
+class BatchQuizSubmissionSerializer(QuizSubmissionSerializer):
+    quiz = serializers.IntegerField()
+
+
+class QuizAttemptSerializer(serializers.ModelSerializer):
+    results = serializers.SerializerMethodField()
+
+    class Meta:
+        model = QuizAttempt
+        fields = [
+            'id', 'quiz', 'score', 'passed', 'correct_count',
+            'total_questions', 'results', 'submitted_at'
+        ]
+
+    def get_results(self, obj):
+        question_ids = sorted(obj.answers, key=int)
+        return [
+            {'question': int(question_id), 'answer': obj.answers[question_id], 'correct': flag == '1'}
+            for question_id, flag in zip(question_ids, obj.results)
+        ]
+
+
+class LearningEventSerializer(serializers.Serializer):
+    EVENT_TYPES = ['video_completed', 'quiz_completed', 'video_progress']
+
+    type = serializers.ChoiceField(choices=EVENT_TYPES)
+    id = serializers.IntegerField(min_value=1)
+    occurred_at = serializers.DateTimeField(required=False, default=None)
+    # Playback position of a video_progress event
+    position_seconds = serializers.IntegerField(min_value=0, required=False)
+
+    def validate(self, attrs):
+        if attrs['type'] == 'video_progress' and 'position_seconds' not in attrs:
+            raise serializers.ValidationError({'position_seconds': 'Required for video_progress events.'})
+        return attrs
+
+
+class LearningEventBatchSerializer(serializers.Serializer):
+    events = serializers.ListField(child=LearningEventSerializer(), allow_empty=False, max_length=500)
+
+
+class WatchHeartbeatSerializer(serializers.Serializer):
+    position_seconds = serializers.IntegerField(min_value=0)
+    duration_seconds = serializers.IntegerField(min_value=0, required=False)
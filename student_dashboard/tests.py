@@ -1,3 +1,286 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from courses import progress, recommendations, watch
+from courses.models import (
+    Assignment, Course, CourseSimilarity, Enrollment, EnrollmentProgress, Progress, Question, Quiz, Video,
+    VideoWatchPosition
+)
+
+
+def make_teacher(n=0):
+    user = User.objects.create_user(email=f'teacher{n}@example.com', username=f'teacher{n}', password='x', role='teacher')
+    return user.teacher_profile
+
+
+def make_student(n=0):
+    user = User.objects.create_user(email=f'student{n}@example.com', username=f'student{n}', password='x', role='student')
+    return user.student_profile
+
+
+def student_client(student):
+    client = APIClient()
+    client.force_authenticate(User.objects.get(id=student.user_id))
+    return client
+
+
+class LearningEventTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = make_teacher()
+        self.course = Course.objects.create(title='C', description='d', teacher=teacher)
+        self.other_course = Course.objects.create(title='O', description='d', teacher=teacher)
+        self.student = make_student()
+        Enrollment.objects.create(student=self.student, course=self.course)
+        self.videos = [Video.objects.create(course=self.course, title='v', video_file='x.mp4') for _ in range(3)]
+        self.client = student_client(self.student)
+
+    def post(self, events):
+        return self.client.post('/api/students/events/', {'events': events}, format='json')
+
+    def test_batch_is_applied_and_classified(self):
+        empty_quiz = Quiz.objects.create(course=self.course, title='empty')
+        graded_quiz = Quiz.objects.create(course=self.course, title='graded')
+        Question.objects.create(quiz=graded_quiz, question='x', options=['a', 'b'], correct_answer=0)
+        foreign_video = Video.objects.create(course=self.other_course, title='v', video_file='x.mp4')
+        Progress.objects.create(student=self.student, course=self.course, video=self.videos[2])
+
+        response = self.post([{'type': 'video_completed', 'id': video.id} for video in self.videos] + [
+            {'type': 'video_completed', 'id': self.videos[0].id, 'occurred_at': '2020-01-01T00:00:00Z'},
+            {'type': 'video_completed', 'id': foreign_video.id},
+            {'type': 'video_completed', 'id': 999999},
+            {'type': 'quiz_completed', 'id': empty_quiz.id},
+            # Quizzes with questions are completed by a graded attempt only
+            {'type': 'quiz_completed', 'id': graded_quiz.id},
+        ])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        data = response.data['data']
+        self.assertEqual((data['applied'], data['already_completed'], len(data['rejected'])), (3, 1, 3))
+        self.assertEqual(Progress.objects.get(video=self.videos[0]).completed_at.year, 2020)
+        self.assertEqual(EnrollmentProgress.objects.get(enrollment__course=self.course).completed_items, 4)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        more_videos = [Video.objects.create(course=self.course, title='v', video_file='x.mp4') for _ in range(10)]
+
+        with CaptureQueriesContext(connection) as small:
+            self.post([{'type': 'video_completed', 'id': self.videos[0].id}])
+        with CaptureQueriesContext(connection) as large:
+            self.post([{'type': 'video_completed', 'id': video.id} for video in more_videos])
+
+        self.assertEqual(len(large), len(small))
+
+    def test_progress_events_go_through_the_watch_buffer(self):
+        self.addCleanup(watch.flush_local)
+        video = self.videos[0]
+        Video.objects.filter(id=video.id).update(duration_seconds=100)
+        foreign_video = Video.objects.create(course=self.other_course, title='v', video_file='x.mp4')
+
+        response = self.post([
+            {'type': 'video_progress', 'id': video.id, 'position_seconds': 30, 'occurred_at': '2020-01-01T00:00:00Z'},
+            {'type': 'video_progress', 'id': video.id, 'position_seconds': 95},
+            {'type': 'video_progress', 'id': foreign_video.id, 'position_seconds': 5},
+        ])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        data = response.data['data']
+        self.assertEqual((data['positions_recorded'], data['duplicates'], len(data['rejected'])), (1, 1, 1))
+        watch.flush_local()
+        self.assertEqual(VideoWatchPosition.objects.get(student=self.student, video=video).position_seconds, 95)
+        self.assertTrue(Progress.objects.filter(student=self.student, video=video).exists())
+
+    def test_progress_events_need_a_position(self):
+        response = self.post([{'type': 'video_progress', 'id': self.videos[0].id}])
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_concurrent_completion_is_not_counted_twice(self):
+        quiz = Quiz.objects.create(course=self.course, title='late')
+        assignment = Assignment.objects.create(course=self.course, title='a', description='d')
+        before = EnrollmentProgress.objects.get(enrollment__course=self.course).completed_items
+        bulk_create = Progress.objects.bulk_create
+
+        def racing_bulk_create(rows, **kwargs):
+            # Another request completes the same quiz first
+            Progress.objects.create(student=self.student, course=self.course, quiz=quiz)
+            return bulk_create(rows, **kwargs)
+
+        with mock.patch.object(Progress.objects, 'bulk_create', racing_bulk_create):
+            created = progress.record_completions(self.student, [
+                ('quiz', quiz.id, self.course.id, None),
+                ('assignment', assignment.id, self.course.id, None),
+            ])
+
+        self.assertEqual([row.assignment_id for row in created], [assignment.id])
+        self.assertEqual(EnrollmentProgress.objects.get(enrollment__course=self.course).completed_items, before + 2)
+
+
+class CourseProgressTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.course = Course.objects.create(title='C', description='d', teacher=make_teacher())
+        self.videos = [
+            Video.objects.create(course=self.course, title=f'v{i}', video_file='x.mp4', order=i, duration_seconds=61)
+            for i in range(5)
+        ]
+        self.quizzes = [Quiz.objects.create(course=self.course, title=f'q{i}') for i in range(3)]
+        self.student = make_student()
+        Enrollment.objects.create(student=self.student, course=self.course)
+        Progress.objects.create(student=self.student, course=self.course, video=self.videos[3])
+        self.client = student_client(self.student)
+        self.url = f'/api/students/courses/{self.course.id}/progress/'
+
+    def test_progress_summary(self):
+        data = self.client.get(self.url).data['data']
+
+        self.assertEqual(data['videos']['completed'], 1)
+        self.assertEqual(data['videos']['list'][0]['duration'], '1:01')
+        self.assertEqual([v['completed'] for v in data['videos']['list']], [False, False, False, True, False])
+        self.assertEqual(data['progress']['completed_items'], 1)
+
+    def test_warm_request_query_count_does_not_grow_with_content(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url)
+
+        for i in range(20):
+            video = Video.objects.create(course=self.course, title=f'more{i}', video_file='x.mp4', order=10 + i)
+            Progress.objects.create(student=self.student, course=self.course, video=video)
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.url)
+
+        self.assertEqual(len(large), len(small))
+
+    def test_etag_changes_with_completions(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Progress.objects.create(student=self.student, course=self.course, quiz=self.quizzes[0])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['data']['progress']['completed_items'], 2)
+
+    def test_completion_in_another_process_is_seen(self):
+        self.client.get(self.url)
+
+        # Another worker cannot delete this process's cache entries; the
+        # version in the rollup row moves the key instead
+        with mock.patch('courses.progress.cache.delete'), mock.patch('courses.progress.cache.delete_many'):
+            Progress.objects.create(student=self.student, course=self.course, video=self.videos[0])
+
+        self.assertEqual(self.client.get(self.url).data['data']['progress']['completed_items'], 2)
+
+    def test_course_without_enrollment(self):
+        other = Course.objects.create(title='O', description='d', teacher=make_teacher(1))
+
+        self.assertEqual(self.client.get(f'/api/students/courses/{other.id}/progress/').status_code, 400)
+        self.assertEqual(self.client.get('/api/students/courses/999999/progress/').status_code, 404)
+
+
+class StudentDashboardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = make_teacher()
+        self.courses = [Course.objects.create(title=f'C{i}', description='d', teacher=teacher) for i in range(5)]
+        self.student = make_student()
+        Enrollment.objects.create(student=self.student, course=self.courses[0], is_completed=True)
+        Enrollment.objects.create(student=self.student, course=self.courses[1])
+        self.client = student_client(self.student)
+
+    def test_statistics(self):
+        response = self.client.get('/api/students/')
+
+        self.assertEqual(response.status_code, 200)
+        statistics = response.data['data']['statistics']
+        self.assertEqual(
+            (statistics['total_enrollments'], statistics['completed_courses'], statistics['in_progress_courses']),
+            (2, 1, 1)
+        )
+        self.assertEqual(len(response.data['data']['available_courses']), 3)
+
+    def test_query_count_does_not_grow_with_enrollments(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/students/')
+
+        for course in self.courses[2:]:
+            Enrollment.objects.create(student=self.student, course=course)
+        cache.clear()
+        with CaptureQueriesContext(connection) as large:
+            self.client.get('/api/students/')
+
+        self.assertLessEqual(len(large), len(small))
+
+    def test_repeat_request_is_served_from_cache(self):
+        self.client.get('/api/students/')
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/students/')
+        self.assertEqual(len(ctx), 0)
+
+    def test_new_enrollment_refreshes_the_payload(self):
+        self.client.get('/api/students/')
+
+        # Nothing drops the cached payload; the version bumped in the user row,
+        # which the next request loads, is what makes every process miss
+        Enrollment.objects.create(student=self.student, course=self.courses[2])
+
+        data = student_client(self.student).get('/api/students/').data['data']
+        self.assertEqual(data['statistics']['in_progress_courses'], 2)
+        self.assertEqual(len(data['available_courses']), 2)
+
+    @override_settings(ALLOWED_HOSTS=['*'])
+    def test_urls_are_built_for_the_requesting_host(self):
+        self.courses[4].thumbnail = 'course_thumbnails/x.jpg'
+        self.courses[4].save()
+        self.client.get('/api/students/')
+
+        response = self.client.get('/api/students/', SERVER_NAME='other.example')
+
+        thumbnails = [course['thumbnail'] for course in response.data['data']['available_courses']]
+        self.assertIn('http://other.example/media/course_thumbnails/x.jpg', thumbnails)
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        teacher = make_teacher()
+        self.courses = [Course.objects.create(title=f'C{i}', description='d', teacher=teacher) for i in range(6)]
+        # Two clusters of co-enrolled courses: 0-2 and 3-4; course 5 has no one
+        for n in range(5):
+            student = make_student(n)
+            for course in self.courses[:3]:
+                Enrollment.objects.create(student=student, course=course)
+        for n in range(5, 8):
+            student = make_student(n)
+            for course in self.courses[3:5]:
+                Enrollment.objects.create(student=student, course=course)
+        recommendations.refresh_similarities()
+
+    def test_similarities_stay_within_clusters(self):
+        pairs = set(CourseSimilarity.objects.values_list('course_id', 'similar_course_id'))
+
+        self.assertIn((self.courses[0].id, self.courses[1].id), pairs)
+        self.assertIn((self.courses[3].id, self.courses[4].id), pairs)
+        self.assertNotIn((self.courses[0].id, self.courses[3].id), pairs)
+
+    def test_recommends_co_enrolled_courses(self):
+        student = make_student(50)
+        Enrollment.objects.create(student=student, course=self.courses[0])
+
+        response = student_client(student).get('/api/students/courses/recommended/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({c['id'] for c in response.data['data']['courses']}, {self.courses[1].id, self.courses[2].id})
+
+    def test_students_without_enrollments_get_popular_courses(self):
+        response = student_client(make_student(60)).get('/api/students/courses/recommended/?limit=3')
+
+        self.assertEqual({c['id'] for c in response.data['data']['courses']}, {c.id for c in self.courses[:3]})
@@ -10,12 +10,17 @@ urlpatterns = [
     # Courses
     path('courses/', views.student_enrolled_courses, name='student_enrolled_courses'),
     path('courses/available/', views.available_courses, name='available_courses'),
+    path('courses/recommended/', views.recommended_courses, name='recommended_courses'),
     path('courses/<int:course_id>/enroll/', views.enroll_in_course, name='enroll_in_course'),
     path('courses/<int:course_id>/progress/', views.student_course_progress, name='student_course_progress'),
     
     # Progress tracking
     path('videos/<int:video_id>/complete/', views.mark_video_completed, name='mark_video_completed'),
+    path('videos/<int:video_id>/position/', views.video_watch_heartbeat, name='video_watch_heartbeat'),
     path('quizzes/<int:quiz_id>/complete/', views.mark_quiz_completed, name='mark_quiz_completed'),
+    path('quizzes/<int:quiz_id>/submit/', views.submit_quiz_attempt, name='submit_quiz_attempt'),
+    path('quizzes/submit/', views.submit_quiz_attempts_batch, name='submit_quiz_attempts_batch'),
+    path('events/', views.record_learning_events, name='record_learning_events'),
     
     # Payment history
     path('payments/', views.student_payment_history, name='student_payment_history'),
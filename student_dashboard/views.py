@@ -7,14 +7,27 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.db.models import Count, Q, Sum, Avg
 from django.utils import timezone
+from django.utils.http import parse_etags
 
 from courses.models import Course, Video, Quiz, Assignment, Enrollment, Progress
-from courses.serializers import CourseListSerializer, CourseDetailSerializer
+from courses import grading, progress, recommendations, watch
+from courses.tasks import flush_watch_positions
+from courses.serializers import (
+    CourseListSerializer, CourseDetailSerializer, course_detail_prefetches, course_list_prefetches
+)
 from payments.models import Payment
 from email_automation.tasks import send_enrollment_email
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from authentication.models import StudentProfile
+from .serializers import (
+    QuizSubmissionSerializer, BatchQuizSubmissionSerializer, QuizAttemptSerializer,
+    LearningEventBatchSerializer, WatchHeartbeatSerializer
+)
+from . import dashboard, events
+
+# Most quiz submissions one batch request may carry
+MAX_BATCH_SUBMISSIONS = 50
 
 
 @swagger_auto_schema(
@@ -34,54 +47,18 @@ def student_dashboard(request):
             'message': 'Access denied. Student privileges required.'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    student = request.user
-    student_profile = StudentProfile.objects.get(user=request.user)
-    
-    # Get student's enrollments
-    enrollments = Enrollment.objects.filter(student=student_profile)
-    total_enrollments = enrollments.count()
-    completed_courses = enrollments.filter(is_completed=True).count()
-    in_progress_courses = enrollments.filter(is_completed=False).count()
-    
-    # Get payment statistics
-    payments = Payment.objects.filter(user=student, is_successful=True)
-    total_spent = payments.aggregate(total=Sum('amount'))['total'] or 0
-    
-    # Get recent activities
-    recent_enrollments = enrollments.order_by('-enrolled_at')[:5]
-    recent_progress = Progress.objects.filter(student=student_profile).order_by('-completed_at')[:10]
-    
-    # Available courses (not enrolled)
-    enrolled_course_ids = enrollments.values_list('course_id', flat=True)
-    available_courses = Course.objects.filter(
-        is_active=True
-    ).exclude(id__in=enrolled_course_ids)[:6]
+    # Available courses are serialized for this request from the cached rows
+    data = dashboard.get_dashboard(request.user)
+    data = {
+        **data,
+        'available_courses': CourseListSerializer(
+            data['available_courses'], many=True, context={'request': request}
+        ).data
+    }
     
     return Response({
         'success': True,
-        'data': {
-            'profile_picture':student_profile.profile_picture.url,
-            'student_name': student.username,
-            'student_email': student.email,
-            'statistics': {
-                'total_enrollments': total_enrollments,
-                'completed_courses': completed_courses,
-                'in_progress_courses': in_progress_courses,
-                'total_spent': float(total_spent)
-            },
-            'recent_enrollments': [{
-                'id': enrollment.id,
-                'course': {
-                    'id': enrollment.course.id,
-                    'title': enrollment.course.title,
-                    'course_type': enrollment.course.course_type,
-                    'price': float(enrollment.course.price)
-                },
-                'enrolled_at': enrollment.enrolled_at,
-                'is_completed': enrollment.is_completed
-            } for enrollment in recent_enrollments],
-            'available_courses': CourseListSerializer(available_courses, many=True).data
-        }
+        'data': data
     }, status=status.HTTP_200_OK)
 
 
@@ -105,44 +82,31 @@ def student_enrolled_courses(request):
     
     student = request.user
     student_profile = StudentProfile.objects.get(user=request.user)
-    enrollments = Enrollment.objects.filter(student=student_profile).select_related('course')
+    select_lookups, prefetch_lookups = course_detail_prefetches('course__')
+    enrollments = Enrollment.objects.filter(student=student_profile).select_related(
+        'course', 'progress', *select_lookups
+    ).prefetch_related(*prefetch_lookups)
     
     courses_data = []
     for enrollment in enrollments:
         course = enrollment.course
         
-        # Calculate progress
-        total_items = (
-            course.videos.count() + 
-            course.quizzes.count() + 
-            course.assignments.count()
-        )
-        
-        completed_items = Progress.objects.filter(
-            student=student_profile,
-            course=course
-        ).count()
-        
-        progress_percentage = (completed_items / total_items * 100) if total_items > 0 else 0
+        # Completion counters are kept by the EnrollmentProgress rollup
+        progress = enrollment.get_progress()
         
         # Get payment status
         payment_status = 'free'
         if course.course_type == 'paid':
-            payment = Payment.objects.filter(
-                user=student,
-                course=course.id,  # Assuming meeting_id maps to course_id
-                is_successful=True
-            ).first()
-            payment_status = 'paid' if payment else 'pending'
+            payment_status = 'paid' if course.has_user_paid(student) else 'pending'
         
         course_data = {
             'enrollment_id': enrollment.id,
             'course': CourseDetailSerializer(course,context={'request': request}).data,
             'enrolled_at': enrollment.enrolled_at,
             'is_completed': enrollment.is_completed,
-            'progress_percentage': round(progress_percentage, 2),
-            'completed_items': completed_items,
-            'total_items': total_items,
+            'progress_percentage': round(progress.percentage, 2),
+            'completed_items': progress.completed_items,
+            'total_items': progress.total_items,
             'payment_status': payment_status
         }
         courses_data.append(course_data)
@@ -157,6 +121,54 @@ def student_enrolled_courses(request):
 
 
 
+@swagger_auto_schema(
+    method='get',
+    tags=['Student Dashboard'],
+    operation_summary="Get recommended courses for the student",
+    operation_description="Courses often taken together with the student's courses, "
+                          "precomputed nightly from co-enrollments.",
+    manual_parameters=[
+        openapi.Parameter(
+            'limit',
+            openapi.IN_QUERY,
+            description="Number of courses (1-24, default 10)",
+            type=openapi.TYPE_INTEGER
+        )
+    ]
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def recommended_courses(request):
+    """
+    Personalised "recommended for you" courses
+    """
+    if request.user.role != 'student':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Student privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 24)
+    except ValueError:
+        limit = 10
+    
+    student_profile = StudentProfile.objects.get(user=request.user)
+    select_lookups, prefetch_lookups = course_list_prefetches()
+    courses = recommendations.recommended_courses(
+        student_profile, limit,
+        queryset=Course.objects.select_related(*select_lookups).prefetch_related(*prefetch_lookups)
+    )
+    
+    return Response({
+        'success': True,
+        'data': {
+            'total_recommended': len(courses),
+            'courses': CourseListSerializer(courses, many=True, context={'request': request}).data
+        }
+    }, status=status.HTTP_200_OK)
+
+
 @swagger_auto_schema(
     method='post',
     tags=['Student Dashboard'],
@@ -206,13 +218,7 @@ def enroll_in_course(request, course_id):
         
         # For paid courses, check payment status
         if course.course_type == 'paid':
-            payment = Payment.objects.filter(
-                user=student,
-                course=course.id,
-                is_successful=True
-            ).first()
-            
-            if not payment:
+            if not course.has_user_paid(student):
                 return Response({
                     'success': False,
                     'message': 'Payment required for this course'
@@ -279,118 +285,51 @@ def student_course_progress(request, course_id):
             'message': 'Access denied. Student privileges required.'
         }, status=status.HTTP_403_FORBIDDEN)
     
-    student = request.user
-    student_profile = StudentProfile.objects.get(user=request.user)
+    # One query resolves the enrollment together with its course, stats and progress version
+    enrollment = Enrollment.objects.select_related('course__stats', 'progress').filter(
+        student__user=request.user,
+        course_id=course_id,
+        course__is_active=True
+    ).first()
     
-    try:
-        course = Course.objects.get(id=course_id, is_active=True)
-        
-        # Check if student is enrolled
-        enrollment = Enrollment.objects.filter(
-            student=student_profile,
-            course=course
-        ).first()
-        
-        if not enrollment:
+    if not enrollment:
+        if not Course.objects.filter(id=course_id, is_active=True).exists():
             return Response({
                 'success': False,
-                'message': 'Not enrolled in this course'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Get progress data
-        progress_records = Progress.objects.filter(
-            student=student_profile,
-            course=course
-        )
-        
-        # Videos progress
-        videos = course.videos.all()
-        completed_videos = progress_records.filter(video__isnull=False).values_list('video_id', flat=True)
-        
-        videos_data = []
-        for video in videos:
-            videos_data.append({
-                'id': video.id,
-                'title': video.title,
-                'duration': video.duration,
-                'order': video.order,
-                'completed': video.id in completed_videos
-            })
-        
-        # Quizzes progress
-        quizzes = course.quizzes.all()
-        completed_quizzes = progress_records.filter(quiz__isnull=False).values_list('quiz_id', flat=True)
-        
-        quizzes_data = []
-        for quiz in quizzes:
-            quizzes_data.append({
-                'id': quiz.id,
-                'title': quiz.title,
-                'passing_score': quiz.passing_score,
-                'completed': quiz.id in completed_quizzes
-            })
-        
-        # Assignments progress
-        assignments = course.assignments.all()
-        completed_assignments = progress_records.filter(assignment__isnull=False).values_list('assignment_id', flat=True)
-        
-        assignments_data = []
-        for assignment in assignments:
-            assignments_data.append({
-                'id': assignment.id,
-                'title': assignment.title,
-                'due_date': assignment.due_date,
-                'completed': assignment.id in completed_assignments
-            })
-        
-        # Calculate overall progress
-        total_items = len(videos_data) + len(quizzes_data) + len(assignments_data)
-        completed_items = len(completed_videos) + len(completed_quizzes) + len(completed_assignments)
-        progress_percentage = (completed_items / total_items * 100) if total_items > 0 else 0
-        
-        return Response({
-            'success': True,
-            'data': {
-                'course': {
-                    'id': course.id,
-                    'title': course.title,
-                    'description': course.description
-                },
-                'enrollment': {
-                    'enrolled_at': enrollment.enrolled_at,
-                    'is_completed': enrollment.is_completed
-                },
-                'progress': {
-                    'percentage': round(progress_percentage, 2),
-                    'completed_items': completed_items,
-                    'total_items': total_items
-                },
-                'videos': {
-                    'total': len(videos_data),
-                    'completed': len(completed_videos),
-                    'pending': len(videos_data) - len(completed_videos),
-                    'list': videos_data
-                },
-                'quizzes': {
-                    'total': len(quizzes_data),
-                    'completed': len(completed_quizzes),
-                    'pending': len(quizzes_data) - len(completed_quizzes),
-                    'list': quizzes_data
-                },
-                'assignments': {
-                    'total': len(assignments_data),
-                    'completed': len(completed_assignments),
-                    'pending': len(assignments_data) - len(completed_assignments),
-                    'list': assignments_data
-                }
-            }
-        }, status=status.HTTP_200_OK)
-        
-    except Course.DoesNotExist:
+                'message': 'Course not found'
+            }, status=status.HTTP_404_NOT_FOUND)
         return Response({
             'success': False,
-            'message': 'Course not found'
-        }, status=status.HTTP_404_NOT_FOUND)
+            'message': 'Not enrolled in this course'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    course = enrollment.course
+    completed = progress.completed_item_ids(enrollment)
+    
+    etag = progress.progress_etag(course, completed)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    
+    sections = progress.course_progress(progress.get_outline(course), completed)
+    
+    return Response({
+        'success': True,
+        'data': {
+            'course': {
+                'id': course.id,
+                'title': course.title,
+                'description': course.description
+            },
+            'enrollment': {
+                'enrolled_at': enrollment.enrolled_at,
+                'is_completed': enrollment.is_completed
+            },
+            'progress': sections['progress'],
+            'videos': sections['videos'],
+            'quizzes': sections['quizzes'],
+            'assignments': sections['assignments']
+        }
+    }, status=status.HTTP_200_OK, headers={'ETag': etag})
 
 
 @swagger_auto_schema(
@@ -463,6 +402,54 @@ def mark_video_completed(request, video_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@swagger_auto_schema(
+    method='post',
+    tags=['Student Dashboard'],
+    operation_summary="Report the current playback position of a video",
+    operation_description="Player heartbeat. Positions are buffered and written in bulk; "
+                          "watching past the completion threshold marks the video completed.",
+    request_body=WatchHeartbeatSerializer
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def video_watch_heartbeat(request, video_id):
+    """
+    Buffer the student's playback position for a video
+    """
+    if request.user.role != 'student':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Student privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = WatchHeartbeatSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        entry = watch.record_heartbeat(
+            request.user, video_id,
+            serializer.validated_data['position_seconds'],
+            serializer.validated_data.get('duration_seconds')
+        )
+    except watch.WatchError as e:
+        return Response({
+            'success': False,
+            'message': e.message
+        }, status=e.status_code)
+    
+    if watch.is_flush_due():
+        flush_watch_positions.delay()
+    
+    return Response({
+        'success': True,
+        'data': {'position_seconds': entry['position']}
+    }, status=status.HTTP_202_ACCEPTED)
+
+
 @swagger_auto_schema(
     method='post',
     tags=['Student Dashboard'],
@@ -508,6 +495,13 @@ def mark_quiz_completed(request, quiz_id):
                 'message': 'Not enrolled in this course'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        # Completion is earned by a graded attempt at or above the passing score
+        if quiz.questions.exists() and not grading.has_passed(student_profile, quiz):
+            return Response({
+                'success': False,
+                'message': 'Submit a passing attempt to complete this quiz'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
         # Mark quiz as completed
         progress, created = Progress.objects.get_or_create(
             student=student_profile,
@@ -535,6 +529,163 @@ def mark_quiz_completed(request, quiz_id):
 
 
 
+@swagger_auto_schema(
+    method='post',
+    tags=['Student Dashboard'],
+    operation_summary="Submit answers to a quiz for grading",
+    request_body=QuizSubmissionSerializer,
+    responses={201: QuizAttemptSerializer}
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_quiz_attempt(request, quiz_id):
+    """
+    Grade a quiz submission on the server; passing marks the quiz completed
+    """
+    if request.user.role != 'student':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Student privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    student_profile = StudentProfile.objects.get(user=request.user)
+    
+    try:
+        quiz = Quiz.objects.select_related('course__stats').get(id=quiz_id)
+    except Quiz.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Quiz not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if not Enrollment.objects.filter(student=student_profile, course_id=quiz.course_id).exists():
+        return Response({
+            'success': False,
+            'message': 'Not enrolled in this course'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    serializer = QuizSubmissionSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    attempt = grading.submit_attempt(student_profile, quiz, serializer.validated_data['answers'])
+    return Response({
+        'success': True,
+        'message': 'Quiz passed' if attempt.passed else 'Quiz not passed',
+        'data': QuizAttemptSerializer(attempt).data
+    }, status=status.HTTP_201_CREATED)
+
+
+@swagger_auto_schema(
+    method='post',
+    tags=['Student Dashboard'],
+    operation_summary="Submit several quiz attempts at once",
+    request_body=BatchQuizSubmissionSerializer(many=True),
+    responses={201: QuizAttemptSerializer(many=True)}
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_quiz_attempts_batch(request):
+    """
+    Grade a list of {quiz, answers} submissions, e.g. queued by an offline
+    client, and store them together
+    """
+    if request.user.role != 'student':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Student privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = BatchQuizSubmissionSerializer(data=request.data, many=True, allow_empty=False)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    submissions = serializer.validated_data
+    if len(submissions) > MAX_BATCH_SUBMISSIONS:
+        return Response({
+            'success': False,
+            'message': f'At most {MAX_BATCH_SUBMISSIONS} submissions per request'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    student_profile = StudentProfile.objects.get(user=request.user)
+    quizzes = Quiz.objects.select_related('course__stats').in_bulk(
+        {submission['quiz'] for submission in submissions}
+    )
+    enrolled = set(Enrollment.objects.filter(
+        student=student_profile,
+        course_id__in={quiz.course_id for quiz in quizzes.values()}
+    ).values_list('course_id', flat=True))
+    
+    errors = {}
+    for index, submission in enumerate(submissions):
+        quiz = quizzes.get(submission['quiz'])
+        if quiz is None:
+            errors[index] = 'Quiz not found'
+        elif quiz.course_id not in enrolled:
+            errors[index] = 'Not enrolled in this course'
+    if errors:
+        return Response({
+            'success': False,
+            'errors': errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    keys = {quiz_id: grading.get_answer_key(quiz) for quiz_id, quiz in quizzes.items()}
+    attempts = grading.record_attempts(student_profile, [
+        (quizzes[submission['quiz']], grading.grade(keys[submission['quiz']], submission['answers']))
+        for submission in submissions
+    ])
+    return Response({
+        'success': True,
+        'message': f'{len(attempts)} quiz attempts graded',
+        'data': QuizAttemptSerializer(attempts, many=True).data
+    }, status=status.HTTP_201_CREATED)
+
+
+@swagger_auto_schema(
+    method='post',
+    tags=['Student Dashboard'],
+    operation_summary="Record a batch of learning events",
+    operation_description="Apply many completion and video_progress events (e.g. queued offline) "
+                          "in one request. Duplicates are ignored, progress positions are buffered "
+                          "like player heartbeats and events the student may not record are "
+                          "reported under `rejected`.",
+    request_body=LearningEventBatchSerializer
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def record_learning_events(request):
+    """
+    Apply a batch of completion and progress events
+    """
+    if request.user.role != 'student':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Student privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    serializer = LearningEventBatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    student_profile = StudentProfile.objects.get(user=request.user)
+    summary = events.apply_events(student_profile, serializer.validated_data['events'])
+    if summary['positions_recorded'] and watch.is_flush_due():
+        flush_watch_positions.delay()
+    return Response({
+        'success': True,
+        'message': f"{summary['applied']} events applied",
+        'data': summary
+    }, status=status.HTTP_200_OK)
+
+
 @swagger_auto_schema(
     method='get',
     tags=['Student Dashboard'],
@@ -1,3 +1,16 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import TeacherStats, UploadSession
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'owner', 'purpose', 'filename', 'offset', 'total_size', 'status', 'updated_at']
+    list_filter = ['purpose', 'status']
+    readonly_fields = ['offset', 'created_at', 'updated_at']
+
+
+@admin.register(TeacherStats)
+class TeacherStatsAdmin(admin.ModelAdmin):
+    list_display = ['teacher', 'total_courses', 'active_courses', 'total_students', 'total_videos', 'updated_at']
+    readonly_fields = ['updated_at']
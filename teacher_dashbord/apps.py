@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TeacherDashbordConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'teacher_dashbord'
+
+    def ready(self):
+        import teacher_dashbord.signals
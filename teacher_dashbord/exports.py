@@ -0,0 +1,250 @@
+# teacher_dashboard/exports.py
+
+"""
+Course roster and gradebook export.
+
+The roster queryset carries everything a row needs (the progress rollup,
+the latest completion, quiz attempt and playback heartbeat, and for
+exports the best score on every quiz of the course) so each row is
+self-contained. Exports walk it with `.iterator()` and hand the rows to a
+writer that yields encoded chunks as it goes, which StreamingHttpResponse
+sends straight to the client. Neither side ever holds more than one chunk
+of enrollments, so memory stays flat however large the class is.
+
+XLSX files are written with zipfile onto a write-only buffer that is
+drained after every row. The sheet uses inline strings, so no shared
+string table has to be built up front.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from courses.models import (
+    Enrollment, EnrollmentProgress, Progress, Quiz, QuizAttempt, VideoWatchPosition, course_total_items
+)
+
+EXPORT_CHUNK_SIZE = 500
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Leading characters spreadsheet apps read as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Control characters XML 1.0 does not allow
+ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _latest(model, field, **filters):
+    rows = model.objects.filter(student=OuterRef('student'), **filters).order_by().values('student')
+    return Subquery(rows.annotate(latest=Max(field)).values('latest'))
+
+
+def roster_queryset(course):
+    """
+    Enrollments of a course, newest first, annotated for the roster and export rows
+    """
+    return Enrollment.objects.filter(course=course).select_related(
+        'student__user', 'course', 'progress'
+    ).annotate(
+        last_completed_at=_latest(Progress, 'completed_at', course=OuterRef('course')),
+        last_attempt_at=_latest(QuizAttempt, 'submitted_at', quiz__course=OuterRef('course')),
+        last_watched_at=_latest(VideoWatchPosition, 'updated_at', video__course=OuterRef('course')),
+    ).order_by('-enrolled_at', '-id')
+
+
+def last_activity(enrollment):
+    """
+    Most recent learning activity of an annotated enrollment
+    """
+    moments = [
+        enrollment.enrolled_at,
+        enrollment.last_completed_at,
+        enrollment.last_attempt_at,
+        enrollment.last_watched_at,
+    ]
+    return max(moment for moment in moments if moment is not None)
+
+
+def progress_percentage(enrollment):
+    """
+    Percentage from the progress rollup. Enrollments without one are counted
+    read-only instead of rebuilding it, since exports run mid-response.
+    """
+    try:
+        return enrollment.progress.percentage
+    except EnrollmentProgress.DoesNotExist:
+        total = course_total_items(enrollment.course_id)
+        completed = Progress.objects.filter(
+            student_id=enrollment.student_id, course_id=enrollment.course_id
+        ).count()
+        return completed * 100 / total if total else 0
+
+
+def gradebook(course):
+    """
+    (header, rows): rows is a generator over every enrollment of the course
+    with the student's best score on each quiz
+    """
+    quizzes = list(Quiz.objects.filter(course=course).order_by('order', 'id').values_list('id', 'title'))
+    enrollments = roster_queryset(course).annotate(**{
+        f'quiz_score_{quiz_id}': Subquery(
+            QuizAttempt.objects.filter(
+                student=OuterRef('student'), quiz_id=quiz_id
+            ).order_by('-score').values('score')[:1]
+        )
+        for quiz_id, _ in quizzes
+    })
+
+    header = ['Student', 'Email', 'Enrolled at', 'Progress (%)', 'Completed', 'Last activity']
+    header += [f'Quiz: {title}' for _, title in quizzes]
+
+    def rows():
+        for enrollment in enrollments.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            student = enrollment.student
+            yield [
+                student.full_name.strip() or student.user.username,
+                student.email or student.user.email,
+                timezone.localtime(enrollment.enrolled_at).strftime('%Y-%m-%d %H:%M'),
+                round(progress_percentage(enrollment), 2),
+                'yes' if enrollment.is_completed else 'no',
+                timezone.localtime(last_activity(enrollment)).strftime('%Y-%m-%d %H:%M'),
+            ] + [getattr(enrollment, f'quiz_score_{quiz_id}') for quiz_id, _ in quizzes]
+
+    return header, rows()
+
+
+class _Echo:
+    """File-like object whose write() hands the value back (see the Django CSV streaming docs)"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(_Echo())
+    # BOM so Excel opens the file as UTF-8
+    yield '\ufeff' + writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_cell(value) for value in row])
+
+
+class _DrainBuffer(io.RawIOBase):
+    """Write-only, unseekable sink collecting what zipfile writes until drained"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _column_name(index):
+    name = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(65 + remainder) + name
+    return name
+
+
+def _xlsx_row(number, values):
+    cells = []
+    for index, value in enumerate(values):
+        ref = f'{_column_name(index)}{number}'
+        if value is None:
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        else:
+            text = escape(ILLEGAL_XML_CHARS.sub('', str(value)))
+            cells.append(f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f'<row r="{number}">{"".join(cells)}</row>'
+
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Students" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def stream_xlsx(header, rows):
+    buffer = _DrainBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(1, header).encode())
+            for number, row in enumerate(rows, start=2):
+                sheet.write(_xlsx_row(number, row).encode())
+                data = buffer.drain()
+                if data:
+                    yield data
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'xlsx': (stream_xlsx, XLSX_CONTENT_TYPE),
+}
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from authentication.models import TeacherProfile
+from teacher_dashbord.models import TeacherStats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-teacher dashboard counters from the source tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--teacher',
+            type=int,
+            action='append',
+            dest='teacher_ids',
+            help='Only rebuild the given teacher profile id (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        teachers = TeacherProfile.objects.all()
+        if options['teacher_ids']:
+            teachers = teachers.filter(id__in=options['teacher_ids'])
+
+        rebuilt_count = 0
+        for teacher in teachers.iterator():
+            TeacherStats.rebuild(teacher)
+            rebuilt_count += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✓ Rebuilt statistics for {rebuilt_count} teachers')
+        )
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('teacher_dashbord', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_courses', models.PositiveIntegerField(default=0)),
+                ('active_courses', models.PositiveIntegerField(default=0)),
+                ('total_students', models.PositiveIntegerField(default=0)),
+                ('total_videos', models.PositiveIntegerField(default=0)),
+                ('total_quizzes', models.PositiveIntegerField(default=0)),
+                ('total_live_classes', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('teacher', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='authentication.teacherprofile')),
+            ],
+        ),
+    ]
@@ -1,3 +1,152 @@
+import os
+import uuid
+
+from django.conf import settings
 from django.db import models
+from django.db.models import F, Value, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from authentication.models import TeacherProfile, User
+from courses.models import Course, Enrollment, Quiz, Video
+
+
+class UploadSession(models.Model):
+    """
+    A resumable (tus-style) upload in progress. Chunks are appended to a
+    partial file on disk until `offset` reaches `total_size`, then the file
+    is moved into place and attached to its target (see uploads.py).
+    """
+    PURPOSES = [
+        ('video', 'Course Video'),
+        ('resume', 'Resume'),
+        ('degree_certificates', 'Degree Certificates'),
+        ('id_proof', 'ID Proof'),
+    ]
+
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('completed', 'Completed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    purpose = models.CharField(max_length=30, choices=PURPOSES)
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+
+    # Video uploads either replace an existing video's file or create a new
+    # video in `course` from `metadata` once the upload completes
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, null=True, blank=True)
+    video = models.ForeignKey(Video, on_delete=models.SET_NULL, null=True, blank=True)
+    metadata = models.JSONField(default=dict, blank=True)
+
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.owner.username} - {self.filename} ({self.offset}/{self.total_size})"
+
+    @property
+    def partial_path(self):
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', 'partial', f'{self.id}.part')
+
+    @property
+    def is_complete(self):
+        return self.offset >= self.total_size
+
+
+class TeacherStats(models.Model):
+    """
+    Denormalized per-teacher counters for the teacher dashboard. Kept up to
+    date incrementally by the signals in teacher_dashbord/signals.py and
+    rebuilt with `manage.py rebuild_teacher_stats`.
+    """
+    teacher = models.OneToOneField(TeacherProfile, on_delete=models.CASCADE, related_name='stats')
+    total_courses = models.PositiveIntegerField(default=0)
+    active_courses = models.PositiveIntegerField(default=0)
+    total_students = models.PositiveIntegerField(default=0)
+    total_videos = models.PositiveIntegerField(default=0)
+    total_quizzes = models.PositiveIntegerField(default=0)
+    total_live_classes = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.teacher}"
+
+    @classmethod
+    def rebuild(cls, teacher):
+        """Recount every counter for a teacher from the source tables"""
+        from meetings.models import Meeting
+
+        courses = Course.objects.filter(teacher=teacher)
+        stats, _ = cls.objects.update_or_create(
+            teacher=teacher,
+            defaults={
+                'total_courses': courses.count(),
+                'active_courses': courses.filter(is_active=True).count(),
+                'total_students': Enrollment.objects.filter(course__teacher=teacher).count(),
+                'total_videos': Video.objects.filter(course__teacher=teacher).count(),
+                'total_quizzes': Quiz.objects.filter(course__teacher=teacher).count(),
+                'total_live_classes': Meeting.objects.filter(
+                    course__teacher=teacher, meeting_type='lecture'
+                ).count(),
+            }
+        )
+        teacher.stats = stats
+        return stats
+
+    @classmethod
+    def for_teacher(cls, teacher):
+        """Return the counters, building them on first access"""
+        try:
+            return teacher.stats
+        except cls.DoesNotExist:
+            return cls.rebuild(teacher)
+
+    @classmethod
+    def _updates(cls, deltas):
+        return {
+            field: Greatest(F(field) + delta, Value(0))
+            for field, delta in deltas.items()
+        }
+
+    @classmethod
+    def bump(cls, teacher_id, **deltas):
+        """
+        Atomically add deltas to a teacher's counters. Missing rows are left
+        alone and get rebuilt lazily by for_teacher().
+        """
+        cls.objects.filter(teacher_id=teacher_id).update(
+            updated_at=timezone.now(), **cls._updates(deltas)
+        )
+
+    @classmethod
+    def bump_for_course(cls, course_id, **deltas):
+        """bump() for the teacher of a course, resolved inside the UPDATE"""
+        teacher_id = Course.objects.filter(id=course_id).values('teacher_id')[:1]
+        cls.objects.filter(teacher_id=Subquery(teacher_id)).update(
+            updated_at=timezone.now(), **cls._updates(deltas)
+        )
+
+    @classmethod
+    def refresh_active_courses(cls, teacher_id):
+        active = Course.objects.filter(teacher_id=teacher_id, is_active=True).count()
+        cls.objects.filter(teacher_id=teacher_id).update(active_courses=active, updated_at=timezone.now())
+
+    @classmethod
+    def refresh_live_classes(cls, teacher_id):
+        from meetings.models import Meeting
 
-# Create your models here.
+        live_classes = Meeting.objects.filter(course__teacher_id=teacher_id, meeting_type='lecture').count()
+        cls.objects.filter(teacher_id=teacher_id).update(
+            total_live_classes=live_classes, updated_at=timezone.now()
+        )
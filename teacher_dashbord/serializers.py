@@ -1,9 +1,12 @@
 # teacher_dashboard/serializers.py
 
 from rest_framework import serializers
-from courses.models import Course, Video, Quiz, Assignment, Enrollment , Question
+from courses.models import Course, CourseFunnel, Video, Quiz, Assignment, Enrollment , Question, QuizAnalytics, Topic
+from courses.serializers import VideoDurationField, video_playback
 
 from meetings.models import Meeting
+from .models import UploadSession
+from . import exports
 
 
 class TeacherCourseSerializer(serializers.ModelSerializer):
@@ -22,30 +25,44 @@ class TeacherCourseSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'total_videos', 'total_enrollments', 'total_quizzes','total_live_classes']
     
+    # Course.with_teacher_counts() annotations, when the queryset carries them
     def get_total_videos(self, obj):
-        return obj.videos.count()
+        total = getattr(obj, 'video_total', None)
+        return obj.videos.count() if total is None else total
     
     def get_total_live_classes(self, obj):
-        return obj.get_live_classes().count()
+        total = getattr(obj, 'live_class_total', None)
+        return obj.get_live_classes().count() if total is None else total
     
     def get_total_enrollments(self, obj):
-        return obj.enrollments.count()
+        total = getattr(obj, 'enrollment_total', None)
+        return obj.enrollments.count() if total is None else total
     
     def get_total_quizzes(self, obj):
-        return obj.quizzes.count()
+        total = getattr(obj, 'quiz_total', None)
+        return obj.quizzes.count() if total is None else total
 
 
 class TeacherVideoSerializer(serializers.ModelSerializer):
+    duration = VideoDurationField(source='duration_seconds', required=False)
     has_quiz = serializers.SerializerMethodField()
     has_assignment = serializers.SerializerMethodField()
+    playback = serializers.SerializerMethodField()
     
     class Meta:
         model = Video
         fields = [
             'id', 'title', 'description', 'video_file', 'duration', 
-            'order', 'created_at', 'has_quiz', 'has_assignment'
+            'order', 'created_at', 'has_quiz', 'has_assignment',
+            'is_free_preview', 'processing_status', 'processing_error', 'poster', 'playback'
         ]
-        read_only_fields = ['id', 'created_at', 'has_quiz', 'has_assignment']
+        read_only_fields = [
+            'id', 'created_at', 'has_quiz', 'has_assignment',
+            'processing_status', 'processing_error', 'poster', 'playback'
+        ]
+
+    def get_playback(self, obj):
+        return video_playback(obj, self.context.get('request'))
     
     def get_has_quiz(self, obj):
         return obj.quizzes.exists()
@@ -78,19 +95,45 @@ class TeacherQuizSerializer(serializers.ModelSerializer):
             Question.objects.create(quiz=quiz, **question_data)
         return quiz
 
+
+class QuizAnalyticsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuizAnalytics
+        fields = [
+            'attempt_count', 'student_count', 'mean_score', 'median_score',
+            'score_std', 'pass_rate', 'score_histogram', 'question_stats', 'computed_at'
+        ]
+
+
+class CourseFunnelSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CourseFunnel
+        fields = ['enrolled_count', 'finished_count', 'median_seconds_to_finish', 'steps', 'computed_at']
+
 class EnrolledStudentSerializer(serializers.ModelSerializer):
-    student_username = serializers.CharField(source='student.username', read_only=True)
+    student_name = serializers.CharField(source='student.full_name', read_only=True)
+    student_username = serializers.CharField(source='student.user.username', read_only=True)
     student_email = serializers.CharField(source='student.email', read_only=True)
     course_title = serializers.CharField(source='course.title', read_only=True)
+    progress_percentage = serializers.SerializerMethodField()
+    last_activity = serializers.SerializerMethodField()
     
     class Meta:
         model = Enrollment
         fields = [
-            'id', 'course_title', 'enrolled_at', 'is_completed'
-            'student_username', 'student_email'  # Add these when student model is ready
+            'id', 'course_title', 'enrolled_at', 'is_completed',
+            'student_name', 'student_username', 'student_email',
+            'progress_percentage', 'last_activity'
         ]
         read_only_fields = ['id', 'enrolled_at', 'course_title']
 
+    def get_progress_percentage(self, obj):
+        return exports.progress_percentage(obj)
+
+    # Expects the exports.roster_queryset() annotations
+    def get_last_activity(self, obj):
+        return exports.last_activity(obj)
+
 
 class TeacherAssignmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -122,4 +165,81 @@ class LiveClassSerializer(serializers.ModelSerializer):
     
 
 
-    
\ No newline at end of file
+    
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'purpose', 'filename', 'total_size', 'offset', 'status',
+            'course', 'video', 'created_at', 'updated_at'
+        ]
+        read_only_fields = fields
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    """
+    Starts a resumable upload. Video uploads name either an existing `video`
+    to replace its file, or a `course` plus the new video's details.
+    """
+    purpose = serializers.ChoiceField(choices=UploadSession.PURPOSES)
+    filename = serializers.CharField(max_length=255)
+    total_size = serializers.IntegerField(min_value=1)
+    course = serializers.IntegerField(required=False)
+    video = serializers.IntegerField(required=False)
+    title = serializers.CharField(max_length=200, required=False)
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    topic = serializers.IntegerField(required=False, allow_null=True, default=None)
+    order = serializers.IntegerField(required=False, min_value=0, default=0)
+    duration = VideoDurationField(required=False, default=0)
+    is_free_preview = serializers.BooleanField(required=False, default=False)
+
+    def validate_total_size(self, value):
+        max_size = self.context['max_size']
+        if value > max_size:
+            raise serializers.ValidationError(f'Uploads are limited to {max_size} bytes.')
+        return value
+
+    def validate(self, data):
+        teacher = self.context['teacher']
+        if data['purpose'] != 'video':
+            return data
+
+        if data.get('video'):
+            video = Video.objects.filter(id=data['video'], course__teacher=teacher).first()
+            if video is None:
+                raise serializers.ValidationError({'video': 'Video not found'})
+            data['video'] = video
+            return data
+
+        if not data.get('course') or not data.get('title'):
+            raise serializers.ValidationError('Either video, or course and title, are required.')
+        course = Course.objects.filter(id=data['course'], teacher=teacher).first()
+        if course is None:
+            raise serializers.ValidationError({'course': 'Course not found'})
+        data['course'] = course
+        if data['topic'] is not None and not Topic.objects.filter(id=data['topic'], course=course).exists():
+            raise serializers.ValidationError({'topic': 'Topic not found in this course'})
+        return data
+
+    def create(self, validated_data):
+        session = UploadSession(
+            owner=self.context['teacher'].user,
+            purpose=validated_data['purpose'],
+            filename=validated_data['filename'],
+            total_size=validated_data['total_size'],
+        )
+        if session.purpose == 'video':
+            session.video = validated_data.get('video')
+            if session.video is None:
+                session.course = validated_data['course']
+                session.metadata = {
+                    'title': validated_data['title'],
+                    'description': validated_data['description'],
+                    'topic_id': validated_data['topic'],
+                    'order': validated_data['order'],
+                    'duration_seconds': validated_data['duration'],
+                    'is_free_preview': validated_data['is_free_preview'],
+                }
+        session.save()
+        return session
@@ -0,0 +1,94 @@
+# teacher_dashbord/signals.py
+
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from authentication.models import TeacherProfile
+from courses.models import Course, Enrollment, Quiz, Video
+from meetings.models import Meeting
+from .models import TeacherStats
+
+
+# Which TeacherStats counter each per-course model feeds
+COUNTED_MODELS = {
+    Video: 'total_videos',
+    Quiz: 'total_quizzes',
+    Enrollment: 'total_students',
+}
+
+
+@receiver(pre_save, sender=Course)
+def remember_course_teacher(sender, instance, **kwargs):
+    """
+    Note the stored teacher so a reassignment can recount both teachers
+    """
+    instance._previous_teacher_id = None
+    if not instance._state.adding:
+        instance._previous_teacher_id = Course.objects.filter(id=instance.id).values_list(
+            'teacher_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Course)
+def track_course_saved(sender, instance, created, **kwargs):
+    previous_teacher_id = getattr(instance, '_previous_teacher_id', None)
+    if created:
+        TeacherStats.bump(instance.teacher_id, total_courses=1, active_courses=int(instance.is_active))
+    elif previous_teacher_id and previous_teacher_id != instance.teacher_id:
+        # The course took its content, students and meetings along
+        for teacher in TeacherProfile.objects.filter(id__in=[previous_teacher_id, instance.teacher_id]):
+            TeacherStats.rebuild(teacher)
+    else:
+        # is_active may have been toggled
+        TeacherStats.refresh_active_courses(instance.teacher_id)
+
+
+@receiver(post_delete, sender=Course)
+def track_course_deleted(sender, instance, **kwargs):
+    TeacherStats.bump(instance.teacher_id, total_courses=-1)
+    TeacherStats.refresh_active_courses(instance.teacher_id)
+
+
+def track_content_saved(sender, instance, created, **kwargs):
+    if created:
+        TeacherStats.bump_for_course(instance.course_id, **{COUNTED_MODELS[sender]: 1})
+
+
+def track_content_deleted(sender, instance, **kwargs):
+    TeacherStats.bump_for_course(instance.course_id, **{COUNTED_MODELS[sender]: -1})
+
+
+for counted_model in COUNTED_MODELS:
+    post_save.connect(
+        track_content_saved, sender=counted_model,
+        dispatch_uid=f'teacher_stats_saved_{counted_model.__name__}'
+    )
+    post_delete.connect(
+        track_content_deleted, sender=counted_model,
+        dispatch_uid=f'teacher_stats_deleted_{counted_model.__name__}'
+    )
+
+
+@receiver(pre_save, sender=Meeting)
+def remember_meeting_course(sender, instance, **kwargs):
+    """
+    Note the stored course so a meeting moved between courses is uncounted
+    from the old course's teacher
+    """
+    instance._previous_course_id = None
+    if not instance._state.adding:
+        instance._previous_course_id = Meeting.objects.filter(id=instance.id).values_list(
+            'course_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Meeting)
+@receiver(post_delete, sender=Meeting)
+def track_live_classes(sender, instance, **kwargs):
+    """
+    Recount lecture meetings; a meeting's type or course can change on edit
+    """
+    course_ids = {instance.course_id, getattr(instance, '_previous_course_id', None)} - {None}
+    teacher_ids = Course.objects.filter(id__in=course_ids).values_list('teacher_id', flat=True).distinct()
+    for teacher_id in teacher_ids:
+        TeacherStats.refresh_live_classes(teacher_id)
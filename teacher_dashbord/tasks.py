@@ -0,0 +1,31 @@
+# teacher_dashboard/tasks.py
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .models import UploadSession
+from . import uploads
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def cleanup_stale_uploads():
+    """
+    Drop resumable uploads that have not received a chunk for a while,
+    together with their partial files
+    """
+    expiry_hours = getattr(settings, 'RESUMABLE_UPLOAD_EXPIRY_HOURS', 48)
+    cutoff = timezone.now() - timedelta(hours=expiry_hours)
+    stale = UploadSession.objects.filter(status='active', updated_at__lt=cutoff)
+
+    removed = 0
+    for session in stale.iterator():
+        uploads.discard(session)
+        removed += 1
+
+    logger.info(f"Removed {removed} stale upload sessions")
+    return removed
@@ -1,3 +1,317 @@
-from django.test import TestCase
+import base64
+import csv
+import io
+import zipfile
+import fcntl
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from courses import grading
+from courses.models import Course, Enrollment, EnrollmentProgress, Question, Quiz, Video
+from meetings.models import Meeting
+from .models import TeacherStats, UploadSession
+from .tasks import cleanup_stale_uploads
+
+
+def make_teacher(n=0):
+    user = User.objects.create_user(email=f'teacher{n}@example.com', username=f'teacher{n}', password='x', role='teacher')
+    return user.teacher_profile
+
+
+def make_student(n=0):
+    user = User.objects.create_user(email=f'student{n}@example.com', username=f'student{n}', password='x', role='student')
+    return user.student_profile
+
+
+def tus_metadata(**values):
+    return ','.join(f'{key} {base64.b64encode(value.encode()).decode()}' for key, value in values.items())
+
+
+def sha1_checksum(data):
+    return 'sha1 ' + base64.b64encode(hashlib.sha1(data).digest()).decode()
+
+
+class ResumableUploadTests(TestCase):
+    chunk_size = 64 * 1024
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+        self.teacher = make_teacher()
+        self.course = Course.objects.create(title='U', description='d', teacher=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(id=self.teacher.user_id))
+        self.payload = os.urandom(3 * self.chunk_size + 17)
+
+    def create_video_upload(self):
+        response = self.client.post(
+            '/api/teacher/uploads/', {'course': self.course.id, 'title': 'Big lecture', 'duration': '10:00'},
+            format='json', HTTP_UPLOAD_LENGTH=str(len(self.payload)),
+            HTTP_UPLOAD_METADATA=tus_metadata(filename='lecture.mp4', purpose='video')
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        return response['Location'].replace('http://testserver', '')
+
+    def patch(self, url, offset, data, checksum=None):
+        headers = {'HTTP_UPLOAD_OFFSET': str(offset)}
+        if checksum:
+            headers['HTTP_UPLOAD_CHECKSUM'] = checksum
+        return self.client.generic('PATCH', url, data, content_type='application/offset+octet-stream', **headers)
+
+    def session(self, url):
+        return UploadSession.objects.get(id=url.rstrip('/').rsplit('/', 1)[1])
+
+    def test_chunked_upload_attaches_video(self):
+        url = self.create_video_upload()
+
+        offset = 0
+        while offset < len(self.payload):
+            chunk = self.payload[offset:offset + self.chunk_size]
+            response = self.patch(url, offset, chunk, sha1_checksum(chunk))
+            self.assertEqual(response.status_code, 204, response.content)
+            offset = int(response['Upload-Offset'])
+
+        data = self.client.get(url).json()['data']
+        self.assertEqual(data['status'], 'completed')
+        video = Video.objects.get(id=data['video'])
+        self.assertEqual((video.title, video.duration_seconds), ('Big lecture', 600))
+        with open(video.video_file.path, 'rb') as f:
+            self.assertEqual(f.read(), self.payload)
+
+    def test_offset_mismatch_is_rejected(self):
+        url = self.create_video_upload()
+        self.patch(url, 0, self.payload[:self.chunk_size])
+
+        response = self.patch(url, 0, self.payload[:self.chunk_size])
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.head(url)['Upload-Offset'], str(self.chunk_size))
+
+    def test_checksum_mismatch_discards_the_chunk(self):
+        url = self.create_video_upload()
+
+        response = self.patch(url, 0, self.payload[:self.chunk_size], sha1_checksum(b'something else'))
+
+        self.assertEqual(response.status_code, 460)
+        self.assertEqual(self.client.head(url)['Upload-Offset'], '0')
+        self.assertEqual(os.path.getsize(self.session(url).partial_path), 0)
+
+    def test_concurrent_chunk_gets_locked_response(self):
+        url = self.create_video_upload()
+        self.patch(url, 0, self.payload[:self.chunk_size])
+        session = self.session(url)
+
+        with open(session.partial_path, 'rb') as held:
+            fcntl.flock(held, fcntl.LOCK_EX)
+            response = self.patch(url, self.chunk_size, self.payload[self.chunk_size:2 * self.chunk_size])
+
+        self.assertEqual(response.status_code, 423)
+        self.assertEqual(os.path.getsize(session.partial_path), self.chunk_size)
+        session.refresh_from_db()
+        self.assertEqual(session.offset, self.chunk_size)
+
+    def test_document_upload_attaches_to_profile(self):
+        response = self.client.post(
+            '/api/teacher/uploads/', {'purpose': 'resume', 'filename': 'cv.pdf', 'total_size': 5}, format='json'
+        )
+        url = response['Location'].replace('http://testserver', '')
+
+        self.assertEqual(self.patch(url, 0, b'hello').status_code, 204)
+
+        self.teacher.refresh_from_db()
+        self.assertTrue(self.teacher.resume.name.startswith('teacher_documents/resumes/cv'))
+
+    def test_video_upload_needs_a_course(self):
+        response = self.client.post(
+            '/api/teacher/uploads/', {'purpose': 'video', 'filename': 'a.mp4', 'total_size': 5}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_users_cannot_append(self):
+        url = self.create_video_upload()
+        other = make_teacher(1)
+        self.client.force_authenticate(User.objects.get(id=other.user_id))
+
+        self.assertEqual(self.patch(url, 0, b'x').status_code, 404)
+
+    def test_stale_sessions_are_cleaned_up(self):
+        url = self.create_video_upload()
+        self.patch(url, 0, self.payload[:self.chunk_size])
+        session = self.session(url)
+        UploadSession.objects.filter(id=session.id).update(updated_at=session.updated_at - timedelta(days=3))
+
+        self.assertEqual(cleanup_stale_uploads(), 1)
+
+        self.assertFalse(os.path.exists(session.partial_path))
+        self.assertEqual(cleanup_stale_uploads(), 0)
+
+
+STAT_FIELDS = ('total_courses', 'active_courses', 'total_students', 'total_videos', 'total_quizzes', 'total_live_classes')
+
+
+class TeacherStatsTests(TestCase):
+    def setUp(self):
+        self.teacher = make_teacher()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(id=self.teacher.user_id))
+        # The first dashboard visit creates the row the signals then maintain
+        self.client.get('/api/teacher/')
+        self.courses = [self.add_course(i) for i in range(3)]
+
+    def add_course(self, n, teacher=None):
+        course = Course.objects.create(title=f'C{n}', description='d', teacher=teacher or self.teacher, is_active=n % 2 == 0)
+        for _ in range(2):
+            Video.objects.create(course=course, title='v', video_file='x.mp4')
+        Quiz.objects.create(course=course, title='q')
+        Enrollment.objects.create(student=make_student(n), course=course)
+        return course
+
+    def assertMatchesRebuild(self, teacher):
+        stored = TeacherStats.objects.get(teacher=teacher)
+        fresh = TeacherStats.rebuild(teacher)
+        self.assertEqual([getattr(stored, f) for f in STAT_FIELDS], [getattr(fresh, f) for f in STAT_FIELDS])
+
+    def test_counters_follow_changes(self):
+        self.courses[1].is_active = True
+        self.courses[1].save()
+        Video.objects.filter(course=self.courses[0]).first().delete()
+        Meeting.objects.create(title='m', course=self.courses[0], meeting_type='lecture', host=self.teacher.user)
+        self.courses[2].delete()
+
+        stats = TeacherStats.objects.get(teacher=self.teacher)
+        self.assertEqual(
+            [getattr(stats, f) for f in STAT_FIELDS],
+            [2, 2, 2, 3, 2, 1]
+        )
+        self.assertMatchesRebuild(self.teacher)
+
+    def test_moving_a_course_moves_its_counters(self):
+        other = make_teacher(1)
+        TeacherStats.rebuild(other)
+        Meeting.objects.create(title='m', course=self.courses[0], meeting_type='lecture', host=self.teacher.user)
+
+        self.courses[0].teacher = other
+        self.courses[0].save()
+
+        self.assertMatchesRebuild(self.teacher)
+        self.assertMatchesRebuild(other)
+        self.assertEqual(TeacherStats.objects.get(teacher=other).total_live_classes, 1)
+
+    def test_dashboard_reads_the_stored_counters(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/teacher/')
+        for i in range(3, 8):
+            self.add_course(i)
+
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/teacher/')
+
+        self.assertEqual(len(large), len(small))
+        statistics = response.json()['data']['statistics']
+        fresh = TeacherStats.rebuild(self.teacher)
+        self.assertEqual(statistics, {key: getattr(fresh, key) for key in statistics})
+
+    def test_course_list_counts(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get('/api/teacher/courses/')
+        for i in range(3, 8):
+            self.add_course(i)
+
+        with CaptureQueriesContext(connection) as large:
+            response = self.client.get('/api/teacher/courses/')
+
+        self.assertEqual(len(large), len(small))
+        row = next(c for c in response.json()['data'] if c['id'] == self.courses[0].id)
+        self.assertEqual((row['total_videos'], row['total_quizzes'], row['total_enrollments']), (2, 1, 1))
+
+
+class CourseRosterTests(TestCase):
+    def setUp(self):
+        self.teacher = make_teacher()
+        self.course = Course.objects.create(title='Roster=Course', description='d', teacher=self.teacher)
+        quiz = Quiz.objects.create(course=self.course, title='Q1')
+        question = Question.objects.create(quiz=quiz, question='x', options=['a', 'b'], correct_answer=1)
+        self.students = [make_student(i) for i in range(7)]
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.course)
+        self.students[0].full_name = '=HYPERLINK("http://example.com")'
+        self.students[0].save()
+        grading.submit_attempt(self.students[1], quiz, {str(question.id): 1})
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(id=self.teacher.user_id))
+        self.url = f'/api/teacher/courses/{self.course.id}/students/'
+
+    def export(self, export_type=''):
+        response = self.client.get(self.url + 'export/' + (f'?type={export_type}' if export_type else ''))
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_page_numbers(self):
+        data = self.client.get(self.url + '?page_size=3').json()['data']
+
+        self.assertEqual(data['total_students'], 7)
+        self.assertEqual(len(data['students']), 3)
+
+    def test_page_query_count_does_not_grow_with_roster(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url + '?page_size=50')
+        for i in range(10, 20):
+            Enrollment.objects.create(student=make_student(i), course=self.course)
+
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.url + '?page_size=50')
+
+        self.assertEqual(len(large), len(small))
+
+    def test_cursor_pages_cover_the_roster_once(self):
+        seen = []
+        data = self.client.get(self.url + '?page_size=3&cursor=').json()['data']
+        seen += [s['id'] for s in data['students']]
+        while data['next']:
+            data = self.client.get(data['next']).json()['data']
+            seen += [s['id'] for s in data['students']]
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_csv_export(self):
+        # Enrollments without a rollup row still export their progress
+        EnrollmentProgress.objects.filter(enrollment__student=self.students[1]).delete()
+
+        _, content = self.export()
+
+        rows = list(csv.reader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual(len(rows), 8)
+        self.assertTrue(any(row[0].startswith("'=") for row in rows[1:]))
+        graded = next(row for row in rows[1:] if row[-1] == '100')
+        self.assertEqual(graded[3], '100.0')
+
+    def test_xlsx_export_is_a_valid_workbook(self):
+        response, content = self.export('xlsx')
+
+        self.assertIn('.xlsx', response['Content-Disposition'])
+        workbook = zipfile.ZipFile(io.BytesIO(content))
+        self.assertIsNone(workbook.testzip())
+        self.assertEqual(workbook.read('xl/worksheets/sheet1.xml').decode().count('<row '), 8)
+
+    def test_unknown_export_type(self):
+        self.assertEqual(self.client.get(self.url + 'export/?type=pdf').status_code, 400)
+
+    def test_other_teachers_cannot_export(self):
+        self.client.force_authenticate(User.objects.get(id=make_teacher(1).user_id))
+
+        self.assertEqual(self.client.get(self.url + 'export/').status_code, 404)
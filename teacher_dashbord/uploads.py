@@ -0,0 +1,220 @@
+# teacher_dashboard/uploads.py
+
+"""
+Resumable uploads following the tus 1.0 core protocol (plus its checksum
+and termination extensions) for lecture videos and teacher documents.
+
+    POST   /api/teacher/uploads/        create a session, returns Location
+    HEAD   /api/teacher/uploads/<id>/   current Upload-Offset, to resume
+    PATCH  /api/teacher/uploads/<id>/   append bytes at Upload-Offset
+    DELETE /api/teacher/uploads/<id>/   abandon the upload
+
+PATCH bodies are streamed straight from the socket into a partial file
+under MEDIA_ROOT/uploads/partial/, never through Django's upload handlers,
+so the 10MB in-memory limits do not apply and a chunk is never held in
+memory as a whole. An optional `Upload-Checksum: <algorithm> <base64>`
+header is verified per chunk; a mismatching chunk is cut off again and
+the client retries from the unchanged offset. A chunk holds an exclusive
+flock on the partial file while it writes, so a concurrent PATCH for the
+same upload gets 423 instead of truncating it, and the offset only moves
+by a conditional UPDATE from the offset the chunk started at. No database
+transaction stays open while a chunk streams in. When the last byte arrives
+the partial file is renamed into media storage (no copy) and attached to
+the target Video or TeacherProfile field.
+"""
+
+import base64
+import fcntl
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from courses.models import Video
+from .models import UploadSession
+
+TUS_VERSION = '1.0.0'
+CHECKSUM_ALGORITHMS = {'sha1': hashlib.sha1, 'sha256': hashlib.sha256, 'md5': hashlib.md5}
+STREAM_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE = getattr(settings, 'RESUMABLE_UPLOAD_MAX_SIZE', 20 * 1024 ** 3)
+
+# Document purpose -> TeacherProfile field the finished file is stored in
+DOCUMENT_FIELDS = {
+    'resume': 'resume',
+    'degree_certificates': 'degree_certificates',
+    'id_proof': 'id_proof',
+}
+
+
+class UploadError(Exception):
+    """A request that breaks the protocol; carries the HTTP status to answer with"""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class ChecksumMismatch(UploadError):
+    def __init__(self):
+        # 460 is the status the tus checksum extension assigns to this case
+        super().__init__('Upload-Checksum does not match the received chunk', 460)
+
+
+def parse_checksum(header):
+    """
+    Split an `Upload-Checksum` header into (hasher, expected digest bytes)
+    """
+    if not header:
+        return None, None
+    try:
+        algorithm, encoded = header.strip().split(' ', 1)
+        expected = base64.b64decode(encoded, validate=True)
+    except ValueError:
+        raise UploadError('Malformed Upload-Checksum header', 400)
+    if algorithm.lower() not in CHECKSUM_ALGORITHMS:
+        raise UploadError(f"Unsupported checksum algorithm '{algorithm}'", 400)
+    return CHECKSUM_ALGORITHMS[algorithm.lower()](), expected
+
+
+def append_chunk(session, stream, offset, content_length, checksum_header=None):
+    """
+    Write the request body at `offset` and advance the session. Returns the
+    new offset.
+    """
+    if session.status != 'active':
+        raise UploadError('Upload already completed', 403)
+    if content_length is None or content_length < 0:
+        raise UploadError('Content-Length is required', 411)
+
+    hasher, expected = parse_checksum(checksum_header)
+    path = session.partial_path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b') as partial:
+        # One writer per partial file: a second PATCH for the same upload is
+        # turned away instead of truncating the file under the first one
+        try:
+            fcntl.flock(partial, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadError('Another request is writing to this upload', 423)
+
+        # Re-read the session now that the file is ours; the caller's copy
+        # may predate a chunk that has just finished
+        current = UploadSession.objects.filter(id=session.id).values('offset', 'status').first()
+        if current is None:
+            raise UploadError('Upload not found', 404)
+        session.offset, session.status = current['offset'], current['status']
+
+        if session.status != 'active':
+            # The finished file has been moved away; this is an empty one we just opened
+            os.remove(path)
+            raise UploadError('Upload already completed', 403)
+        if offset != session.offset:
+            raise UploadError('Upload-Offset does not match the current offset', 409)
+        if offset + content_length > session.total_size:
+            raise UploadError('Chunk runs past the declared Upload-Length', 413)
+
+        # Anything past the recorded offset is debris from an interrupted chunk
+        partial.truncate(offset)
+        partial.seek(offset)
+        received = 0
+        while received < content_length:
+            data = stream.read(min(STREAM_CHUNK_SIZE, content_length - received))
+            if not data:
+                break
+            partial.write(data)
+            if hasher:
+                hasher.update(data)
+            received += len(data)
+        partial.flush()
+
+        if hasher and (received != content_length or hasher.digest() != expected):
+            partial.truncate(offset)
+            raise ChecksumMismatch()
+
+        # A dropped connection still keeps whatever arrived; the client resumes from here.
+        # update() skips auto_now, and cleanup_stale_uploads expires sessions by updated_at
+        new_offset = offset + received
+        session.updated_at = timezone.now()
+        claimed = UploadSession.objects.filter(id=session.id, offset=offset, status='active').update(
+            offset=new_offset, updated_at=session.updated_at
+        )
+        if not claimed:
+            partial.truncate(offset)
+            raise UploadError('Upload-Offset does not match the current offset', 409)
+        session.offset = new_offset
+
+        if session.is_complete:
+            finish(session)
+    return new_offset
+
+
+def _storage_name(upload_to, filename):
+    name = default_storage.get_available_name(
+        os.path.join(upload_to, os.path.basename(filename))
+    )
+    target = default_storage.path(name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    return name, target
+
+
+def finish(session):
+    """
+    Move the completed file into media storage and attach it to its target
+    """
+    if session.purpose == 'video':
+        upload_to = Video._meta.get_field('video_file').upload_to
+    else:
+        profile = session.owner.teacher_profile
+        field_name = DOCUMENT_FIELDS[session.purpose]
+        upload_to = profile._meta.get_field(field_name).upload_to
+
+    name, target = _storage_name(upload_to, session.filename)
+    os.replace(session.partial_path, target)
+
+    try:
+        with transaction.atomic():
+            if session.purpose == 'video':
+                video = session.video
+                if video is None:
+                    video = Video.objects.create(course=session.course, video_file=name, **session.metadata)
+                    session.video = video
+                else:
+                    video.video_file.name = name
+                    video.save(update_fields=['video_file'])
+            else:
+                setattr(profile, field_name, name)
+                profile.save(update_fields=[field_name])
+
+            session.status = 'completed'
+            session.save(update_fields=['status', 'video', 'updated_at'])
+    except Exception:
+        # Nothing points at the moved file; put it back so the client can retry
+        os.replace(target, session.partial_path)
+        raise
+
+
+def parse_metadata(header):
+    """
+    Decode a tus `Upload-Metadata` header ("key base64value,key2 base64value")
+    """
+    metadata = {}
+    for pair in (header or '').split(','):
+        if not pair.strip():
+            continue
+        key, _, encoded = pair.strip().partition(' ')
+        try:
+            metadata[key] = base64.b64decode(encoded).decode() if encoded else ''
+        except (ValueError, UnicodeDecodeError):
+            raise UploadError(f"Invalid Upload-Metadata value for '{key}'", 400)
+    return metadata
+
+
+def discard(session):
+    if os.path.exists(session.partial_path):
+        os.remove(session.partial_path)
+    session.delete()
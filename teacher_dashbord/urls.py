@@ -17,10 +17,18 @@ urlpatterns = [
     
     # Quiz Management
     path('courses/<int:course_id>/quizzes/', views.teacher_course_quizzes, name='teacher_course_quizzes'),
+
+    # Bulk content import
+    path('courses/<int:course_id>/import/', views.teacher_course_import, name='teacher_course_import'),
     path('quizzes/<int:quiz_id>/', views.teacher_quiz_detail, name='teacher_quiz_detail'),
     
+    # Resumable uploads (tus)
+    path('uploads/', views.teacher_uploads, name='teacher_uploads'),
+    path('uploads/<uuid:upload_id>/', views.teacher_upload_detail, name='teacher_upload_detail'),
+
     # Student Management
     path('courses/<int:course_id>/students/', views.teacher_course_students, name='teacher_course_students'),
+    path('courses/<int:course_id>/students/export/', views.teacher_course_students_export, name='teacher_course_students_export'),
     # Add these to your existing urlpatterns
     path('courses/<int:course_id>/live-classes/', views.teacher_course_live_classes, name='teacher_course_live_classes'),
     path('live-classes/<int:class_id>/', views.teacher_live_class_detail, name='teacher_live_class_detail'),
@@ -5,9 +5,19 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from authentication.models import TeacherProfile,StudentProfile
-from courses.models import Course, Video, Quiz, Assignment, Enrollment
-from courses.serializers import CourseListSerializer, VideoDetailSerializer, QuizSerializer, AssignmentSerializer
+from courses.models import Course, CourseFunnel, Video, Quiz, Assignment, Enrollment, QuizAnalytics
+from courses import importer
+from courses.serializers import (
+    CourseListSerializer, VideoDetailSerializer, QuizSerializer, AssignmentSerializer, course_list_prefetches
+)
 from .serializers import TeacherCourseSerializer, TeacherVideoSerializer, TeacherQuizSerializer, EnrolledStudentSerializer,LiveClassSerializer
+from .serializers import UploadSessionSerializer, UploadSessionCreateSerializer, QuizAnalyticsSerializer, CourseFunnelSerializer
+from .models import TeacherStats, UploadSession
+from . import exports, uploads
+from django.urls import reverse
+from django.http import StreamingHttpResponse
+from django.utils.text import slugify
+from lms.pagination import KeysetPagination
 from meetings.models import Meeting
 from django.core.mail import send_mail
 from datetime import datetime
@@ -46,24 +56,21 @@ def teacher_dashboard(request):
         }, status=status.HTTP_403_FORBIDDEN)
     
     try:
-        teacher = TeacherProfile.objects.get(user=request.user)
+        teacher = TeacherProfile.objects.select_related('user', 'stats').get(user=request.user)
     except TeacherProfile.DoesNotExist:
         return Response({
             'success': False,
             'message': 'Teacher profile not found'
         }, status=status.HTTP_404_NOT_FOUND)
     
-    # Get teacher's courses statistics
-    courses = Course.objects.filter(teacher=teacher)
-    total_courses = courses.count()
-    active_courses = courses.filter(is_active=True).count()
-    total_students = Enrollment.objects.filter(course__teacher=teacher).count()
-    total_videos = Video.objects.filter(course__teacher=teacher).count()
-    total_quizzes = Quiz.objects.filter(course__teacher=teacher).count()
-    total_live_classes = Meeting.objects.filter(course__teacher=teacher, meeting_type='lecture').count()
+    # Counters are maintained by teacher_dashbord/signals.py
+    stats = TeacherStats.for_teacher(teacher)
     
     # Recent courses
-    recent_courses = courses.order_by('-created_at')[:5]
+    select_lookups, prefetch_lookups = course_list_prefetches()
+    recent_courses = Course.objects.filter(teacher=teacher).select_related(
+        *select_lookups
+    ).prefetch_related(*prefetch_lookups).order_by('-created_at')[:5]
     
     return Response({
         'success': True,
@@ -72,14 +79,14 @@ def teacher_dashboard(request):
             'teacher_name': teacher.user.username,
             'teacher_bio': teacher.bio,
             'statistics': {
-                'total_courses': total_courses,
-                'active_courses': active_courses,
-                'total_students': total_students,
-                'total_videos': total_videos,
-                'total_quizzes': total_quizzes,
-                'total_live_classes': total_live_classes,
+                'total_courses': stats.total_courses,
+                'active_courses': stats.active_courses,
+                'total_students': stats.total_students,
+                'total_videos': stats.total_videos,
+                'total_quizzes': stats.total_quizzes,
+                'total_live_classes': stats.total_live_classes,
             },
-            'recent_courses': CourseListSerializer(recent_courses, many=True).data
+            'recent_courses': CourseListSerializer(recent_courses, many=True, context={'request': request}).data
         }
     }, status=status.HTTP_200_OK)
 
@@ -156,7 +163,7 @@ def teacher_courses(request):
         }, status=status.HTTP_404_NOT_FOUND)
     
     if request.method == 'GET':
-        courses = Course.objects.filter(teacher=teacher).order_by('-created_at')
+        courses = Course.with_teacher_counts(Course.objects.filter(teacher=teacher)).order_by('-created_at')
         serializer = TeacherCourseSerializer(courses, many=True)
         return Response({
             'success': True,
@@ -287,7 +294,7 @@ def teacher_course_detail(request, course_id):
     
     try:
         teacher = TeacherProfile.objects.get(user=request.user)
-        course = Course.objects.get(id=course_id, teacher=teacher)
+        course = Course.with_teacher_counts(Course.objects.select_related('funnel')).get(id=course_id, teacher=teacher)
     except TeacherProfile.DoesNotExist:
         return Response({
             'success': False,
@@ -300,10 +307,15 @@ def teacher_course_detail(request, course_id):
         }, status=status.HTTP_404_NOT_FOUND)
     
     if request.method == 'GET':
-        serializer = TeacherCourseSerializer(course)
+        data = TeacherCourseSerializer(course).data
+        # Precomputed nightly by the refresh_course_funnels task; None until the first run
+        try:
+            data['funnel'] = CourseFunnelSerializer(course.funnel).data
+        except CourseFunnel.DoesNotExist:
+            data['funnel'] = None
         return Response({
             'success': True,
-            'data': serializer.data
+            'data': data
         }, status=status.HTTP_200_OK)
     
     elif request.method == 'PUT':
@@ -529,10 +541,47 @@ def teacher_video_detail(request, video_id):
 # =================================
 
 
+class RosterPagination(KeysetPagination):
+    """Course roster pages (send ?cursor= for keyset paging)"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    keyset_field = 'enrolled_at'
+
+
+def _teacher_course(request, course_id):
+    """
+    (course, error response) for a course of the requesting teacher
+    """
+    if request.user.role != 'teacher':
+        return None, Response({
+            'success': False,
+            'message': 'Access denied. Teacher privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        teacher = TeacherProfile.objects.get(user=request.user)
+        course = Course.objects.select_related('stats').get(id=course_id, teacher=teacher)
+    except TeacherProfile.DoesNotExist:
+        return None, Response({
+            'success': False,
+            'message': 'Teacher profile not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Course.DoesNotExist:
+        return None, Response({
+            'success': False,
+            'message': 'Course not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    return course, None
+
+
 @swagger_auto_schema(
     method='get',
     operation_summary="List enrolled students",
-    operation_description="Retrieve all enrolled students for a specific course belonging to the authenticated teacher.",
+    operation_description=(
+        "Retrieve one page of the enrolled students of a course belonging to the authenticated teacher, "
+        "newest enrollment first. Use ?page and ?page_size (max 100), or send ?cursor= for keyset paging."
+    ),
     manual_parameters=[
         openapi.Parameter(
             'course_id',
@@ -540,7 +589,10 @@ def teacher_video_detail(request, video_id):
             description="UUID of the course",
             type=openapi.TYPE_STRING,
             format=openapi.FORMAT_UUID
-        )
+        ),
+        openapi.Parameter('page', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=False),
+        openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=False),
+        openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=False),
     ],
      security=[{'Bearer': []}]
 )
@@ -548,41 +600,75 @@ def teacher_video_detail(request, video_id):
 @permission_classes([IsAuthenticated])
 def teacher_course_students(request, course_id):
     """
-    Get enrolled students for a specific course
+    Get enrolled students for a specific course, one page at a time
     """
-    if request.user.role != 'teacher':
-        return Response({
-            'success': False,
-            'message': 'Access denied. Teacher privileges required.'
-        }, status=status.HTTP_403_FORBIDDEN)
+    course, error = _teacher_course(request, course_id)
+    if error:
+        return error
     
-    try:
-        teacher = TeacherProfile.objects.get(user=request.user)
-        course = Course.objects.get(id=course_id, teacher=teacher)
-    except TeacherProfile.DoesNotExist:
-        return Response({
-            'success': False,
-            'message': 'Teacher profile not found'
-        }, status=status.HTTP_404_NOT_FOUND)
-    except Course.DoesNotExist:
-        return Response({
-            'success': False,
-            'message': 'Course not found'
-        }, status=status.HTTP_404_NOT_FOUND)
-    
-    enrollments = Enrollment.objects.filter(course=course).order_by('-enrolled_at')
+    paginator = RosterPagination()
+    enrollments = paginator.paginate_queryset(exports.roster_queryset(course), request)
     serializer = EnrolledStudentSerializer(enrollments, many=True)
     
     return Response({
         'success': True,
         'data': {
             'course_title': course.title,
-            'total_students': enrollments.count(),
+            'total_students': course.get_total_enrollments(),
+            'next': paginator.get_next_link(),
+            'previous': None if paginator.keyset else paginator.get_previous_link(),
             'students': serializer.data
         }
     }, status=status.HTTP_200_OK)
 
 
+@swagger_auto_schema(
+    method='get',
+    operation_summary="Export roster and gradebook",
+    operation_description=(
+        "Stream every enrolled student of the course as a CSV (default) or XLSX file with enrollment date, "
+        "progress percentage, last activity and the best score on each quiz."
+    ),
+    manual_parameters=[
+        openapi.Parameter(
+            'course_id',
+            openapi.IN_PATH,
+            description="UUID of the course",
+            type=openapi.TYPE_STRING,
+            format=openapi.FORMAT_UUID
+        ),
+        openapi.Parameter(
+            'type', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+            enum=list(exports.EXPORT_FORMATS), required=False
+        ),
+    ],
+     security=[{'Bearer': []}]
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def teacher_course_students_export(request, course_id):
+    """
+    Stream the course roster and gradebook as a file
+    """
+    course, error = _teacher_course(request, course_id)
+    if error:
+        return error
+    
+    export_type = request.query_params.get('type', 'csv')
+    if export_type not in exports.EXPORT_FORMATS:
+        return Response({
+            'success': False,
+            'message': f"Unsupported export type. Use one of: {', '.join(exports.EXPORT_FORMATS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    writer, content_type = exports.EXPORT_FORMATS[export_type]
+    header, rows = exports.gradebook(course)
+    response = StreamingHttpResponse(writer(header, rows), content_type=content_type)
+    filename = f"{slugify(course.title) or 'course'}-students.{export_type}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
 # ==================================
 # Teacher course quize
 # ==================================
@@ -673,6 +759,80 @@ def teacher_course_quizzes(request, course_id):
 
 
 
+@swagger_auto_schema(
+    method='post',
+    tags=["Teacher Course Import"],
+    operation_summary="Bulk import course content",
+    operation_description=(
+        "Import topics, videos, quizzes (with questions) and assignments from a manifest in one "
+        "transaction. Send the JSON manifest as the request body, or upload a .json/.csv file as "
+        "'manifest'. Video files must already be in media storage. Pass ?dry_run=true to only validate."
+    ),
+    manual_parameters=[
+        openapi.Parameter(
+            'course_id',
+            openapi.IN_PATH,
+            description="ID of the course",
+            type=openapi.TYPE_INTEGER
+        ),
+        openapi.Parameter(
+            'dry_run',
+            openapi.IN_QUERY,
+            description="Validate the manifest without importing it",
+            type=openapi.TYPE_BOOLEAN
+        )
+    ],
+    security=[{'Bearer': []}]
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def teacher_course_import(request, course_id):
+    """
+    Bulk import course content from a JSON or CSV manifest
+    """
+    if request.user.role != 'teacher':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Teacher privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        teacher = TeacherProfile.objects.get(user=request.user)
+        course = Course.objects.get(id=course_id, teacher=teacher)
+    except TeacherProfile.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Teacher profile not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except Course.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Course not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    dry_run = request.query_params.get('dry_run', '').lower() == 'true'
+    try:
+        manifest_file = request.FILES.get('manifest')
+        if manifest_file:
+            data = importer.load_manifest(manifest_file.read(), manifest_file.name)
+        else:
+            data = request.data
+        counts = importer.import_manifest(course, data, dry_run=dry_run)
+    except importer.ManifestError as e:
+        return Response({
+            'success': False,
+            'message': 'Course import failed',
+            'errors': e.errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'success': True,
+        'message': 'Manifest is valid' if dry_run else 'Course content imported successfully',
+        'data': counts
+    }, status=status.HTTP_200_OK if dry_run else status.HTTP_201_CREATED)
+
+
+
 @swagger_auto_schema(
     method='get',
      tags=["Teacher's Course Quize"],
@@ -749,10 +909,15 @@ def teacher_quiz_detail(request, quiz_id):
         }, status=status.HTTP_404_NOT_FOUND)
     
     if request.method == 'GET':
-        serializer = TeacherQuizSerializer(quiz)
+        data = TeacherQuizSerializer(quiz).data
+        # Precomputed by the refresh_quiz_analytics task; None until the first run
+        try:
+            data['analytics'] = QuizAnalyticsSerializer(quiz.analytics).data
+        except QuizAnalytics.DoesNotExist:
+            data['analytics'] = None
         return Response({
             'success': True,
-            'data': serializer.data
+            'data': data
         }, status=status.HTTP_200_OK)
     
     elif request.method == 'PUT':
@@ -1036,4 +1201,161 @@ def teacher_live_class_detail(request, class_id):
         }, status=status.HTTP_200_OK)
     
 
-    
\ No newline at end of file
+    
+
+
+# ===== RESUMABLE UPLOADS (tus protocol, see uploads.py) =====
+
+def _tus_headers(session=None, **extra):
+    headers = {'Tus-Resumable': uploads.TUS_VERSION, 'Cache-Control': 'no-store'}
+    if session is not None:
+        headers['Upload-Offset'] = str(session.offset)
+        headers['Upload-Length'] = str(session.total_size)
+    headers.update(extra)
+    return headers
+
+
+@swagger_auto_schema(
+    method='post',
+    tags=["Teacher Uploads"],
+    operation_summary="Start a resumable upload",
+    operation_description=(
+        "Create a tus upload session for a course video or a teacher document. Send the details as "
+        "JSON, or as tus Upload-Length / Upload-Metadata headers. The Location header points at the "
+        "session, which then receives the file with PATCH requests."
+    ),
+    request_body=UploadSessionCreateSerializer,
+    security=[{'Bearer': []}]
+)
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def teacher_uploads(request):
+    """
+    Create a resumable upload session
+    """
+    if request.user.role != 'teacher':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Teacher privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        teacher = TeacherProfile.objects.get(user=request.user)
+        data = uploads.parse_metadata(request.headers.get('Upload-Metadata'))
+    except TeacherProfile.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Teacher profile not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    except uploads.UploadError as e:
+        return Response({
+            'success': False,
+            'message': e.message
+        }, status=e.status_code, headers=_tus_headers())
+
+    data.update(request.data.items())
+    if 'total_size' not in data and request.headers.get('Upload-Length'):
+        data['total_size'] = request.headers['Upload-Length']
+
+    serializer = UploadSessionCreateSerializer(
+        data=data, context={'teacher': teacher, 'max_size': uploads.MAX_UPLOAD_SIZE}
+    )
+    if not serializer.is_valid():
+        return Response({
+            'success': False,
+            'message': 'Upload could not be started',
+            'errors': serializer.errors
+        }, status=status.HTTP_400_BAD_REQUEST, headers=_tus_headers())
+
+    session = serializer.save()
+    location = request.build_absolute_uri(reverse('teacher_upload_detail', args=[session.id]))
+    return Response({
+        'success': True,
+        'message': 'Upload started',
+        'data': UploadSessionSerializer(session).data
+    }, status=status.HTTP_201_CREATED, headers=_tus_headers(session, Location=location))
+
+
+@swagger_auto_schema(
+    method='get',
+    tags=["Teacher Uploads"],
+    operation_summary="Get upload status",
+    security=[{'Bearer': []}]
+)
+@swagger_auto_schema(
+    method='patch',
+    tags=["Teacher Uploads"],
+    operation_summary="Append a chunk",
+    operation_description=(
+        "Send the next bytes of the file with Content-Type application/offset+octet-stream and the "
+        "current Upload-Offset. An optional Upload-Checksum (sha1/sha256/md5, base64) is verified; "
+        "a mismatch answers 460 and the chunk must be resent."
+    ),
+    security=[{'Bearer': []}]
+)
+@swagger_auto_schema(
+    method='delete',
+    tags=["Teacher Uploads"],
+    operation_summary="Cancel an upload",
+    security=[{'Bearer': []}]
+)
+@api_view(['GET', 'HEAD', 'PATCH', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def teacher_upload_detail(request, upload_id):
+    """
+    Resume (HEAD), continue (PATCH), inspect (GET) or cancel (DELETE) an upload
+    """
+    try:
+        session = UploadSession.objects.get(id=upload_id, owner=request.user)
+    except UploadSession.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Upload not found'
+        }, status=status.HTTP_404_NOT_FOUND, headers=_tus_headers())
+
+    if request.method == 'HEAD':
+        return Response(status=status.HTTP_200_OK, headers=_tus_headers(session))
+
+    if request.method == 'GET':
+        return Response({
+            'success': True,
+            'data': UploadSessionSerializer(session).data
+        }, status=status.HTTP_200_OK, headers=_tus_headers(session))
+
+    if request.method == 'DELETE':
+        if session.status == 'completed':
+            return Response({
+                'success': False,
+                'message': 'Upload already completed'
+            }, status=status.HTTP_403_FORBIDDEN, headers=_tus_headers(session))
+        uploads.discard(session)
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=_tus_headers())
+
+    # PATCH: the body is read straight from the request stream, never via request.data
+    if request.content_type != 'application/offset+octet-stream':
+        return Response({
+            'success': False,
+            'message': 'Content-Type must be application/offset+octet-stream'
+        }, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, headers=_tus_headers(session))
+
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': 'Upload-Offset header is required'
+        }, status=status.HTTP_400_BAD_REQUEST, headers=_tus_headers(session))
+
+    try:
+        uploads.append_chunk(
+            session, request.stream, offset, content_length,
+            checksum_header=request.headers.get('Upload-Checksum')
+        )
+    except uploads.UploadError as e:
+        return Response({
+            'success': False,
+            'message': e.message
+        }, status=e.status_code, headers=_tus_headers(session))
+
+    return Response(status=status.HTTP_204_NO_CONTENT, headers=_tus_headers(session))